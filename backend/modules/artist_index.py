@@ -0,0 +1,165 @@
+"""
+Artist Index Module
+In-memory index of every artist name the engine has seen, for fast fuzzy lookup
+"""
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class ArtistIndex:
+    """
+    Trigram inverted index over normalized artist names.
+    Candidates sharing the most trigrams with the query are re-ranked by
+    edit-distance similarity, with a boost when the query is a leading part
+    of the name ("arijit" -> "Arijit Singh"). Ties go to the more often seen name.
+    The boost ranks such names as suggestions but never makes them a confident
+    match: "Queen" may be the band, not "Queen Latifah", so Last.fm decides.
+    """
+
+    NGRAM = 3
+    MAX_CANDIDATES = 8
+    PREFIX_SCORE = 0.8      # must stay below best_match's confidence threshold
+
+    def __init__(self, max_names: int = 200000):
+        self.max_names = max_names
+        self._names: Dict[str, str] = {}          # normalized -> display name
+        self._seen: Counter = Counter()           # normalized -> times seen
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.confident_lookups = 0
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        name = unicodedata.normalize('NFKD', name or '')
+        name = ''.join(c for c in name if not unicodedata.combining(c)).lower()
+        name = re.sub(r'[^\w\s&]', ' ', name)
+        return ' '.join(name.split())
+
+    @classmethod
+    def _ngrams(cls, normalized: str) -> Set[str]:
+        padded = f"  {normalized} "
+        return {padded[i:i + cls.NGRAM] for i in range(len(padded) - cls.NGRAM + 1)}
+
+    @staticmethod
+    def edit_distance(a: str, b: str) -> int:
+        if len(a) < len(b):
+            a, b = b, a
+        previous = list(range(len(b) + 1))
+        for i, ca in enumerate(a, 1):
+            current = [i]
+            for j, cb in enumerate(b, 1):
+                current.append(min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb)
+                ))
+            previous = current
+        return previous[-1]
+
+    @classmethod
+    def similarity(cls, a: str, b: str) -> float:
+        """Score in [0, 1] between two normalized names"""
+        if a == b:
+            return 1.0
+        if not a or not b:
+            return 0.0
+        score = 1.0 - cls.edit_distance(a, b) / max(len(a), len(b))
+        # Query is the leading word(s) of the name, e.g. a first name only
+        shorter, longer = sorted((a, b), key=len)
+        if len(shorter) >= 4 and longer.startswith(shorter + ' '):
+            score = max(score, cls.PREFIX_SCORE)
+        return score
+
+    def add(self, name: str):
+        normalized = self.normalize(name)
+        if not normalized:
+            return
+        with self._lock:
+            if normalized not in self._names:
+                if len(self._names) >= self.max_names:
+                    return
+                self._names[normalized] = name.strip()
+                for gram in self._ngrams(normalized):
+                    self._postings[gram].add(normalized)
+            self._seen[normalized] += 1
+
+    def add_many(self, names: Iterable[str]):
+        for name in names:
+            self.add(name)
+
+    def load_seed_file(self, path: str) -> int:
+        """Load one artist name per line; returns how many names were read"""
+        if not path or not os.path.exists(path):
+            return 0
+        count = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self.add(line.strip())
+                        count += 1
+        except OSError as e:
+            print(f"⚠️  Could not read artist seed file '{path}': {e}")
+        return count
+
+    def lookup(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Ranked (display name, score) candidates for the query"""
+        normalized = self.normalize(query)
+        if not normalized:
+            return []
+
+        with self._lock:
+            self.lookups += 1
+            if normalized in self._names:
+                return [(self._names[normalized], 1.0)]
+
+            query_grams = self._ngrams(normalized)
+            shared = Counter()
+            for gram in query_grams:
+                postings = self._postings.get(gram)
+                if postings:
+                    shared.update(postings)
+            # Dice coefficient on trigram sets is a cheap upper bound filter;
+            # only the strongest few candidates pay for an edit distance
+            dice = {
+                c: 2 * count / (len(query_grams) + len(c) + 1)
+                for c, count in shared.items()
+            }
+            candidates = sorted(dice, key=dice.get, reverse=True)[:self.MAX_CANDIDATES]
+            seen = {c: self._seen[c] for c in candidates}
+            names = {c: self._names[c] for c in candidates}
+
+        ranked = sorted(
+            ((self.similarity(normalized, c), seen[c], c) for c in candidates),
+            reverse=True
+        )
+        return [(names[c], round(score, 3)) for score, _, c in ranked[:limit]]
+
+    def best_match(self, query: str, min_score: float) -> Optional[str]:
+        """
+        Best known name scoring at least `min_score` (and more than a bare
+        prefix match, whatever the threshold is configured to), else None
+        """
+        matches = self.lookup(query, limit=1)
+        if matches and matches[0][1] >= min_score and matches[0][1] > self.PREFIX_SCORE:
+            with self._lock:
+                self.confident_lookups += 1
+            return matches[0][0]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'artists': len(self._names),
+                'ngrams': len(self._postings),
+                'lookups': self.lookups,
+                'confident_lookups': self.confident_lookups
+            }
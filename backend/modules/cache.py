@@ -0,0 +1,201 @@
+"""
+Cache Module
+Thread-safe TTL + LRU caches for upstream responses
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """Rough deep size in bytes of cached values (strings, containers, pydantic models)"""
+    size = sys.getsizeof(obj)
+    if _depth > 4:
+        return size
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += estimate_size(vars(obj), _depth + 1)
+    return size
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a TTL.
+    Bounded by entry count and optionally by estimated bytes.
+    Expired entries are kept for `stale_ttl` more seconds so callers
+    can serve them while a refresh runs (stale-while-revalidate).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0.0, name: str = "cache",
+                 max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        # key -> (value, expires_at, size_bytes, negative)
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, int, bool]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._negative = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, key: Hashable) -> Tuple[Any, Optional[str]]:
+        """Return (value, state) where state is 'fresh', 'stale' or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+
+            value, expires_at = entry[0], entry[1]
+            if now < expires_at:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value, 'fresh'
+
+            if now < expires_at + self.stale_ttl:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                return value, 'stale'
+
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None, None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value, state = self.lookup(key)
+        return value if state else default
+
+    def peek(self, key: Hashable, default: Any = None, include_stale: bool = False) -> Any:
+        """Return a value without touching LRU order or counters"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at = entry[1] + (self.stale_ttl if include_stale else 0)
+            return entry[0] if time.monotonic() < expires_at else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, negative: bool = False):
+        """Store a value; `negative` marks fallback/not-found entries, usually given a shorter ttl"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        size = estimate_size(key) + estimate_size(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size, negative)
+            self._bytes += size
+            self._negative += negative
+            while self._data and (
+                len(self._data) > self.maxsize
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        _, _, size, negative = self._data.pop(key)
+        self._bytes -= size
+        self._negative -= negative
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of fresh (key, value) pairs, oldest first"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._data.items() if now < entry[1]]
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self._negative = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._data),
+                'negative_entries': self._negative,
+                'max_entries': self.maxsize,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'avg_entry_bytes': self._bytes // len(self._data) if self._data else 0,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+            }
+
+
+class ResponseCache:
+    """
+    Caches list responses per (method, normalized args) with a TTL per method.
+    Each entry remembers the limit it was fetched with, so a cached
+    limit=60 answer also serves any later request with a smaller limit.
+    """
+
+    def __init__(self, ttls: Dict[str, float], maxsize: int, stale_ttl: float = 0.0, default_ttl: float = 3600,
+                 max_bytes: Optional[int] = None):
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=default_ttl, stale_ttl=stale_ttl,
+                               name="lastfm_responses", max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(method: str, args: tuple) -> tuple:
+        normalized = tuple(' '.join(str(a).split()).lower() if a is not None else '' for a in args)
+        return (method,) + normalized
+
+    def get(self, method: str, args: tuple, limit: int) -> Tuple[Optional[List], Optional[str]]:
+        """Return (items[:limit], state); a cached answer for a smaller limit counts as a miss"""
+        entry, state = self._cache.lookup(self.make_key(method, args))
+        if not state:
+            return None, None
+
+        cached_limit, items = entry
+        if cached_limit >= limit:
+            return items[:limit], state
+        return None, None
+
+    def cached_limit(self, method: str, args: tuple) -> int:
+        """Limit of the current entry (fresh or stale), 0 when absent"""
+        entry = self._cache.peek(self.make_key(method, args), include_stale=True)
+        return entry[0] if entry else 0
+
+    def put(self, method: str, args: tuple, limit: int, items: List):
+        key = self.make_key(method, args)
+        existing = self._cache.peek(key)
+        # Never replace a fresh, larger answer with a smaller one
+        if existing and existing[0] > limit:
+            return
+        self._cache.set(key, (limit, list(items)), ttl=self.ttls.get(method, self.default_ttl))
+
+    def clear(self):
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        stats = self._cache.get_stats()
+        stats['ttls'] = self.ttls
+        return stats
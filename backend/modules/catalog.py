@@ -0,0 +1,337 @@
+"""
+Catalog Module
+Persistent SQLite catalog of every track, artist, tag chart and similar-track
+edge discovered through Last.fm
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from .artist_index import ArtistIndex
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    norm_name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    artist_id INTEGER NOT NULL REFERENCES artists(id),
+    name TEXT NOT NULL,
+    norm_title TEXT NOT NULL,
+    lastfm_url TEXT,
+    playcount INTEGER,
+    youtube_id TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (artist_id, norm_title)
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_norm_title ON tracks(norm_title);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tag_charts (
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    rank INTEGER NOT NULL,
+    track_id INTEGER NOT NULL REFERENCES tracks(id),
+    PRIMARY KEY (tag_id, rank)
+);
+CREATE TABLE IF NOT EXISTS track_tags (
+    track_id INTEGER NOT NULL REFERENCES tracks(id),
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    PRIMARY KEY (track_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS idx_track_tags_tag ON track_tags(tag_id);
+CREATE TABLE IF NOT EXISTS similar_tracks (
+    source_id INTEGER NOT NULL REFERENCES tracks(id),
+    rank INTEGER NOT NULL,
+    target_id INTEGER NOT NULL REFERENCES tracks(id),
+    PRIMARY KEY (source_id, rank)
+);
+CREATE TABLE IF NOT EXISTS list_fetches (
+    kind TEXT NOT NULL,
+    list_key TEXT NOT NULL,
+    fetched_limit INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, list_key)
+);
+"""
+
+TRACK_COLUMNS = "t.name, a.name, t.lastfm_url, t.playcount, t.youtube_id, t.updated_at"
+
+
+class TrackCatalog:
+    """
+    Accumulates Last.fm results in SQLite (WAL mode, one connection per thread).
+    Reads take a `max_age`: fresh enough rows answer instead of Last.fm, and
+    `max_age=None` accepts rows of any age, which is how the engine keeps
+    serving while Last.fm is down; those fallback reads pass `outage=True`
+    so they are counted as outage hits rather than regular ones.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.outage_hits = 0
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ArtistIndex.normalize(text)
+
+    @staticmethod
+    def _record(row) -> Dict:
+        name, artist, url, playcount, youtube_id, updated_at = row
+        return {'name': name, 'artist': artist, 'lastfm_url': url, 'playcount': playcount,
+                'youtube_id': youtube_id, 'updated_at': updated_at}
+
+    def _count(self, hit: bool, outage: bool = False):
+        with self._stats_lock:
+            if outage:
+                self.outage_hits += 1
+            elif hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _artist_id(self, conn: sqlite3.Connection, name: str) -> int:
+        conn.execute("INSERT OR IGNORE INTO artists(name, norm_name) VALUES (?, ?)", (name, self.normalize(name)))
+        return conn.execute("SELECT id FROM artists WHERE norm_name = ?", (self.normalize(name),)).fetchone()[0]
+
+    def _tag_id(self, conn: sqlite3.Connection, tag: str) -> int:
+        conn.execute("INSERT OR IGNORE INTO tags(name) VALUES (?)", (tag.lower(),))
+        return conn.execute("SELECT id FROM tags WHERE name = ?", (tag.lower(),)).fetchone()[0]
+
+    def _upsert_track(self, conn: sqlite3.Connection, name: str, artist: str, lastfm_url: Optional[str] = None,
+                      playcount: Optional[int] = None, youtube_id: Optional[str] = None) -> int:
+        """
+        Insert or refresh a track; known fields are never overwritten with NULL.
+        `updated_at` is the age of the Last.fm metadata, so it only moves when
+        a playcount or URL is written, not for YouTube IDs, tags or edges.
+        """
+        artist_id = self._artist_id(conn, artist)
+        has_lastfm_data = playcount is not None or lastfm_url is not None
+        conn.execute(
+            """
+            INSERT INTO tracks(artist_id, name, norm_title, lastfm_url, playcount, youtube_id, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(artist_id, norm_title) DO UPDATE SET
+                name = excluded.name,
+                lastfm_url = COALESCE(excluded.lastfm_url, lastfm_url),
+                playcount = COALESCE(excluded.playcount, playcount),
+                youtube_id = COALESCE(excluded.youtube_id, youtube_id),
+                updated_at = CASE WHEN excluded.playcount IS NOT NULL OR excluded.lastfm_url IS NOT NULL
+                                  THEN excluded.updated_at ELSE updated_at END
+            """,
+            (artist_id, name, self.normalize(name), lastfm_url, playcount, youtube_id,
+             time.time() if has_lastfm_data else 0.0)
+        )
+        return conn.execute(
+            "SELECT id FROM tracks WHERE artist_id = ? AND norm_title = ?", (artist_id, self.normalize(name))
+        ).fetchone()[0]
+
+    def _replaces_list(self, conn: sqlite3.Connection, kind: str, list_key: str, limit: int) -> bool:
+        """
+        Record a list fetch. A fetch with a smaller limit than the stored one
+        only refreshes the leading ranks, so returns False and keeps the bookkeeping.
+        """
+        row = conn.execute(
+            "SELECT fetched_limit FROM list_fetches WHERE kind = ? AND list_key = ?", (kind, list_key)
+        ).fetchone()
+        if row and row[0] > limit:
+            return False
+        conn.execute(
+            "INSERT OR REPLACE INTO list_fetches(kind, list_key, fetched_limit, updated_at) VALUES (?, ?, ?, ?)",
+            (kind, list_key, limit, time.time())
+        )
+        return True
+
+    def put_track(self, name: str, artist: str, lastfm_url: Optional[str] = None,
+                  playcount: Optional[int] = None, youtube_id: Optional[str] = None):
+        if not name or not artist:
+            return
+        with self._conn() as conn:
+            self._upsert_track(conn, name, artist, lastfm_url, playcount, youtube_id)
+
+    def put_tag_chart(self, tag: str, songs: Iterable, limit: int):
+        """Replace the stored chart for `tag` with songs (objects with name/artist/lastfm_url/playcount)"""
+        with self._conn() as conn:
+            tag_id = self._tag_id(conn, tag)
+            if self._replaces_list(conn, 'tag', self.normalize(tag), limit):
+                conn.execute("DELETE FROM tag_charts WHERE tag_id = ?", (tag_id,))
+            rank = 0
+            for song in songs:
+                if song.name and song.artist:
+                    track_id = self._upsert_track(conn, song.name, song.artist, song.lastfm_url, song.playcount)
+                    conn.execute("INSERT OR REPLACE INTO tag_charts(tag_id, rank, track_id) VALUES (?, ?, ?)",
+                                 (tag_id, rank, track_id))
+                    rank += 1
+
+    def put_similar(self, artist: str, title: str, similar: Iterable[Dict], limit: int):
+        """Replace the stored similar-track edges of a track; `similar` holds name/artist dicts in rank order"""
+        with self._conn() as conn:
+            source_id = self._upsert_track(conn, title, artist)
+            if self._replaces_list(conn, 'similar', f"{self.normalize(artist)}\t{self.normalize(title)}", limit):
+                conn.execute("DELETE FROM similar_tracks WHERE source_id = ?", (source_id,))
+            rank = 0
+            for item in similar:
+                if item.get('name') and item.get('artist'):
+                    target_id = self._upsert_track(conn, item['name'], item['artist'], item.get('lastfm_url'))
+                    conn.execute("INSERT OR REPLACE INTO similar_tracks(source_id, rank, target_id) VALUES (?, ?, ?)",
+                                 (source_id, rank, target_id))
+                    rank += 1
+
+    def put_track_tags(self, artist: str, title: str, tags: Iterable[str]):
+        if not artist or not title:
+            return
+        with self._conn() as conn:
+            track_id = self._upsert_track(conn, title, artist)
+            conn.execute("DELETE FROM track_tags WHERE track_id = ?", (track_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO track_tags(track_id, tag_id) VALUES (?, ?)",
+                [(track_id, self._tag_id(conn, tag)) for tag in set(tags) if tag]
+            )
+
+    def set_playcount(self, artist: str, title: str, playcount: int):
+        self.put_track(title, artist, playcount=playcount)
+
+    def set_youtube_id(self, artist: str, title: str, youtube_id: str):
+        self.put_track(title, artist, youtube_id=youtube_id)
+
+    def _list_is_usable(self, kind: str, list_key: str, limit: int, max_age: Optional[float]) -> bool:
+        row = self._conn().execute(
+            "SELECT fetched_limit, updated_at FROM list_fetches WHERE kind = ? AND list_key = ?", (kind, list_key)
+        ).fetchone()
+        if row is None:
+            return False
+        if max_age is None:
+            return True
+        fetched_limit, updated_at = row
+        return fetched_limit >= limit and time.time() - updated_at < max_age
+
+    def get_track(self, name: str, artist: Optional[str] = None, max_age: Optional[float] = None,
+                  outage: bool = False) -> Optional[Dict]:
+        """A stored track by normalized title (and artist when given)"""
+        query = f"SELECT {TRACK_COLUMNS} FROM tracks t JOIN artists a ON a.id = t.artist_id WHERE t.norm_title = ?"
+        params = [self.normalize(name)]
+        if artist:
+            query += " AND a.norm_name = ?"
+            params.append(self.normalize(artist))
+        if max_age is not None:
+            query += " AND t.updated_at >= ?"
+            params.append(time.time() - max_age)
+        row = self._conn().execute(query + " ORDER BY t.playcount DESC LIMIT 1", params).fetchone()
+        self._count(row is not None, outage=outage and row is not None)
+        return self._record(row) if row else None
+
+    def get_tag_chart(self, tag: str, limit: int, max_age: Optional[float] = None,
+                      outage: bool = False) -> Optional[List[Dict]]:
+        """Stored chart for `tag`, or None when missing, too old or fetched with a smaller limit"""
+        if not self._list_is_usable('tag', self.normalize(tag), limit, max_age):
+            self._count(False)
+            return None
+        rows = self._conn().execute(
+            f"""
+            SELECT {TRACK_COLUMNS} FROM tag_charts c
+            JOIN tags g ON g.id = c.tag_id
+            JOIN tracks t ON t.id = c.track_id
+            JOIN artists a ON a.id = t.artist_id
+            WHERE g.name = ? ORDER BY c.rank LIMIT ?
+            """,
+            (tag.lower(), limit)
+        ).fetchall()
+        self._count(True, outage=outage)
+        return [self._record(row) for row in rows]
+
+    def get_similar(self, artist: str, title: str, limit: int, max_age: Optional[float] = None,
+                    outage: bool = False) -> Optional[List[Dict]]:
+        """Stored similar tracks in rank order, or None when missing, too old or too short"""
+        list_key = f"{self.normalize(artist)}\t{self.normalize(title)}"
+        if not self._list_is_usable('similar', list_key, limit, max_age):
+            self._count(False)
+            return None
+        rows = self._conn().execute(
+            f"""
+            SELECT {TRACK_COLUMNS} FROM similar_tracks s
+            JOIN tracks src ON src.id = s.source_id
+            JOIN artists sa ON sa.id = src.artist_id
+            JOIN tracks t ON t.id = s.target_id
+            JOIN artists a ON a.id = t.artist_id
+            WHERE sa.norm_name = ? AND src.norm_title = ? ORDER BY s.rank LIMIT ?
+            """,
+            (self.normalize(artist), self.normalize(title), limit)
+        ).fetchall()
+        self._count(True, outage=outage)
+        return [self._record(row) for row in rows]
+
+    def get_playcount(self, artist: str, title: str, max_age: Optional[float] = None) -> Optional[int]:
+        row = self._conn().execute(
+            """
+            SELECT t.playcount FROM tracks t JOIN artists a ON a.id = t.artist_id
+            WHERE a.norm_name = ? AND t.norm_title = ? AND t.playcount IS NOT NULL AND t.updated_at >= ?
+            """,
+            (self.normalize(artist), self.normalize(title), time.time() - max_age if max_age is not None else 0)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_tracks_by_artist(self, artist: str, limit: int = 50) -> List[Dict]:
+        rows = self._conn().execute(
+            f"""
+            SELECT {TRACK_COLUMNS} FROM tracks t JOIN artists a ON a.id = t.artist_id
+            WHERE a.norm_name = ? ORDER BY t.playcount DESC LIMIT ?
+            """,
+            (self.normalize(artist), limit)
+        ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def track_tag_rows(self) -> List[Tuple[str, str, List[str]]]:
+        """(artist, title, tags) for every track with stored tags"""
+        tracks: Dict[int, Tuple[str, str, List[str]]] = {}
+        rows = self._conn().execute(
+            """
+            SELECT t.id, a.name, t.name, g.name FROM track_tags tt
+            JOIN tracks t ON t.id = tt.track_id
+            JOIN artists a ON a.id = t.artist_id
+            JOIN tags g ON g.id = tt.tag_id
+            """
+        )
+        for track_id, artist, title, tag in rows:
+            tracks.setdefault(track_id, (artist, title, []))[2].append(tag)
+        return list(tracks.values())
+
+    def artist_names(self) -> List[str]:
+        return [row[0] for row in self._conn().execute("SELECT name FROM artists")]
+
+    def get_stats(self) -> dict:
+        conn = self._conn()
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ('tracks', 'artists', 'tags', 'tag_charts', 'track_tags', 'similar_tracks')
+        }
+        with self._stats_lock:
+            counts.update({
+                'hits': self.hits,
+                'misses': self.misses,
+                'outage_hits': self.outage_hits,
+                'db_path': self.db_path,
+                'db_bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+            })
+        return counts
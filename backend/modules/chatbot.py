@@ -135,48 +135,62 @@ Remember: Be helpful, friendly, and music-focused!"""
         try:
             # Send to Gemini
             response = self.chat.send_message(user_message)
-            bot_response = response.text
-            
-            # Add to history
-            self.conversation_history.append({
-                "role": "user",
-                "content": user_message
-            })
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": bot_response
-            })
-            
-            # Check for PLAY command (direct playback)
-            play_command = self.extract_play_command(bot_response)
-            
-            # Extract recommendations
-            recommendations = self.extract_recommendations(bot_response)
-            
-            # Clean display text
-            display_text = bot_response
-            display_text = re.sub(r'\[PLAY:[^\]]+\]', '', display_text)
-            display_text = re.sub(r'\[RECOMMEND:[^\]]+\]', '', display_text)
-            display_text = re.sub(r'\n\s*\n+', '\n\n', display_text).strip()
-            
-            return {
-                "response": display_text,
-                "play_command": play_command,  # For direct playback
-                "recommended_songs": recommendations,  # For song buttons
-                "has_play_command": play_command is not None,
-                "has_recommendations": len(recommendations) > 0
-            }
-        
+            return self._build_chat_result(user_message, response.text)
         except Exception as e:
-            print(f"Chatbot error: {e}")
-            return {
-                "response": "I apologize, but I'm having trouble right now. Please try again.",
-                "play_command": None,
-                "recommended_songs": [],
-                "has_play_command": False,
-                "has_recommendations": False,
-                "error": str(e)
-            }
+            return self._chat_error_result(e)
+    
+    async def chat_with_user_async(self, user_message: str) -> Dict:
+        """
+        Same as chat_with_user, but awaits Gemini without blocking the event loop
+        """
+        try:
+            response = await self.chat.send_message_async(user_message)
+            return self._build_chat_result(user_message, response.text)
+        except Exception as e:
+            return self._chat_error_result(e)
+    
+    def _build_chat_result(self, user_message: str, bot_response: str) -> Dict:
+        """Record the exchange and extract play/recommend commands"""
+        # Add to history
+        self.conversation_history.append({
+            "role": "user",
+            "content": user_message
+        })
+        self.conversation_history.append({
+            "role": "assistant",
+            "content": bot_response
+        })
+        
+        # Check for PLAY command (direct playback)
+        play_command = self.extract_play_command(bot_response)
+        
+        # Extract recommendations
+        recommendations = self.extract_recommendations(bot_response)
+        
+        # Clean display text
+        display_text = bot_response
+        display_text = re.sub(r'\[PLAY:[^\]]+\]', '', display_text)
+        display_text = re.sub(r'\[RECOMMEND:[^\]]+\]', '', display_text)
+        display_text = re.sub(r'\n\s*\n+', '\n\n', display_text).strip()
+        
+        return {
+            "response": display_text,
+            "play_command": play_command,  # For direct playback
+            "recommended_songs": recommendations,  # For song buttons
+            "has_play_command": play_command is not None,
+            "has_recommendations": len(recommendations) > 0
+        }
+    
+    def _chat_error_result(self, e: Exception) -> Dict:
+        print(f"Chatbot error: {e}")
+        return {
+            "response": "I apologize, but I'm having trouble right now. Please try again.",
+            "play_command": None,
+            "recommended_songs": [],
+            "has_play_command": False,
+            "has_recommendations": False,
+            "error": str(e)
+        }
     
     def detect_intent(self, message: str) -> str:
         """
@@ -33,6 +33,125 @@ class Config:
     
     # Cache Configuration
     CACHE_FILE: str = "youtube_cache.json"
+    # New IDs are appended to CACHE_FILE.log in the background; the snapshot is rewritten on compaction
+    YOUTUBE_CACHE_FLUSH_INTERVAL: float = float(os.getenv("YOUTUBE_CACHE_FLUSH_INTERVAL", "1.0"))
+    YOUTUBE_CACHE_COMPACT_MIN_ENTRIES: int = int(os.getenv("YOUTUBE_CACHE_COMPACT_MIN_ENTRIES", "1000"))
+    
+    # Invidious fallback: comma-separated instances, raced healthiest-first with hedging
+    INVIDIOUS_INSTANCES = [
+        url.strip() for url in os.getenv(
+            "INVIDIOUS_INSTANCES", "https://inv.tux.pizza,https://invidious.fdn.fr,https://inv.riverside.rocks"
+        ).split(",") if url.strip()
+    ]
+    INVIDIOUS_TIMEOUT: float = float(os.getenv("INVIDIOUS_TIMEOUT", "2.0"))
+    INVIDIOUS_HEDGE_PERCENTILE: float = float(os.getenv("INVIDIOUS_HEDGE_PERCENTILE", "0.75"))
+    INVIDIOUS_EJECTION_SECONDS: float = float(os.getenv("INVIDIOUS_EJECTION_SECONDS", "30"))
+    
+    # YouTube Data API daily budget (search.list costs 100 units); bulk lookups are paced and
+    # leave YOUTUBE_INTERACTIVE_RESERVE of the quota for interactive searches
+    YOUTUBE_DAILY_QUOTA: int = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+    YOUTUBE_SEARCH_COST: int = int(os.getenv("YOUTUBE_SEARCH_COST", "100"))
+    YOUTUBE_INTERACTIVE_RESERVE: float = float(os.getenv("YOUTUBE_INTERACTIVE_RESERVE", "0.2"))
+    YOUTUBE_BULK_BURST: float = float(os.getenv("YOUTUBE_BULK_BURST", "0.1"))
+    YOUTUBE_QUOTA_FILE: str = os.getenv("YOUTUBE_QUOTA_FILE", "cache/youtube_quota.json")
+    YOUTUBE_QUOTA_SAVE_INTERVAL: float = float(os.getenv("YOUTUBE_QUOTA_SAVE_INTERVAL", "30"))
+    
+    # Emotion model: "startup" loads and warms it in every inference worker before serving,
+    # "background" while serving, "lazy" on the first /detect-mood request
+    EMOTION_MODEL_PRELOAD: str = os.getenv("EMOTION_MODEL_PRELOAD", "startup").lower()
+    DEEPFACE_DETECTOR: str = os.getenv("DEEPFACE_DETECTOR", "opencv")
+    
+    # Mood inference worker processes, each with its own model (0 = one thread in the API process);
+    # up to INFERENCE_QUEUE_SIZE more requests wait, beyond that /detect-mood answers 503.
+    # TensorFlow threads are per worker, intra-op 0 = cores split evenly between workers
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", str(min(os.cpu_count() or 1, 2))))
+    INFERENCE_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", "8"))
+    INFERENCE_TF_INTRA_OP_THREADS: int = int(os.getenv("INFERENCE_TF_INTRA_OP_THREADS", "0"))
+    INFERENCE_TF_INTER_OP_THREADS: int = int(os.getenv("INFERENCE_TF_INTER_OP_THREADS", "1"))
+    # Micro-batching of concurrent /detect-mood images: a batch leaves after INFERENCE_BATCH_WAIT_MS
+    # if a worker is free, otherwise when one frees up or INFERENCE_MAX_BATCH_SIZE is reached (1 = off)
+    INFERENCE_MAX_BATCH_SIZE: int = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+    INFERENCE_BATCH_WAIT_MS: float = float(os.getenv("INFERENCE_BATCH_WAIT_MS", "5"))
+    
+    # Uploaded images: bodies over MAX_IMAGE_UPLOAD_MB or images over IMAGE_MAX_MEGAPIXELS get a 413;
+    # the rest are decoded at reduced resolution, longer side capped at IMAGE_MAX_DIMENSION pixels
+    MAX_IMAGE_UPLOAD_BYTES: int = int(float(os.getenv("MAX_IMAGE_UPLOAD_MB", "10")) * 1024 * 1024)
+    IMAGE_MAX_PIXELS: int = int(float(os.getenv("IMAGE_MAX_MEGAPIXELS", "50")) * 1_000_000)
+    IMAGE_MAX_DIMENSION: int = int(os.getenv("IMAGE_MAX_DIMENSION", "640"))
+    
+    # Recent /detect-mood results, reused for the same upload or a frame whose 64-bit dHash
+    # differs in at most MOOD_CACHE_MAX_DISTANCE bits (0 = exact repeats only)
+    MOOD_CACHE_SIZE: int = int(os.getenv("MOOD_CACHE_SIZE", "256"))
+    MOOD_CACHE_TTL: float = float(os.getenv("MOOD_CACHE_TTL", "30"))
+    MOOD_CACHE_MAX_DISTANCE: int = int(os.getenv("MOOD_CACHE_MAX_DISTANCE", "2"))
+    
+    # Live mood WebSocket: frames are analysed at most LIVE_MOOD_TARGET_FPS times a second (clients
+    # may ask for up to LIVE_MOOD_MAX_FPS) and mood scores are smoothed by an EMA of weight LIVE_MOOD_EMA_ALPHA
+    LIVE_MOOD_TARGET_FPS: float = float(os.getenv("LIVE_MOOD_TARGET_FPS", "2"))
+    LIVE_MOOD_MAX_FPS: float = float(os.getenv("LIVE_MOOD_MAX_FPS", "10"))
+    LIVE_MOOD_EMA_ALPHA: float = float(os.getenv("LIVE_MOOD_EMA_ALPHA", "0.3"))
+    
+    # Keep-alive HTTP pool shared by the music player's upstream calls
+    HTTP_POOL_MAXSIZE: int = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+    HTTP_RETRIES: int = int(os.getenv("HTTP_RETRIES", "1"))
+    HTTP_BACKOFF: float = float(os.getenv("HTTP_BACKOFF", "0.2"))
+    # Max songs per /youtube/resolve call
+    YOUTUBE_RESOLVE_MAX_BATCH: int = int(os.getenv("YOUTUBE_RESOLVE_MAX_BATCH", "50"))
+    
+    # Recommendation Engine Configuration
+    CONCURRENT_RECOMMENDATIONS: bool = os.getenv("CONCURRENT_RECOMMENDATIONS", "true").lower() == "true"
+    LASTFM_MAX_WORKERS: int = int(os.getenv("LASTFM_MAX_WORKERS", "16"))
+    # Build songs from chart data and only call track.getInfo when playcount is needed
+    LAZY_PLAYCOUNT: bool = os.getenv("LAZY_PLAYCOUNT", "true").lower() == "true"
+    
+    # Last.fm response cache (TTLs in seconds per API method)
+    LASTFM_CACHE_TTLS = {
+        'tag.getTopTracks': 3600,
+        'artist.getTopTracks': 6 * 3600,
+        'track.getSimilar': 24 * 3600
+    }
+    LASTFM_CACHE_SIZE: int = int(os.getenv("LASTFM_CACHE_SIZE", "2048"))
+    LASTFM_CACHE_STALE_TTL: int = int(os.getenv("LASTFM_CACHE_STALE_TTL", "900"))
+    LASTFM_CACHE_MAX_BYTES: int = int(os.getenv("LASTFM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    
+    # Resolved track / fuzzy-matched artist caches
+    TRACK_CACHE_SIZE: int = int(os.getenv("TRACK_CACHE_SIZE", "5000"))
+    TRACK_CACHE_MAX_BYTES: int = int(os.getenv("TRACK_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    TRACK_CACHE_TTL: int = int(os.getenv("TRACK_CACHE_TTL", str(24 * 3600)))
+    ARTIST_CACHE_SIZE: int = int(os.getenv("ARTIST_CACHE_SIZE", "10000"))
+    ARTIST_CACHE_MAX_BYTES: int = int(os.getenv("ARTIST_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+    ARTIST_CACHE_TTL: int = int(os.getenv("ARTIST_CACHE_TTL", str(7 * 24 * 3600)))
+    NEGATIVE_CACHE_TTL: int = int(os.getenv("NEGATIVE_CACHE_TTL", "600"))
+    
+    # Per-track Last.fm tags used by the mood filter
+    TRACK_TAG_CACHE_FILE: str = os.getenv("TRACK_TAG_CACHE_FILE", "cache/track_tags.json")
+    TRACK_TAG_TTL: int = int(os.getenv("TRACK_TAG_TTL", str(7 * 24 * 3600)))
+    TRACK_TAG_CACHE_SIZE: int = int(os.getenv("TRACK_TAG_CACHE_SIZE", "50000"))
+    TRACK_TAG_WORKERS: int = int(os.getenv("TRACK_TAG_WORKERS", "16"))
+    TRACK_TAG_LIMIT: int = int(os.getenv("TRACK_TAG_LIMIT", "10"))
+    
+    # Persistent catalog of everything fetched from Last.fm (SQLite)
+    CATALOG_DB: str = os.getenv("CATALOG_DB", "cache/catalog.db")
+    # Minimum tag cosine for a locally found similar song to be used
+    SIMILARITY_MIN_SCORE: float = float(os.getenv("SIMILARITY_MIN_SCORE", "0.3"))
+    
+    # Background-refreshed pools behind /api/recommendations
+    MOOD_POOLS_ENABLED: bool = os.getenv("MOOD_POOLS_ENABLED", "true").lower() == "true"
+    MOOD_POOL_REFRESH_INTERVAL: int = int(os.getenv("MOOD_POOL_REFRESH_INTERVAL", "1800"))
+    MOOD_POOL_JITTER: float = float(os.getenv("MOOD_POOL_JITTER", "0.1"))
+    MOOD_POOL_SIZE: int = int(os.getenv("MOOD_POOL_SIZE", "50"))
+    
+    # Local artist index used by fuzzy matching before Last.fm search
+    ARTIST_SEED_FILE: str = os.getenv("ARTIST_SEED_FILE", "cache/artist_seed.txt")
+    ARTIST_INDEX_MIN_SCORE: float = float(os.getenv("ARTIST_INDEX_MIN_SCORE", "0.85"))
+    ARTIST_INDEX_MAX_NAMES: int = int(os.getenv("ARTIST_INDEX_MAX_NAMES", "200000"))
+    
+    # Max concurrent blocking calls per upstream when offloaded from async routes
+    UPSTREAM_LIMITS = {
+        'lastfm': int(os.getenv("UPSTREAM_LASTFM_WORKERS", "16")),
+        'youtube': int(os.getenv("UPSTREAM_YOUTUBE_WORKERS", "8")),
+        'gemini': int(os.getenv("UPSTREAM_GEMINI_WORKERS", "4"))
+    }
     
     # API Service Instances
     lastfm_network: Optional[pylast.LastFMNetwork] = None
@@ -98,6 +217,16 @@ class Config:
         """Get YouTube service instance"""
         return cls.youtube_service
     
+    @classmethod
+    def build_youtube(cls):
+        """
+        A new YouTube service. googleapiclient's httplib2 transport is not
+        thread-safe, so callers on worker threads keep one per thread.
+        """
+        if not cls.youtube_service:
+            return None
+        return build('youtube', 'v3', developerKey=cls.YOUTUBE_API_KEY, cache_discovery=False)
+    
     @classmethod
     def get_gemini(cls):
         """Get Gemini model instance"""
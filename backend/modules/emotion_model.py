@@ -0,0 +1,178 @@
+"""
+Emotion Model Module
+Lifecycle of the DeepFace emotion model and face detector: load, warm up, report readiness
+"""
+import time
+# Taken before importing TensorFlow, as the closest thing to process start
+# for time-to-first-inference
+_PROCESS_START = time.monotonic()
+
+import threading
+from typing import List, Optional, Union
+import cv2
+import numpy as np
+from deepface import DeepFace
+from deepface.modules import detection, preprocessing
+from .image_preprocessing import UploadedImage
+
+
+class EmotionModel:
+    """
+    Builds the emotion model and face detector once and pushes a blank frame
+    through DeepFace.analyze so TensorFlow graph tracing happens before the
+    first real request. `load()` is idempotent and thread-safe; `analyze()`
+    loads on demand, which is the lazy mode.
+
+    Images may also be given as the raw bytes of an upload: they are decoded
+    at reduced resolution (longer side at most `max_dimension`) for face
+    detection, see UploadedImage.
+    """
+
+    WARMUP_SHAPE = (224, 224, 3)
+    LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+    INPUT_SIDE = 48                         # the emotion network sees 48x48 grayscale faces
+
+    def __init__(self, detector_backend: str = "opencv", max_dimension: int = 640):
+        self.detector_backend = detector_backend
+        self.max_dimension = max_dimension
+        self.state = "cold"                 # cold -> loading -> ready | failed
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.first_inference_seconds: Optional[float] = None
+        self.time_to_first_inference: Optional[float] = None
+        self.inferences = 0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._network = None                # the Keras model inside DeepFace's emotion client
+
+    def load(self) -> bool:
+        with self._lock:
+            if self.state == "ready":
+                return True
+            self.state = "loading"
+            try:
+                started = time.monotonic()
+                self._network = DeepFace.build_model(model_name="Emotion", task="facial_attribute").model
+                DeepFace.build_model(model_name=self.detector_backend, task="face_detector")
+                self.load_seconds = time.monotonic() - started
+
+                started = time.monotonic()
+                self._analyze(np.zeros(self.WARMUP_SHAPE, dtype=np.uint8))
+                self.warmup_seconds = time.monotonic() - started
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                print(f"❌ Emotion model failed to load: {e}")
+                return False
+            self.state = "ready"
+            self.error = None
+            self._ready.set()
+        print(f"✅ Emotion model ready (load {self.load_seconds:.2f}s, warm-up {self.warmup_seconds:.2f}s)")
+        return True
+
+    def start_background_load(self):
+        threading.Thread(target=self.load, name="emotion-model-load", daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def _analyze(self, img: np.ndarray) -> dict:
+        result = DeepFace.analyze(img, actions=['emotion'], enforce_detection=False,
+                                  detector_backend=self.detector_backend, silent=True)
+        return result[0] if isinstance(result, list) else result
+
+    def analyze(self, img: Union[np.ndarray, bytes]) -> dict:
+        """DeepFace emotion analysis of one BGR image or upload (loads the model first if needed)"""
+        if not self.ready and not self.load():
+            raise RuntimeError(f"Emotion model unavailable: {self.error}")
+        started = time.monotonic()
+        if isinstance(img, bytes):
+            result = self.analyze_batch([img])[0]
+            if isinstance(result, Exception):
+                raise result
+        else:
+            result = self._analyze(img)
+            self.inferences += 1
+        if self.first_inference_seconds is None:
+            self.first_inference_seconds = time.monotonic() - started
+            self.time_to_first_inference = time.monotonic() - _PROCESS_START
+        return result
+
+    def _extract_face(self, img: np.ndarray) -> dict:
+        faces = detection.extract_faces(img, detector_backend=self.detector_backend,
+                                        enforce_detection=False, grayscale=False, align=True)
+        return next(obj for obj in faces if obj["face"].shape[0] > 0 and obj["face"].shape[1] > 0)
+
+    def _face_input(self, img: Union[np.ndarray, bytes]) -> tuple:
+        """
+        The 48x48 grayscale face DeepFace.analyze would feed the emotion
+        network for this image, with the face's region and confidence.
+        Uploads are detected on the reduced image; a face smaller than the
+        network input there is re-extracted from a full-resolution crop.
+        """
+        upload = None
+        if isinstance(img, bytes):
+            upload = UploadedImage(img, self.max_dimension)
+            img = upload.image
+        face = self._extract_face(img)
+        region = face["facial_area"]
+        if upload is not None:
+            # Zero confidence means no face was found and the whole frame stands in for it
+            crop = upload.crop(region, self.INPUT_SIDE) if face["confidence"] > 0 else None
+            if crop is not None:
+                refined = self._extract_face(crop)
+                if refined["confidence"] > 0:
+                    face = refined
+            region = {key: round(region[key] * upload.scale) for key in ("x", "y", "w", "h")}
+        face_img = preprocessing.resize_image(img=face["face"][:, :, ::-1], target_size=(224, 224))
+        gray = cv2.resize(cv2.cvtColor(face_img[0], cv2.COLOR_BGR2GRAY), (self.INPUT_SIDE, self.INPUT_SIDE))
+        return gray, region, face["confidence"]
+
+    def analyze_batch(self, images: List[Union[np.ndarray, bytes]]) -> List[Union[dict, Exception]]:
+        """
+        analyze() for several images, with every face going through the
+        emotion network in one forward pass. An image that fails gets its
+        exception in its slot instead of failing the batch.
+        """
+        if not self.ready and not self.load():
+            raise RuntimeError(f"Emotion model unavailable: {self.error}")
+        results: List[Union[dict, Exception, None]] = []
+        faces = []
+        for img in images:
+            try:
+                faces.append(self._face_input(img))
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+        if faces:
+            predictions = iter(self._network(np.stack([face[0] for face in faces]), training=False).numpy())
+            face_info = iter(faces)
+            for index, result in enumerate(results):
+                if result is not None:
+                    continue
+                scores = next(predictions)
+                _, region, confidence = next(face_info)
+                results[index] = {
+                    'emotion': {label: float(100 * score / scores.sum()) for label, score in zip(self.LABELS, scores)},
+                    'dominant_emotion': self.LABELS[int(np.argmax(scores))],
+                    'region': region,
+                    'face_confidence': confidence
+                }
+        self.inferences += len(faces)
+        return results
+
+    def get_status(self) -> dict:
+        return {
+            'state': self.state,
+            'ready': self.ready,
+            'detector_backend': self.detector_backend,
+            'max_dimension': self.max_dimension,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'warmup_seconds': round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            'first_inference_seconds': round(self.first_inference_seconds, 3) if self.first_inference_seconds is not None else None,
+            'time_to_first_inference': round(self.time_to_first_inference, 3) if self.time_to_first_inference is not None else None,
+            'inferences': self.inferences,
+            'error': self.error
+        }
@@ -0,0 +1,79 @@
+"""
+HTTP Client Module
+Shared keep-alive requests session with per-host connection pools and retry/backoff
+"""
+import threading
+from typing import Iterable, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class PooledHTTPClient:
+    """
+    One requests.Session (safe to share for plain GETs) whose adapter keeps up
+    to `pool_maxsize` idle connections per host alive. Idempotent requests are
+    retried `retries` times on connection errors and on `retry_statuses`, with
+    exponential `backoff` between attempts.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, retries: int = 1,
+                 backoff: float = 0.2, retry_statuses: Iterable[int] = (502, 503, 504),
+                 user_agent: Optional[str] = None):
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=tuple(retry_statuses),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                    max_retries=retry, pool_block=False)
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        with self._lock:
+            self.requests += 1
+        try:
+            return self.session.get(url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.errors += 1
+            raise
+
+    def close(self):
+        self.session.close()
+
+    def get_stats(self) -> dict:
+        """Per-host connections opened vs requests served, from urllib3's pools"""
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened, served = pool.num_connections, pool.num_requests
+            hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                'connections_opened': opened,
+                'requests': served,
+                'reuse_rate': round(1 - opened / served, 3) if served else 0.0
+            }
+        opened = sum(h['connections_opened'] for h in hosts.values())
+        served = sum(h['requests'] for h in hosts.values())
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'connections_opened': opened,
+                'reuse_rate': round(1 - opened / served, 3) if served else 0.0,
+                'pool_maxsize': self.pool_maxsize,
+                'hosts': hosts
+            }
@@ -0,0 +1,92 @@
+"""
+Image Preprocessing Module
+Cheap validation and reduced-resolution decoding of uploaded images for mood detection
+"""
+import io
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+from PIL import Image
+
+# cv2.IMREAD_REDUCED_* decode JPEGs at 1/2, 1/4 or 1/8 scale straight from the DCT coefficients
+_REDUCED_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+    (1, cv2.IMREAD_COLOR),
+]
+# OpenCV's default CV_IO_MAX_IMAGE_PIXELS: imdecode refuses anything larger and returns None
+_CV_MAX_PIXELS = 1 << 30
+
+
+class InvalidImage(ValueError):
+    """The upload is not a decodable image"""
+
+
+class ImageTooLarge(ValueError):
+    """The image's pixel count is over the limit"""
+
+
+def probe_size(data: bytes, max_pixels: Optional[int] = None) -> Tuple[int, int]:
+    """(width, height) from the image header alone, without decoding any pixels"""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e))
+    except Exception as e:
+        raise InvalidImage(f"Invalid image file: {e}")
+    if max_pixels and width * height > max_pixels:
+        raise ImageTooLarge(f"Image has {width * height / 1e6:.0f} MP, the limit is {max_pixels / 1e6:.0f} MP")
+    return width, height
+
+
+class UploadedImage:
+    """
+    An upload decoded at the smallest IMREAD_REDUCED_* scale that still gives
+    `max_dimension` pixels on the longer side, then resized down to exactly
+    that cap. Face detection runs on this small `image`; `crop()` goes back to
+    a full-resolution decode only for faces too small to use at this scale.
+    """
+
+    def __init__(self, data: bytes, max_dimension: int = 640):
+        self.data = data
+        self.width, self.height = probe_size(data)
+        longer = max(self.width, self.height)
+        factor, flag = next((factor, flag) for factor, flag in _REDUCED_FLAGS
+                            if factor == 1 or longer / factor >= max_dimension)
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+        if image is None:
+            if self.width * self.height > _CV_MAX_PIXELS:
+                raise ImageTooLarge(f"Image has {self.width * self.height / 1e6:.0f} MP, too large to decode")
+            raise InvalidImage("Invalid image file")
+        if max(image.shape[:2]) > max_dimension:
+            ratio = max_dimension / max(image.shape[:2])
+            image = cv2.resize(image, (max(round(image.shape[1] * ratio), 1), max(round(image.shape[0] * ratio), 1)),
+                               interpolation=cv2.INTER_AREA)
+        self.image = image
+        self.decode_factor = factor
+        # The longer side is orientation-independent, so EXIF rotation does not affect the scale
+        self.scale = longer / max(image.shape[:2])
+
+    def crop(self, region: dict, min_side: int, margin: float = 0.25) -> Optional[np.ndarray]:
+        """
+        `region` (x, y, w, h in `image` coordinates, plus a `margin` fraction on
+        each side) cut from the full-resolution decode, or None when the small
+        image already has `min_side` pixels across the region or the upload was
+        not downscaled.
+        """
+        if self.scale <= 1 or min(region['w'], region['h']) >= min_side:
+            return None
+        full = cv2.imdecode(np.frombuffer(self.data, np.uint8), cv2.IMREAD_COLOR)
+        if full is None:
+            return None
+        scale = max(full.shape[:2]) / max(self.image.shape[:2])
+        pad_x, pad_y = region['w'] * margin, region['h'] * margin
+        x0 = max(int((region['x'] - pad_x) * scale), 0)
+        y0 = max(int((region['y'] - pad_y) * scale), 0)
+        x1 = min(int((region['x'] + region['w'] + pad_x) * scale), full.shape[1])
+        y1 = min(int((region['y'] + region['h'] + pad_y) * scale), full.shape[0])
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return full[y0:y1, x0:x1]
@@ -0,0 +1,321 @@
+"""
+Inference Pool Module
+Facial emotion inference in worker processes, off the event loop, with bounded admission
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from .config import Config
+from . import inference_worker
+
+
+class InferencePoolBusy(Exception):
+    """Every worker is busy and the submission queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference pool saturated, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """
+    `workers` spawned processes, each holding its own loaded and warmed
+    emotion model, so inferences run in parallel and never on the event loop.
+    At most `workers + queue_size` requests are admitted at once; beyond that
+    `analyze()` raises InferencePoolBusy immediately instead of queueing
+    without bound. TensorFlow threads are capped per worker (by default the
+    cores are split between workers) so workers do not oversubscribe the CPU.
+    workers=0 runs inference on one thread of this process instead.
+
+    With `max_batch_size` > 1, images are micro-batched: pending images go
+    to free workers as soon as the `batch_wait` window closes, split evenly
+    between them, and while every worker is busy they accumulate into
+    batches of up to `max_batch_size` whose faces share one forward pass.
+    """
+
+    def __init__(self, workers: int, queue_size: int, detector_backend: str = "opencv", max_dimension: int = 640,
+                 intra_op_threads: int = 0, inter_op_threads: int = 1,
+                 max_batch_size: int = 1, batch_wait: float = 0.005):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_batch_size = max(max_batch_size, 1)
+        self.batch_wait = batch_wait
+        self.capacity = max(workers, 1) * self.max_batch_size + queue_size
+        self.detector_backend = detector_backend
+        self.max_dimension = max_dimension
+        self.intra_op_threads = intra_op_threads or max((os.cpu_count() or 1) // max(workers, 1), 1)
+        self.inter_op_threads = inter_op_threads
+        self.state = "cold"                 # cold -> warming -> ready | failed
+        self.error: Optional[str] = None
+        self._executor: Optional[Executor] = None
+        self._ready_queue = None
+        self._worker_status: Dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.restarts = 0
+        self.avg_seconds: Optional[float] = None   # EWMA of admission-to-result time
+        # Batching state, only touched on the event loop
+        self._pending: List[Tuple[Union[np.ndarray, bytes], asyncio.Future, float]] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._busy_batches = 0
+        self.batches = 0
+        self.batched_images = 0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    # spawn, not fork: the API process has live threads, and TensorFlow is not fork-safe
+                    context = multiprocessing.get_context("spawn")
+                    self._ready_queue = context.Queue()
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=context,
+                        initializer=inference_worker.init_worker,
+                        initargs=(self.detector_backend, self.max_dimension, self.intra_op_threads, self.inter_op_threads,
+                                  self._ready_queue)
+                    )
+                else:
+                    self._ready_queue = queue.Queue()
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1,
+                        thread_name_prefix="inference",
+                        initializer=inference_worker.init_worker,
+                        initargs=(self.detector_backend, self.max_dimension, self.intra_op_threads, self.inter_op_threads,
+                                  self._ready_queue)
+                    )
+            return self._executor
+
+    def _collect_ready(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Record one worker's readiness report (blocking up to `timeout`, or not at all)"""
+        try:
+            if timeout is None:
+                status = self._ready_queue.get_nowait()
+            else:
+                status = self._ready_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            self._worker_status[status['pid']] = status
+            # Lazily started workers (no warm()) make the pool ready once all have reported
+            if (self.state == "cold" and len(self._worker_status) >= max(self.workers, 1)
+                    and all(worker['ready'] for worker in self._worker_status.values())):
+                self.state = "ready"
+        return status
+
+    def warm(self, timeout: float = 300.0) -> bool:
+        """Start every worker and wait until each has loaded and warmed its model"""
+        self.state = "warming"
+        started = time.monotonic()
+        try:
+            executor = self._get_executor()
+            # Each submission made while no worker is idle starts another process
+            for _ in range(max(self.workers, 1)):
+                executor.submit(inference_worker.worker_status)
+            statuses = []
+            while len(statuses) < max(self.workers, 1):
+                status = self._collect_ready(timeout=max(timeout - (time.monotonic() - started), 0.01))
+                if status is None:
+                    raise TimeoutError(f"{len(statuses)}/{max(self.workers, 1)} workers ready after {timeout:.0f}s")
+                statuses.append(status)
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"❌ Inference pool failed to start: {e}")
+            return False
+
+        if not all(status['ready'] for status in statuses):
+            self.state = "failed"
+            self.error = next(status['error'] for status in statuses if not status['ready'])
+            print(f"❌ Inference pool worker failed to load the model: {self.error}")
+            return False
+        self.state = "ready"
+        self.error = None
+        print(f"✅ Inference pool ready: {max(self.workers, 1)} {'processes' if self.workers else 'thread'}, "
+              f"{self.intra_op_threads} TF threads each, {time.monotonic() - started:.2f}s")
+        return True
+
+    def start_background_warm(self):
+        threading.Thread(target=self.warm, name="inference-pool-warm", daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def _retry_after(self) -> int:
+        """Seconds until a queue slot is likely free"""
+        per_request = self.avg_seconds or 1.0
+        return max(1, math.ceil(per_request * self.queue_size / max(self.workers, 1)))
+
+    def _release(self, started: float, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.failed += 1
+                return
+            elapsed = time.monotonic() - started
+            self.avg_seconds = elapsed if self.avg_seconds is None else 0.8 * self.avg_seconds + 0.2 * elapsed
+            self.completed += 1
+
+    def _restart(self, executor: Executor):
+        """Replace a pool whose worker died (OOM kill, segfault) so later requests get fresh workers"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._worker_status.clear()
+            self.restarts += 1
+            self.state = "cold"
+        executor.shutdown(wait=False, cancel_futures=True)
+        print("⚠️  Inference worker died; pool will restart on the next request")
+
+    async def analyze(self, img: Union[np.ndarray, bytes]) -> dict:
+        """
+        DeepFace emotion analysis of one BGR image, or of an upload's raw bytes
+        (smaller to ship to a worker than decoded pixels, and decoded there)
+        """
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise InferencePoolBusy(self._retry_after())
+            self.in_flight += 1
+
+        if self.max_batch_size > 1:
+            return await self._analyze_batched(img)
+
+        started = time.monotonic()
+        try:
+            executor = self._get_executor()
+            future = executor.submit(inference_worker.analyze, img)
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+                self.failed += 1
+            raise
+        # The slot is held until the worker is done, even if the client goes away first
+        future.add_done_callback(lambda done: self._release(started, done.cancelled() or done.exception() is not None))
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            self._restart(executor)
+            raise RuntimeError("Inference worker exited unexpectedly") from e
+
+    async def _analyze_batched(self, img: Union[np.ndarray, bytes]) -> dict:
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._pending.append((img, waiter, time.monotonic()))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.batch_wait, self._dispatch)
+        return await waiter
+
+    def _dispatch(self):
+        """Hand pending images to free workers, split evenly; while all are busy only full batches go"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        workers = max(self.workers, 1)
+        while self._pending and (self._busy_batches < workers or len(self._pending) >= self.max_batch_size):
+            free = max(workers - self._busy_batches, 1)
+            size = min(self.max_batch_size, math.ceil(len(self._pending) / free))
+            batch, self._pending = self._pending[:size], self._pending[size:]
+            self._submit_batch(batch)
+
+    def _submit_batch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        try:
+            executor = self._get_executor()
+            future = executor.submit(inference_worker.analyze_batch, [img for img, _, _ in batch])
+        except Exception as e:
+            self._finish_batch(batch, None, e)
+            return
+        self._busy_batches += 1
+        self.batches += 1
+        self.batched_images += len(batch)
+        future.add_done_callback(lambda done: loop.call_soon_threadsafe(self._batch_done, batch, executor, done))
+
+    def _batch_done(self, batch: list, executor: Executor, future):
+        self._busy_batches -= 1
+        results, error = None, None
+        if future.cancelled():
+            error = RuntimeError("Inference batch cancelled")
+        elif isinstance(future.exception(), BrokenProcessPool):
+            self._restart(executor)
+            error = RuntimeError("Inference worker exited unexpectedly")
+        elif future.exception() is not None:
+            error = future.exception()
+        else:
+            results = future.result()
+        self._finish_batch(batch, results, error)
+        # A worker is free again: send whatever accumulated meanwhile
+        self._dispatch()
+
+    def _finish_batch(self, batch: list, results: Optional[list], error: Optional[Exception]):
+        """Fan a batch's results (or its failure) back out to each caller"""
+        for index, (_, waiter, started) in enumerate(batch):
+            outcome = error if error is not None else results[index]
+            failed = isinstance(outcome, Exception)
+            self._release(started, failed)
+            if waiter.done():           # the caller went away
+                continue
+            if failed:
+                waiter.set_exception(outcome)
+            else:
+                waiter.set_result(outcome)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        if self._ready_queue is not None:
+            while self._collect_ready() is not None:
+                pass
+        with self._lock:
+            return {
+                'state': self.state,
+                'ready': self.ready,
+                'mode': 'process' if self.workers else 'thread',
+                'workers': max(self.workers, 1),
+                'queue_size': self.queue_size,
+                'max_batch_size': self.max_batch_size,
+                'batch_wait_ms': round(self.batch_wait * 1000, 1),
+                'batches': self.batches,
+                'avg_batch_size': round(self.batched_images / self.batches, 2) if self.batches else None,
+                'tf_intra_op_threads': self.intra_op_threads,
+                'tf_inter_op_threads': self.inter_op_threads,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'restarts': self.restarts,
+                'avg_seconds': round(self.avg_seconds, 3) if self.avg_seconds is not None else None,
+                'worker_models': list(self._worker_status.values()),
+                'error': self.error
+            }
+
+
+inference_pool = InferencePool(
+    Config.INFERENCE_WORKERS,
+    Config.INFERENCE_QUEUE_SIZE,
+    detector_backend=Config.DEEPFACE_DETECTOR,
+    max_dimension=Config.IMAGE_MAX_DIMENSION,
+    intra_op_threads=Config.INFERENCE_TF_INTRA_OP_THREADS,
+    inter_op_threads=Config.INFERENCE_TF_INTER_OP_THREADS,
+    max_batch_size=Config.INFERENCE_MAX_BATCH_SIZE,
+    batch_wait=Config.INFERENCE_BATCH_WAIT_MS / 1000
+)
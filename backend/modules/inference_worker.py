@@ -0,0 +1,48 @@
+"""
+Inference Worker Module
+Code that runs inside an inference worker: TensorFlow thread limits, the worker's own model, and the calls the pool makes
+Kept free of the API's imports (config, API clients, caches), so spawned workers import as little as possible
+"""
+import os
+from typing import Optional
+
+_model = None
+
+
+def init_worker(detector_backend: str, max_dimension: int, intra_op_threads: int, inter_op_threads: int,
+                ready_queue=None):
+    """Pool initializer: limit TensorFlow's threads, then load and warm this worker's model"""
+    global _model
+    # Thread counts only take effect before TensorFlow creates its thread pools
+    os.environ.setdefault('OMP_NUM_THREADS', str(intra_op_threads))
+    os.environ.setdefault('TF_NUM_INTRAOP_THREADS', str(intra_op_threads))
+    os.environ.setdefault('TF_NUM_INTEROP_THREADS', str(inter_op_threads))
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError as e:   # TensorFlow already initialised in this process
+        print(f"⚠️  Could not set TensorFlow thread counts: {e}")
+
+    from .emotion_model import EmotionModel
+    _model = EmotionModel(detector_backend, max_dimension)
+    _model.load()
+    if ready_queue is not None:
+        ready_queue.put(worker_status())
+
+
+def analyze(img) -> dict:
+    """One BGR image or raw upload bytes"""
+    return _model.analyze(img)
+
+
+def analyze_batch(images) -> list:
+    return _model.analyze_batch(images)
+
+
+def worker_status() -> Optional[dict]:
+    if _model is None:
+        return None
+    status = _model.get_status()
+    status['pid'] = os.getpid()
+    return status
@@ -0,0 +1,188 @@
+"""
+Invidious Module
+Raced/hedged YouTube searches across Invidious instances with per-instance health scoring
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+import requests
+
+
+class InstanceHealth:
+    """EWMA latency and error rate for one instance, with exponential-backoff ejection"""
+
+    def __init__(self, url: str, alpha: float):
+        self.url = url
+        self.alpha = alpha
+        self.latency: Optional[float] = None     # EWMA seconds of successful calls
+        self.error_rate = 0.0                    # EWMA of failures (0..1)
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.requests = 0
+        self.failures = 0
+        self.wins = 0
+        self.recent = deque(maxlen=50)           # recent successful latencies, for the hedge delay
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.latency = latency if self.latency is None else (1 - self.alpha) * self.latency + self.alpha * latency
+        self.error_rate *= 1 - self.alpha
+        self.consecutive_failures = 0
+        self.recent.append(latency)
+
+    def record_failure(self, eject_after: int, ejection_seconds: float, max_ejection_seconds: float):
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = (1 - self.alpha) * self.error_rate + self.alpha
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= eject_after:
+            backoff = ejection_seconds * 2 ** (self.consecutive_failures - eject_after)
+            self.ejected_until = time.monotonic() + min(backoff, max_ejection_seconds)
+            self.ejections += 1
+
+    def ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def score(self, default_latency: float) -> float:
+        """Expected cost of asking this instance - lower is better"""
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (1 + 4 * self.error_rate)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class InvidiousClient:
+    """
+    Asks the healthiest instance first and, if it has not answered within its
+    own `hedge_percentile` latency, hedges to the next one, and so on; the
+    first video ID wins. Losing requests finish in the background and still
+    update their instance's health. Instances failing `eject_after` times in a
+    row are skipped for `ejection_seconds`, doubling up to `max_ejection_seconds`.
+    """
+
+    def __init__(self, instances: List[str], timeout: float = 2.0, hedge_percentile: float = 0.75,
+                 min_hedge_delay: float = 0.1, default_hedge_delay: float = 0.3, eject_after: int = 2,
+                 ejection_seconds: float = 30.0, max_ejection_seconds: float = 600.0, alpha: float = 0.3,
+                 http=None):
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.eject_after = eject_after
+        self.ejection_seconds = ejection_seconds
+        self.max_ejection_seconds = max_ejection_seconds
+        self.http = http or requests
+        self._lock = threading.Lock()
+        self._health: Dict[str, InstanceHealth] = {
+            url.rstrip('/'): InstanceHealth(url.rstrip('/'), alpha) for url in instances
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max(4 * len(instances), 1), thread_name_prefix="invidious")
+        self.searches = 0
+        self.hedges = 0
+        self.misses = 0
+
+    def _ranked(self) -> List[InstanceHealth]:
+        """Healthy instances best-first; ejected ones only when nothing else is left"""
+        now = time.monotonic()
+        with self._lock:
+            ranked = sorted(self._health.values(), key=lambda h: h.score(self.timeout))
+            healthy = [h for h in ranked if not h.ejected(now)]
+            return healthy or sorted(ranked, key=lambda h: h.ejected_until)[:1]
+
+    def _hedge_delay(self, health: InstanceHealth) -> float:
+        with self._lock:
+            observed = health.percentile(self.hedge_percentile)
+        delay = observed if observed is not None else self.default_hedge_delay
+        return min(max(delay, self.min_hedge_delay), self.timeout)
+
+    @staticmethod
+    def _video_id(data) -> Optional[str]:
+        if not data:
+            return None
+        video_id = data[0].get('videoId') or data[0].get('id')
+        if isinstance(video_id, dict):
+            video_id = video_id.get('videoId')
+        return video_id or None
+
+    def _query(self, health: InstanceHealth, query: str) -> Optional[str]:
+        """One instance search; raises on transport/HTTP errors so the race can tell them apart"""
+        started = time.monotonic()
+        try:
+            response = self.http.get(
+                f"{health.url}/api/v1/search",
+                params={"q": f"{query} official", "type": "video"},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            video_id = self._video_id(response.json())
+        except (requests.RequestException, ValueError) as e:
+            with self._lock:
+                health.record_failure(self.eject_after, self.ejection_seconds, self.max_ejection_seconds)
+            print(f"⚠️  Invidious {health.url} failed: {e}")
+            raise
+        with self._lock:
+            health.record_success(time.monotonic() - started)
+        return video_id
+
+    def search(self, query: str) -> Optional[str]:
+        """First video ID any instance returns for the query, or None"""
+        candidates = self._ranked()
+        with self._lock:
+            self.searches += 1
+        in_flight = {}
+        next_index = 0
+
+        while True:
+            if next_index < len(candidates):
+                health = candidates[next_index]
+                in_flight[self._executor.submit(self._query, health, query)] = health
+                if next_index > 0:
+                    with self._lock:
+                        self.hedges += 1
+                next_index += 1
+                timeout = self._hedge_delay(health) if next_index < len(candidates) else None
+            elif not in_flight:
+                with self._lock:
+                    self.misses += 1
+                return None
+            else:
+                timeout = None
+
+            # Wakes on the hedge delay or on any answer; a failure or empty
+            # answer hedges to the next instance right away
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                health = in_flight.pop(future)
+                if future.exception() is None and future.result():
+                    with self._lock:
+                        health.wins += 1
+                    return future.result()
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'searches': self.searches,
+                'hedges': self.hedges,
+                'misses': self.misses,
+                'instances': {
+                    h.url: {
+                        'latency_ms': round(h.latency * 1000, 1) if h.latency is not None else None,
+                        'error_rate': round(h.error_rate, 3),
+                        'score': round(h.score(self.timeout), 3),
+                        'ejected_for': round(max(h.ejected_until - now, 0.0), 1),
+                        'ejections': h.ejections,
+                        'requests': h.requests,
+                        'failures': h.failures,
+                        'wins': h.wins
+                    }
+                    for h in self._health.values()
+                }
+            }
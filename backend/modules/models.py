@@ -10,6 +10,7 @@ class MoodDetectionResponse(BaseModel):
     emotion: str
     mood: str
     confidence: float
+    emotion_scores: Optional[Dict[str, float]] = None
 
 class Song(BaseModel):
     """Song data model"""
@@ -25,12 +26,15 @@ class Song(BaseModel):
     playcount: Optional[int] = None
     tags: List[str] = Field(default_factory=list)
     audio_features: Dict = Field(default_factory=dict)
+    resolve_handle: Optional[str] = None  # Set when youtube_id is deferred to /youtube/resolve
 
 class RecommendationRequest(BaseModel):
     """Basic recommendation request"""
     mood: str
     user_id: str = "default"
     limit: int = 20
+    language: Optional[str] = None
+    resolve_youtube: bool = True
 
 class PersonalizedRecommendationRequest(BaseModel):
     """Personalized recommendation request with preferences"""
@@ -38,6 +42,7 @@ class PersonalizedRecommendationRequest(BaseModel):
     user_id: str = "default"
     limit: int = 20
     preferences: Dict = Field(default_factory=dict)
+    resolve_youtube: bool = True
 
 class AdvancedRecommendationRequest(BaseModel):
     """Advanced recommendation with seeds and history"""
@@ -48,6 +53,16 @@ class AdvancedRecommendationRequest(BaseModel):
     use_history: bool = True
     limit: int = 20
 
+class TrackRef(BaseModel):
+    """Artist/title pair to resolve"""
+    artist: str
+    title: str
+
+class YouTubeResolveRequest(BaseModel):
+    """Batch YouTube ID resolution by resolve handle and/or artist/title"""
+    handles: List[str] = Field(default_factory=list)
+    tracks: List[TrackRef] = Field(default_factory=list)
+
 class ChatMessage(BaseModel):
     """Chat message model"""
     message: str
@@ -2,12 +2,14 @@
 Mood Detection Module
 Handles facial emotion detection and mood mapping
 """
-import cv2
-import numpy as np
-from deepface import DeepFace
 from fastapi import HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from .models import MoodDetectionResponse
+from .config import Config
+from .inference_pool import inference_pool, InferencePoolBusy
+from .image_preprocessing import probe_size, InvalidImage, ImageTooLarge
+from .perceptual_cache import PerceptualCache
 
 class MoodDetector:
     """Handles mood detection from images"""
@@ -49,28 +51,57 @@ class MoodDetector:
     
     @staticmethod
     async def detect_from_image(file: UploadFile) -> MoodDetectionResponse:
+        limit = Config.MAX_IMAGE_UPLOAD_BYTES
+        if file.size is not None and file.size > limit:
+            raise HTTPException(status_code=413, detail=f"Image larger than {limit // (1024 * 1024)} MB")
+        contents = await file.read(limit + 1)
+        return await MoodDetector.detect_from_bytes(contents)
+    
+    @staticmethod
+    async def detect_from_bytes(contents: bytes) -> MoodDetectionResponse:
+        """Mood of one encoded image (an upload or a streamed frame)"""
         try:
-            contents = await file.read()
-            nparr = np.frombuffer(contents, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            limit = Config.MAX_IMAGE_UPLOAD_BYTES
+            if len(contents) > limit:
+                raise HTTPException(status_code=413, detail=f"Image larger than {limit // (1024 * 1024)} MB")
             
-            if img is None:
-                raise HTTPException(status_code=400, detail="Invalid image file")
+            # Header-only check here; decoding happens on the inference worker, at reduced resolution
+            width, height = probe_size(contents, Config.IMAGE_MAX_PIXELS)
             
-            result = DeepFace.analyze(img, actions=['emotion'], enforce_detection=False)
+            # Retried or re-uploaded frames, and near-identical webcam frames, reuse a recent result
+            # (hashing, a grayscale decode and a Hamming scan: a few ms, so kept off the event loop)
+            cached, cache_key, phash = await run_in_threadpool(mood_result_cache.lookup, contents, max(width, height))
+            if cached is not None:
+                return cached
             
-            if isinstance(result, list):
-                result = result[0]
+            result = await inference_pool.analyze(contents)
             
             emotion = result.get('dominant_emotion', 'neutral')
             emotion_scores = result.get('emotion', {})
             confidence = float(emotion_scores.get(emotion, 0.0))
             mood = MoodDetector.EMOTION_TO_MOOD.get(emotion, 'calm')
             
-            return MoodDetectionResponse(emotion=emotion, mood=mood, confidence=confidence)
+            response = MoodDetectionResponse(
+                emotion=emotion,
+                mood=mood,
+                confidence=confidence,
+                emotion_scores={label: float(score) for label, score in emotion_scores.items()}
+            )
+            await run_in_threadpool(mood_result_cache.set, cache_key, phash, response)
+            return response
             
         except HTTPException:
             raise
+        except InvalidImage:
+            raise HTTPException(status_code=400, detail="Invalid image file")
+        except ImageTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except InferencePoolBusy as e:
+            raise HTTPException(
+                status_code=503,
+                detail="Mood detection is at capacity, please retry shortly",
+                headers={"Retry-After": str(e.retry_after)}
+            )
         except Exception as e:
             print(f"❌ Mood detection error: {e}")
             raise HTTPException(status_code=500, detail=f"Mood detection failed: {str(e)}")
@@ -96,3 +127,11 @@ class MoodDetector:
     @staticmethod
     def get_all_moods() -> dict:
         return MoodDetector.MOOD_TO_TAGS
+
+
+mood_result_cache = PerceptualCache(
+    maxsize=Config.MOOD_CACHE_SIZE,
+    ttl=Config.MOOD_CACHE_TTL,
+    max_distance=Config.MOOD_CACHE_MAX_DISTANCE,
+    name="mood_results"
+)
@@ -0,0 +1,196 @@
+"""
+Mood Model Module
+Compiled tag/title-keyword -> mood index used to classify and filter tracks
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .mood_detection import MoodDetector
+
+
+# Title keywords that let a track count towards a mood without a matching tag
+MOOD_TITLE_KEYWORDS = {
+    'happy': ['happy', 'joy', 'celebration', 'party', 'dance', 'fun', 'upbeat'],
+    'sad': ['sad', 'cry', 'tears', 'heartbreak', 'alone', 'lonely', 'miss'],
+    'energetic': ['energy', 'power', 'rock', 'pump', 'workout', 'beast'],
+    'calm': ['calm', 'peace', 'relax', 'soft', 'slow', 'soothing'],
+    'romantic': ['love', 'romantic', 'heart', 'pyaar', 'ishq', 'mohabbat'],
+    'intense': ['intense', 'powerful', 'dramatic', 'epic']
+}
+
+# Moods the model scores that are not (yet) selectable through MoodDetector
+EXTRA_MOOD_TAGS = {
+    'romantic': ['romantic', 'love', 'love songs']
+}
+
+
+class _KeywordAutomaton:
+    """Aho-Corasick automaton: finds every keyword occurring in a text in one pass"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (len(self.keywords),)
+            self.keywords.append(keyword)
+
+        # Breadth-first failure links, folded into a full transition table so
+        # matching is a single dict lookup per character
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])] + [{}] * (len(self._goto) - 1)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._delta[state] = {**self._delta[self._fail[state]], **self._goto[state]}
+            for char, nxt in self._goto[state].items():
+                self._fail[nxt] = self._delta[self._fail[state]].get(char, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def find(self, text: str) -> set:
+        """Ids of the distinct keywords found in `text`"""
+        delta, out = self._delta, self._out
+        found = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class MoodModel:
+    """
+    Scores a track's tags and title against every mood in one pass.
+    Tags are looked up in an inverted index (tag -> weighted moods) and titles
+    are scanned once by an Aho-Corasick matcher over all mood keywords.
+    """
+
+    TAG_WEIGHT = 1.0
+    TITLE_WEIGHT = 0.5
+
+    def __init__(self, mood_tags: Dict[str, Sequence[str]], title_keywords: Dict[str, Sequence[str]],
+                 emotion_to_mood: Optional[Dict[str, str]] = None):
+        self.moods: List[str] = sorted(set(mood_tags) | set(title_keywords))
+        self._mood_index = {mood: i for i, mood in enumerate(self.moods)}
+        self.emotion_to_mood = dict(emotion_to_mood or {})
+
+        # Inverted indexes: tag / title keyword -> ((mood column, weight), ...)
+        self._tag_postings: Dict[str, Tuple[Tuple[int, float], ...]] = {}
+        for mood, tags in mood_tags.items():
+            for tag in tags:
+                tag = tag.lower()
+                self._tag_postings[tag] = self._tag_postings.get(tag, ()) + ((self._mood_index[mood], self.TAG_WEIGHT),)
+
+        keywords = sorted({kw.lower() for kws in title_keywords.values() for kw in kws})
+        self._automaton = _KeywordAutomaton(keywords)
+        keyword_ids = {kw: i for i, kw in enumerate(keywords)}
+        self._keyword_postings: List[Tuple[Tuple[int, float], ...]] = [()] * len(keywords)
+        for mood, kws in title_keywords.items():
+            for kw in kws:
+                kw_id = keyword_ids[kw.lower()]
+                self._keyword_postings[kw_id] += ((self._mood_index[mood], self.TITLE_WEIGHT),)
+
+        # The same indexes as dense weight matrices for the batch API
+        self._tag_ids = {tag: i for i, tag in enumerate(self._tag_postings)}
+        self._tag_matrix = self._weight_matrix(self._tag_postings.values())
+        self._keyword_matrix = self._weight_matrix(self._keyword_postings)
+
+    def _weight_matrix(self, postings: Iterable[Tuple[Tuple[int, float], ...]]) -> np.ndarray:
+        rows = list(postings)
+        matrix = np.zeros((len(rows), len(self.moods)))
+        for row, entries in enumerate(rows):
+            for column, weight in entries:
+                matrix[row, column] += weight
+        return matrix
+
+    def score(self, tags: Iterable[str], title: str = "") -> Dict[str, float]:
+        """Weighted score per mood for one track (tags are expected lowercase)"""
+        scores = [0.0] * len(self.moods)
+        for tag in set(tags):
+            for column, weight in self._tag_postings.get(tag, ()):
+                scores[column] += weight
+        for kw_id in self._automaton.find((title or "").lower()):
+            for column, weight in self._keyword_postings[kw_id]:
+                scores[column] += weight
+        return dict(zip(self.moods, scores))
+
+    def score_batch(self, tag_lists: Sequence[Iterable[str]], titles: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(tag_scores, title_scores), each an (n_tracks, n_moods) array in `self.moods` order"""
+        n = len(tag_lists)
+        tag_rows, tag_cols = [], []
+        for row, tags in enumerate(tag_lists):
+            for tag in tags:
+                tag_id = self._tag_ids.get(tag)
+                if tag_id is not None:
+                    tag_rows.append(row)
+                    tag_cols.append(tag_id)
+        kw_rows, kw_cols = [], []
+        for row, title in enumerate(titles):
+            for kw_id in self._automaton.find((title or "").lower()):
+                kw_rows.append(row)
+                kw_cols.append(kw_id)
+
+        incidence = np.zeros((n, len(self._tag_ids)))
+        incidence[tag_rows, tag_cols] = 1.0
+        keyword_hits = np.zeros((n, len(self._automaton.keywords)))
+        keyword_hits[kw_rows, kw_cols] = 1.0
+        return incidence @ self._tag_matrix, keyword_hits @ self._keyword_matrix
+
+    def mood_mask(self, tag_lists: Sequence[Sequence[str]], titles: Sequence[str], mood: str) -> np.ndarray:
+        """
+        Boolean keep-mask for a mood filter: untagged tracks pass, tagged
+        ones need a mood tag or a mood keyword in the title.
+        """
+        untagged = np.array([not tags for tags in tag_lists], dtype=bool)
+        column = self._mood_index.get(mood)
+        if column is None:
+            return untagged
+        tag_scores, title_scores = self.score_batch(tag_lists, titles)
+        return untagged | (tag_scores[:, column] > 0) | (title_scores[:, column] > 0)
+
+    def mood_bits(self, tags: Iterable[str], title: str = "") -> int:
+        """Bitmask (bit i = `self.moods[i]`) of the moods a track scores above zero for"""
+        scores = self.score(tags, title)
+        return sum(1 << i for i, mood in enumerate(self.moods) if scores[mood] > 0)
+
+    def mood_column(self, mood: str) -> Optional[int]:
+        return self._mood_index.get(mood)
+
+    def mood_from_emotions(self, emotion_scores: Dict[str, float]) -> Dict[str, float]:
+        """Fold DeepFace emotion scores into mood scores via the emotion -> mood mapping"""
+        scores = dict.fromkeys(self.moods, 0.0)
+        for emotion, value in emotion_scores.items():
+            mood = self.emotion_to_mood.get(emotion)
+            if mood in scores:
+                scores[mood] += float(value)
+        return scores
+
+    def get_stats(self) -> dict:
+        return {
+            'moods': self.moods,
+            'tags': len(self._tag_ids),
+            'title_keywords': len(self._automaton.keywords)
+        }
+
+
+mood_model = MoodModel(
+    mood_tags={
+        **{mood: info['tags'] for mood, info in MoodDetector.get_all_moods().items()},
+        **EXTRA_MOOD_TAGS
+    },
+    title_keywords=MOOD_TITLE_KEYWORDS,
+    emotion_to_mood=MoodDetector.EMOTION_TO_MOOD
+)
@@ -0,0 +1,113 @@
+"""
+Mood Pools Module
+Background-refreshed, ready-to-serve song pools per mood (and mood x language)
+"""
+import random
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from .models import Song
+from .singleflight import SingleFlight
+
+
+class MoodPoolRefresher:
+    """
+    Keeps one ranked, YouTube-resolved song list per key, rebuilt on a daemon
+    thread every `interval` seconds (+/- `jitter` as a fraction, so pools do
+    not all refresh at once). A failed or empty rebuild keeps the previous
+    pool and is retried after `retry_interval`.
+    """
+
+    def __init__(self, build: Callable[..., List[Song]], keys: Iterable[Tuple], interval: float,
+                 jitter: float = 0.1, retry_interval: float = 60.0):
+        self._build = build
+        self.keys = list(keys)
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        # key -> (songs, built_at wall-clock, build duration seconds)
+        self._pools: Dict[Hashable, Tuple[List[Song], float, float]] = {}
+        self._next_due: Dict[Hashable, float] = {key: 0.0 for key in self.keys}
+        self._flight = SingleFlight("mood_pools")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mood-pools", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for key in self.keys:
+                if self._stop.is_set():
+                    return
+                if self._next_due[key] <= time.monotonic():
+                    self.refresh(key)
+            wait = min(self._next_due.values()) - time.monotonic()
+            self._stop.wait(max(wait, 1.0))
+
+    def refresh(self, key: Tuple) -> Optional[List[Song]]:
+        """Rebuild one pool now (concurrent refreshes of the same key share one build)"""
+        return self._flight.do(key, self._refresh, key)
+
+    def _refresh(self, key: Tuple) -> Optional[List[Song]]:
+        started = time.monotonic()
+        try:
+            songs = self._build(*key)
+        except Exception as e:
+            songs = None
+            print(f"⚠️  Mood pool {key} refresh failed: {e}")
+
+        duration = time.monotonic() - started
+        with self._lock:
+            if not songs:
+                self.failures += 1
+                self._next_due[key] = time.monotonic() + self.retry_interval
+                return None
+            self.refreshes += 1
+            self._pools[key] = (songs, time.time(), duration)
+            self._next_due[key] = time.monotonic() + self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        print(f"✅ Mood pool {key}: {len(songs)} songs in {duration:.2f}s")
+        return songs
+
+    def get(self, key: Tuple) -> Optional[List[Song]]:
+        with self._lock:
+            pool = self._pools.get(key)
+        return pool[0] if pool else None
+
+    def get_or_build(self, key: Tuple) -> List[Song]:
+        """The current pool, building it in the caller's thread when there is none yet"""
+        songs = self.get(key)
+        if songs is None:
+            songs = self.refresh(key)
+        return songs or []
+
+    def get_stats(self) -> dict:
+        now_wall, now = time.time(), time.monotonic()
+        with self._lock:
+            pools = {
+                '/'.join(part or 'any' for part in key): {
+                    'songs': len(self._pools[key][0]) if key in self._pools else 0,
+                    'age_seconds': round(now_wall - self._pools[key][1], 1) if key in self._pools else None,
+                    'refresh_seconds': round(self._pools[key][2], 3) if key in self._pools else None,
+                    'next_refresh_in': round(max(self._next_due[key] - now, 0.0), 1)
+                }
+                for key in self.keys
+            }
+            return {
+                'running': bool(self._thread and self._thread.is_alive()),
+                'interval': self.interval,
+                'jitter': self.jitter,
+                'refreshes': self.refreshes,
+                'failures': self.failures,
+                'pools': pools
+            }
@@ -0,0 +1,128 @@
+"""
+Mood Stream Module
+Live mood from a WebSocket stream of webcam frames: newest-frame sampling at a target rate, EMA smoothing
+"""
+import asyncio
+from typing import Dict, Optional
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from .config import Config
+from .mood_detection import MoodDetector
+from .mood_model import mood_model
+
+
+class LiveMoodSession:
+    """
+    One client's frame stream. A frame that arrives while another is being
+    analysed, or sooner than `target_fps` allows, replaces the pending frame
+    instead of queueing behind it, so inference always runs on the newest
+    frame and a slow pool makes the session skip frames rather than lag.
+    Each analysed frame's emotion scores are folded into mood scores
+    (EMOTION_TO_MOOD via mood_model) and into an exponential moving average
+    with weight `alpha`; the client hears about it only when the smoothed
+    dominant mood changes.
+    """
+
+    def __init__(self, websocket: WebSocket, target_fps: Optional[float] = None, alpha: Optional[float] = None):
+        self.websocket = websocket
+        self.target_fps = min(max(target_fps or Config.LIVE_MOOD_TARGET_FPS, 0.1), Config.LIVE_MOOD_MAX_FPS)
+        self.alpha = min(max(alpha or Config.LIVE_MOOD_EMA_ALPHA, 0.01), 1.0)
+        self.smoothed: Optional[Dict[str, float]] = None
+        self.mood: Optional[str] = None
+        self._latest: Optional[bytes] = None
+        self._frame_ready = asyncio.Event()
+        self.received = 0
+        self.analyzed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.updates = 0
+
+    def offer(self, frame: bytes):
+        """Make `frame` the next one to analyse, dropping any older frame still waiting"""
+        if self._latest is not None:
+            self.dropped += 1
+        self._latest = frame
+        self.received += 1
+        self._frame_ready.set()
+
+    def smooth(self, emotion_scores: Dict[str, float]) -> str:
+        """Fold one frame's emotion scores into the moving average; returns the dominant mood"""
+        scores = mood_model.mood_from_emotions(emotion_scores)
+        if self.smoothed is None:
+            self.smoothed = scores
+        else:
+            self.smoothed = {mood: self.alpha * scores[mood] + (1 - self.alpha) * self.smoothed[mood]
+                             for mood in scores}
+        return max(self.smoothed, key=self.smoothed.get)
+
+    async def _receive_frames(self):
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            frame = message.get("bytes")
+            if frame is None:
+                await self.websocket.send_json({"type": "error", "detail": "Send frames as binary messages"})
+            elif len(frame) > Config.MAX_IMAGE_UPLOAD_BYTES:
+                await self.websocket.send_json({"type": "error", "detail": "Frame too large"})
+            else:
+                self.offer(frame)
+
+    async def _analyze_frames(self):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.target_fps
+        next_at = 0.0
+        while True:
+            await self._frame_ready.wait()
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)      # frames arriving meanwhile replace the pending one
+            frame, self._latest = self._latest, None
+            self._frame_ready.clear()
+            next_at = loop.time() + interval
+            try:
+                result = await MoodDetector.detect_from_bytes(frame)
+            except HTTPException as e:
+                self.failed += 1
+                if e.status_code != 503:    # a saturated pool just costs this frame
+                    await self.websocket.send_json({"type": "error", "detail": e.detail})
+                continue
+            self.analyzed += 1
+            mood = self.smooth(result.emotion_scores or {result.emotion: result.confidence})
+            if mood != self.mood:
+                self.mood = mood
+                self.updates += 1
+                await self.websocket.send_json(self._update(result.emotion))
+
+    def _update(self, emotion: str) -> dict:
+        total = sum(self.smoothed.values()) or 1.0
+        return {
+            "type": "mood",
+            "mood": self.mood,
+            "confidence": round(100 * self.smoothed[self.mood] / total, 2),
+            "emotion": emotion,
+            "scores": {mood: round(100 * value / total, 2) for mood, value in self.smoothed.items()},
+            "frames": self.get_stats()
+        }
+
+    async def run(self):
+        """Serve the session until the client disconnects"""
+        await self.websocket.send_json({"type": "ready", "target_fps": self.target_fps, "alpha": self.alpha})
+        tasks = [asyncio.create_task(self._receive_frames()), asyncio.create_task(self._analyze_frames())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None and not isinstance(task.exception(), WebSocketDisconnect):
+                    print(f"❌ Live mood session error: {task.exception()}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> dict:
+        return {
+            'received': self.received,
+            'analyzed': self.analyzed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'updates': self.updates
+        }
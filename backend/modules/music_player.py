@@ -1,66 +1,79 @@
 """
 Music Player Module - Fixed Invidious errors
 """
+import base64
 import json
 import os
-import requests
-from typing import Optional
+import threading
+from typing import Optional, Tuple
 from .config import Config
+from .singleflight import SingleFlight
+from .youtube_store import YouTubeIdStore
+from .invidious import InvidiousClient
+from .http_client import PooledHTTPClient
+from .youtube_quota import YouTubeQuota
+from .track_identity import query_key
 
 class MusicPlayer:
     
     def __init__(self):
         self.cache_file = Config.CACHE_FILE
-        self.cache = self.load_cache()
+        self._flight = SingleFlight("youtube_ids")  # Shares concurrent lookups of one query
+        self.cache = YouTubeIdStore(
+            self.cache_file,
+            flush_interval=Config.YOUTUBE_CACHE_FLUSH_INTERVAL,
+            compact_min_entries=Config.YOUTUBE_CACHE_COMPACT_MIN_ENTRIES
+        )
+        # One-time move of raw-query keys to canonical ones (a no-op once done)
+        before = len(self.cache)
+        migrated = self.cache.migrate(query_key)
+        if migrated:
+            print(f"✅ YouTube cache: {migrated} keys canonicalized, {before} -> {len(self.cache)} entries")
+        self.hits = 0
+        self.misses = 0
         self.youtube = Config.get_youtube()
-    
-    def load_cache(self) -> dict:
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        self._youtube_local = threading.local()  # One API service (and connection) per worker thread
+        self._youtube_lock = threading.Lock()
+        self.youtube_services = 0
+        self.youtube_requests = 0
+        self.quota = YouTubeQuota(
+            daily_units=Config.YOUTUBE_DAILY_QUOTA,
+            search_cost=Config.YOUTUBE_SEARCH_COST,
+            interactive_reserve=Config.YOUTUBE_INTERACTIVE_RESERVE,
+            bulk_burst=Config.YOUTUBE_BULK_BURST,
+            state_file=Config.YOUTUBE_QUOTA_FILE,
+            save_interval=Config.YOUTUBE_QUOTA_SAVE_INTERVAL
+        )
+        self.routes = {'official': 0, 'invidious': 0}
+        self.http = PooledHTTPClient(
+            pool_connections=max(len(Config.INVIDIOUS_INSTANCES), 1),
+            pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+            retries=Config.HTTP_RETRIES,
+            backoff=Config.HTTP_BACKOFF
+        )
+        self.invidious = InvidiousClient(
+            Config.INVIDIOUS_INSTANCES,
+            http=self.http,
+            timeout=Config.INVIDIOUS_TIMEOUT,
+            hedge_percentile=Config.INVIDIOUS_HEDGE_PERCENTILE,
+            ejection_seconds=Config.INVIDIOUS_EJECTION_SECONDS
+        )
     
     def save_cache(self):
-        try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, indent=2)
-        except:
-            pass
+        """Write buffered cache entries now (they are otherwise flushed in the background)"""
+        self.cache.flush()
     
     def get_youtube_id_invidious(self, query: str) -> Optional[str]:
-        """Try Invidious instances - with better error handling"""
-        instances = [
-            "https://inv.tux.pizza",
-            "https://invidious.fdn.fr",
-            "https://inv.riverside.rocks"
-        ]
-        
-        for instance in instances:
-            try:
-                response = requests.get(
-                    f"{instance}/api/v1/search",
-                    params={"q": f"{query} official", "type": "video"},
-                    timeout=2  # Reduced timeout
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data and len(data) > 0:
-                        video_data = data[0]
-                        video_id = video_data.get('videoId') or video_data.get('id')
-                        
-                        if isinstance(video_id, dict):
-                            video_id = video_id.get('videoId')
-                        
-                        if video_id:
-                            return video_id
-            except:
-                continue  # Silently fail and try next instance
-        
-        return None
+        """Race the configured Invidious instances, healthiest first"""
+        return self.invidious.search(query)
+    
+    def _youtube_service(self):
+        service = getattr(self._youtube_local, 'service', None)
+        if service is None:
+            service = self._youtube_local.service = Config.build_youtube()
+            with self._youtube_lock:
+                self.youtube_services += 1
+        return service
     
     def get_youtube_id_official(self, query: str) -> Optional[str]:
         """Official YouTube API"""
@@ -68,37 +81,83 @@ class MusicPlayer:
             return None
         
         try:
-            request = self.youtube.search().list(
+            with self._youtube_lock:
+                self.youtube_requests += 1
+            request = self._youtube_service().search().list(
                 q=f"{query} official",
                 part='id',
                 maxResults=1,
                 type='video'
             )
-            response = request.execute()
+            response = request.execute(num_retries=Config.HTTP_RETRIES)
             
             if response.get('items'):
                 video_id = response['items'][0]['id'].get('videoId')
                 return video_id
-        except:
-            pass
+        except Exception as e:
+            if getattr(getattr(e, 'resp', None), 'status', None) == 403 and 'quota' in str(e).lower():
+                self.quota.mark_exhausted()
+            else:
+                print(f"⚠️  YouTube API search failed: {e}")
         
         return None
     
-    def get_youtube_id(self, query: str) -> Optional[str]:
-        """Get YouTube ID with caching"""
-        if query in self.cache:
-            return self.cache[query]
+    def get_cached_youtube_id(self, query: str) -> Optional[str]:
+        """Cached YouTube ID only - never calls YouTube"""
+        return self.cache.get(query_key(query))
+    
+    @staticmethod
+    def make_resolve_handle(artist: str, title: str) -> str:
+        """Opaque handle a client passes back to /youtube/resolve"""
+        return base64.urlsafe_b64encode(json.dumps([artist, title]).encode('utf-8')).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def parse_resolve_handle(handle: str) -> Optional[Tuple[str, str]]:
+        try:
+            artist, title = json.loads(base64.urlsafe_b64decode(handle + '=' * (-len(handle) % 4)))
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(artist, str) or not isinstance(title, str) or not artist or not title:
+            return None
+        return artist, title
+    
+    def get_youtube_id(self, query: str, interactive: bool = False) -> Optional[str]:
+        """
+        Get YouTube ID with caching. Misses use the official API while the quota
+        allows it (interactive lookups get priority over bulk resolution) and
+        Invidious otherwise.
+        """
+        key = query_key(query)
+        video_id = self.cache.get(key)
+        with self._youtube_lock:
+            if video_id:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if video_id:
+            return video_id
+        
+        return self._flight.do(key, self._resolve_youtube_id, query, key, interactive)
+    
+    def _resolve_youtube_id(self, query: str, key: str, interactive: bool = False) -> Optional[str]:
+        if key in self.cache:
+            return self.cache[key]
         
-        # Try official API first (more reliable)
-        video_id = self.get_youtube_id_official(query)
+        # Try official API first (more reliable) when the budget allows
+        video_id = None
+        if self.youtube and self.quota.acquire(interactive):
+            with self._youtube_lock:
+                self.routes['official'] += 1
+            video_id = self.get_youtube_id_official(query)
         
         # Fallback to Invidious
         if not video_id:
+            with self._youtube_lock:
+                self.routes['invidious'] += 1
             video_id = self.get_youtube_id_invidious(query)
         
         if video_id:
-            self.cache[query] = video_id
-            self.save_cache()
+            self.cache.set(key, video_id)
         
         return video_id
     
@@ -111,7 +170,7 @@ class MusicPlayer:
     
     def search_and_get_url(self, song_name: str, artist: str) -> Optional[dict]:
         query = f"{artist} {song_name}"
-        video_id = self.get_youtube_id(query)
+        video_id = self.get_youtube_id(query, interactive=True)
         
         if video_id:
             return {
@@ -124,15 +183,29 @@ class MusicPlayer:
         return None
     
     def clear_cache(self):
-        self.cache = {}
-        self.save_cache()
+        self.cache.clear()
         print("Cache cleared")
     
+    def close(self):
+        self.cache.close()
+        self.quota.flush()
+        self.http.close()
+    
     def get_cache_stats(self) -> dict:
         return {
             'total_entries': len(self.cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / (self.hits + self.misses), 3) if self.hits + self.misses else 0.0,
             'cache_file': self.cache_file,
-            'cache_size_kb': os.path.getsize(self.cache_file) / 1024 if os.path.exists(self.cache_file) else 0
+            'cache_size_kb': os.path.getsize(self.cache_file) / 1024 if os.path.exists(self.cache_file) else 0,
+            'store': self.cache.get_stats(),
+            'invidious': self.invidious.get_stats(),
+            'http_pool': self.http.get_stats(),
+            'youtube_api': {'services': self.youtube_services, 'requests': self.youtube_requests},
+            'quota': self.quota.get_stats(),
+            'routes': dict(self.routes),
+            'single_flight': self._flight.get_stats()
         }
 
 music_player = MusicPlayer()
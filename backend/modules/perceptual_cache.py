@@ -0,0 +1,145 @@
+"""
+Perceptual Cache Module
+Short-lived cache of mood detection results for repeated and near-identical frames
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import cv2
+import numpy as np
+
+_REDUCED_GRAYSCALE = [
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    (1, cv2.IMREAD_GRAYSCALE),
+]
+
+
+def dhash(data: bytes, longer_side: Optional[int] = None, hash_size: int = 8) -> Optional[int]:
+    """
+    64-bit difference hash of an encoded image: decoded as grayscale at the
+    smallest reduced scale that keeps a few times the hash resolution,
+    shrunk to 9x8, one bit per horizontal brightness step. Invariant to
+    re-encoding, resizing and uniform brightness changes. None if undecodable.
+    """
+    factor, flag = 1, cv2.IMREAD_GRAYSCALE
+    if longer_side:
+        factor, flag = next((factor, flag) for factor, flag in _REDUCED_GRAYSCALE
+                            if factor == 1 or longer_side / factor >= hash_size * 8)
+    gray = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class PerceptualCache:
+    """
+    Bounded LRU of detection results with a short TTL, looked up first by
+    the exact bytes of an upload (a retry or re-upload costs one digest) and
+    then by dHash, accepting any entry within `max_distance` differing bits.
+    The near-match scan is linear, which is fine at the few hundred entries
+    a short TTL keeps.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30.0, max_distance: int = 2, name: str = "cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.name = name
+        # digest -> (perceptual hash, value, expires_at)
+        self._data: "OrderedDict[bytes, Tuple[Optional[int], Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._distance_total = 0
+        self._lookup_seconds = 0.0
+
+    @staticmethod
+    def digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def _expire(self, now: float):
+        """Drop expired entries from the least recently used end (others are skipped when read)"""
+        while self._data:
+            key, (_, _, expires_at) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[key]
+            self.expirations += 1
+
+    def lookup(self, data: bytes, longer_side: Optional[int] = None) -> Tuple[Any, bytes, Optional[int]]:
+        """
+        (value or None, digest, perceptual hash) for an upload. The digest and
+        hash are for the `set()` after a miss; the hash is only computed when
+        the exact bytes are not cached.
+        """
+        started = time.monotonic()
+        key = self.digest(data)
+        with self._lock:
+            self._expire(started)
+            entry = self._data.get(key)
+            if entry is not None and entry[2] > started:
+                self._data.move_to_end(key)
+                self.exact_hits += 1
+                self._lookup_seconds += time.monotonic() - started
+                return entry[1], key, entry[0]
+
+        phash = dhash(data, longer_side)
+        with self._lock:
+            if phash is not None and self.max_distance > 0:
+                best, best_distance = None, self.max_distance + 1
+                for candidate, (other, _, expires_at) in self._data.items():
+                    if other is None or expires_at <= started:
+                        continue
+                    distance = (phash ^ other).bit_count()
+                    if distance < best_distance:
+                        best, best_distance = candidate, distance
+                if best is not None:
+                    self._data.move_to_end(best)
+                    self.similar_hits += 1
+                    self._distance_total += best_distance
+                    self._lookup_seconds += time.monotonic() - started
+                    return self._data[best][1], key, phash
+            self.misses += 1
+            self._lookup_seconds += time.monotonic() - started
+        return None, key, phash
+
+    def set(self, key: bytes, phash: Optional[int], value: Any):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (phash, value, time.monotonic() + self.ttl)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'max_distance': self.max_distance,
+                'exact_hits': self.exact_hits,
+                'similar_hits': self.similar_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                'avg_similar_distance': round(self._distance_total / self.similar_hits, 2) if self.similar_hits else None,
+                'avg_lookup_ms': round(self._lookup_seconds / lookups * 1000, 3) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
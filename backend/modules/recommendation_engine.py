@@ -1,15 +1,60 @@
 """
 Recommendation Engine - With Fuzzy Artist Matching & Better Error Handling
 """
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict
 from .config import Config
 from .models import Song, PersonalizedRecommendationRequest, RecommendationRequest
 from .music_player import music_player
 from .mood_detection import MoodDetector
+from .cache import ResponseCache, TTLCache
+from .artist_index import ArtistIndex
+from .track_tags import TrackTagService
+from .mood_model import mood_model
+from .catalog import TrackCatalog
+from .similarity import TagSimilarityIndex
+from .track_identity import track_key
+from .singleflight import SingleFlight
+from .mood_pools import MoodPoolRefresher
 from fastapi import HTTPException
 from datetime import datetime
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import re
+import sqlite3
+import threading
+
+
+class _FetchPlan:
+    """
+    Independent upstream lookups for one request, keyed by name.
+    With an executor every lookup starts as soon as it is added;
+    without one each lookup runs the first time its result is read.
+    """
+    
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self.executor = executor
+        self._pending = {}
+        self._results = {}
+    
+    def add(self, key, fn, *args, **kwargs):
+        if self.executor:
+            self._pending[key] = self.executor.submit(fn, *args, **kwargs)
+        else:
+            self._pending[key] = lambda: fn(*args, **kwargs)
+    
+    def get(self, key, default=None):
+        if key in self._results:
+            return self._results[key]
+        pending = self._pending.get(key)
+        if pending is None:
+            return default
+        try:
+            result = pending.result() if isinstance(pending, Future) else pending()
+        except Exception as e:
+            print(f"  ✗ Lookup {key} failed: {e}")
+            result = default
+        self._results[key] = result
+        return result
 
 
 class RecommendationEngine:
@@ -23,16 +68,80 @@ class RecommendationEngine:
         self.lastfm = Config.get_lastfm()
         self.user_history = defaultdict(list)
         self.user_favorites = defaultdict(list)
-        self._track_cache = {}
-        self._artist_cache = {}  # Cache for fuzzy-matched artist names
+        self._track_cache = TTLCache(
+            maxsize=Config.TRACK_CACHE_SIZE,
+            ttl=Config.TRACK_CACHE_TTL,
+            max_bytes=Config.TRACK_CACHE_MAX_BYTES,
+            name="tracks"
+        )
+        # Cache for fuzzy-matched artist names
+        self._artist_cache = TTLCache(
+            maxsize=Config.ARTIST_CACHE_SIZE,
+            ttl=Config.ARTIST_CACHE_TTL,
+            max_bytes=Config.ARTIST_CACHE_MAX_BYTES,
+            name="artists"
+        )
+        # Every artist name seen so far, so most fuzzy matches skip Last.fm
+        self._artist_index = ArtistIndex(max_names=Config.ARTIST_INDEX_MAX_NAMES)
+        seeded = self._artist_index.load_seed_file(Config.ARTIST_SEED_FILE)
+        if seeded:
+            print(f"✅ Artist index seeded with {seeded} names")
+        # Everything ever fetched from Last.fm, kept across restarts and outages
+        self._catalog = TrackCatalog(Config.CATALOG_DB)
+        self._artist_index.add_many(self._catalog.artist_names())
+        # Offline similar-song lookups over every track whose tags are known
+        self._similarity = TagSimilarityIndex()
+        self._similarity.add_many(self._catalog.track_tag_rows())
+        self._response_cache = ResponseCache(
+            ttls=Config.LASTFM_CACHE_TTLS,
+            maxsize=Config.LASTFM_CACHE_SIZE,
+            stale_ttl=Config.LASTFM_CACHE_STALE_TTL,
+            max_bytes=Config.LASTFM_CACHE_MAX_BYTES
+        )
+        self._playcount_cache = TTLCache(
+            maxsize=Config.TRACK_CACHE_SIZE,
+            ttl=Config.TRACK_CACHE_TTL,
+            name="playcounts"
+        )
+        self._upstream_calls = Counter()
+        self._calls_lock = threading.Lock()
+        self._track_tags = TrackTagService(
+            cache_file=Config.TRACK_TAG_CACHE_FILE,
+            ttl=Config.TRACK_TAG_TTL,
+            maxsize=Config.TRACK_TAG_CACHE_SIZE,
+            max_workers=Config.TRACK_TAG_WORKERS,
+            on_fetch=lambda: self._count_call('track.getTopTags'),
+            on_tags=self._learn_track_tags,
+            limit=Config.TRACK_TAG_LIMIT,
+            negative_ttl=Config.NEGATIVE_CACHE_TTL
+        )
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        # Concurrent requests for the same cold key share one upstream call
+        self._lookup_flight = SingleFlight("lastfm_lookups")
+        self._artist_flight = SingleFlight("artist_search")
+        self._playcount_flight = SingleFlight("playcounts")
+        # Ready-made basic recommendations per mood and mood x language
+        self._mood_pools = MoodPoolRefresher(
+            build=self._build_mood_pool,
+            keys=[(mood, language) for mood in MoodDetector.get_all_moods()
+                  for language in [None] + list(self.LANGUAGE_TO_TAG)],
+            interval=Config.MOOD_POOL_REFRESH_INTERVAL,
+            jitter=Config.MOOD_POOL_JITTER
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.LASTFM_MAX_WORKERS,
+            thread_name_prefix="lastfm"
+        )
     
     def fuzzy_match_artist(self, artist_query: str) -> str:
             """
             Dynamic fuzzy matching without hardcoding:
             1. Cache check
-            2. Last.fm artist search (primary)
-            3. Last.fm track search (if artist search fails)
-            4. String similarity matching
+            2. Local artist index (confident matches only)
+            3. Last.fm artist search
+            4. Last.fm track search (if artist search fails)
+            5. String similarity matching
             """
             if not artist_query or not self.lastfm:
                 return artist_query
@@ -41,14 +150,31 @@ class RecommendationEngine:
             cache_key = artist_query.lower()
             
             # Check cache
-            if cache_key in self._artist_cache:
-                cached = self._artist_cache[cache_key]
+            cached = self._artist_cache.get(cache_key)
+            if cached is not None:
                 print(f"  ✓ Cache: '{artist_query}' → '{cached}'")
                 return cached
             
+            # Local index answers most queries without a network round trip
+            indexed = self._artist_index.best_match(artist_query, Config.ARTIST_INDEX_MIN_SCORE)
+            if indexed:
+                self._artist_cache.set(cache_key, indexed)
+                print(f"  ✓ Index: '{artist_query}' → '{indexed}'")
+                return indexed
+            
+            # Concurrent requests for the same unknown artist share one search
+            return self._artist_flight.do(cache_key, self._search_artist, artist_query, cache_key)
+    
+    def _search_artist(self, artist_query: str, cache_key: str) -> str:
+            # Another caller may have resolved it while this one was queued
+            cached = self._artist_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
             try:
                 # STRATEGY 1: Direct Last.fm artist search
                 print(f"  🔍 Searching Last.fm artist: '{artist_query}'")
+                self._count_call('artist.search')
                 search_results = self.lastfm.search_for_artist(artist_query)
                 matches = search_results.get_next_page() if hasattr(search_results, 'get_next_page') else list(search_results)
                 
@@ -57,7 +183,8 @@ class RecommendationEngine:
                     corrected_name = best_match.name if hasattr(best_match, 'name') else str(best_match)
                     
                     # Cache and return
-                    self._artist_cache[cache_key] = corrected_name
+                    self._artist_cache.set(cache_key, corrected_name)
+                    self._artist_index.add(corrected_name)
                     
                     if corrected_name.lower() != artist_query.lower():
                         print(f"  ✓ Last.fm corrected: '{artist_query}' → '{corrected_name}'")
@@ -69,6 +196,7 @@ class RecommendationEngine:
                 # STRATEGY 2: If artist search fails, try track search
                 # (sometimes people type artist names that appear in track results)
                 print(f"  🔍 Trying track search for: '{artist_query}'")
+                self._count_call('track.search')
                 track_search = self.lastfm.search_for_track('', artist_query)
                 track_matches = track_search.get_next_page() if hasattr(track_search, 'get_next_page') else list(track_search)
                 
@@ -81,7 +209,8 @@ class RecommendationEngine:
                         
                         # Check if this artist name is similar to query
                         if self._is_similar(artist_query.lower(), artist_name.lower()):
-                            self._artist_cache[cache_key] = artist_name
+                            self._artist_cache.set(cache_key, artist_name)
+                            self._artist_index.add(artist_name)
                             print(f"  ✓ Found via track: '{artist_query}' → '{artist_name}'")
                             return artist_name
                 
@@ -94,32 +223,24 @@ class RecommendationEngine:
             except Exception as e:
                 print(f"  ⚠️  Search error for '{artist_query}': {e}")
             
-            # FALLBACK: Return original
+            # FALLBACK: Return original, remembered only briefly so a typo
+            # is retried later instead of pinning a permanent entry
             print(f"  ℹ️  No match found, using original: '{artist_query}'")
-            self._artist_cache[cache_key] = artist_query
+            self._artist_cache.set(cache_key, artist_query, ttl=Config.NEGATIVE_CACHE_TTL, negative=True)
             return artist_query
         
     def _is_similar(self, str1: str, str2: str, threshold: float = 0.6) -> bool:
-        """Check if two strings are similar using simple ratio"""
-        if str1 == str2:
-            return True
+        """Check if two strings are similar using normalized edit distance"""
+        str1 = ArtistIndex.normalize(str1)
+        str2 = ArtistIndex.normalize(str2)
+        if not str1 or not str2:
+            return False
         
         # Check if one contains the other
         if str1 in str2 or str2 in str1:
             return True
         
-        # Simple character overlap ratio
-        set1 = set(str1.replace(' ', ''))
-        set2 = set(str2.replace(' ', ''))
-        
-        if not set1 or not set2:
-            return False
-        
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
-        
-        ratio = intersection / union if union > 0 else 0
-        return ratio >= threshold
+        return ArtistIndex.similarity(str1, str2) >= threshold
     
     def _clean_artist_query(self, query: str) -> str:
         """
@@ -174,12 +295,18 @@ class RecommendationEngine:
         
         return {'name': song_str, 'artist': ''}
     
-    def track_to_song(self, track, skip_youtube: bool = False) -> Song:
-        """Convert Last.fm track to Song"""
+    def track_to_song(self, track, skip_youtube: bool = False, playcount: Optional[int] = None,
+                      fetch_playcount: Optional[bool] = None, interactive: bool = False) -> Song:
+        """
+        Convert Last.fm track to Song.
+        `playcount` is taken from the chart response when the caller has it;
+        otherwise track.getInfo is only requested when `fetch_playcount` is set
+        (by default only when Config.LAZY_PLAYCOUNT is off).
+        `interactive` gives the YouTube lookup priority on the API quota.
+        """
         title = ""
         artist_name = ""
         url = None
-        playcount = None
         
         try:
             title = track.title if hasattr(track, 'title') else str(track)
@@ -193,25 +320,32 @@ class RecommendationEngine:
         except Exception:
             artist_name = ""
         
+        if artist_name:
+            self._artist_index.add(artist_name)
+        
         try:
             if hasattr(track, 'get_url'):
                 url = track.get_url()
         except Exception:
             pass
         
-        try:
-            if hasattr(track, 'get_playcount'):
-                playcount = track.get_playcount()
-        except Exception:
-            pass
+        if fetch_playcount is None:
+            fetch_playcount = not Config.LAZY_PLAYCOUNT
+        if not playcount and fetch_playcount and title and artist_name:
+            playcount = self._get_playcount(track, artist_name, title)
         
         youtube_id = None
         if not skip_youtube and title and artist_name:
             try:
-                youtube_id = music_player.get_youtube_id(f"{artist_name} {title}")
+                youtube_id = music_player.get_youtube_id(f"{artist_name} {title}", interactive=interactive)
             except Exception:
                 youtube_id = None
         
+        return self._build_song(title, artist_name, url, youtube_id, playcount)
+    
+    @staticmethod
+    def _build_song(title: str, artist_name: str, url: Optional[str] = None,
+                    youtube_id: Optional[str] = None, playcount: Optional[int] = None) -> Song:
         song_id = f"{artist_name}_{title}".replace(" ", "_").lower()[:50]
         
         return Song(
@@ -229,90 +363,213 @@ class RecommendationEngine:
             audio_features={}
         )
     
+    def _song_from_record(self, record: Dict) -> Song:
+        return self._build_song(record['name'], record['artist'], record['lastfm_url'],
+                                record['youtube_id'], record['playcount'])
+    
+    def _learn_track_tags(self, artist: str, title: str, tags: List[str]):
+        """Called for every track.getTopTags answer: feeds the similarity index and the catalog"""
+        self._similarity.add_track(artist, title, tags)
+        self._catalog_write(self._catalog.put_track_tags, artist, title, tags)
+    
+    def _catalog_write(self, write, *args):
+        """Record in the catalog; a failed write must never fail the request"""
+        try:
+            write(*args)
+        except sqlite3.Error as e:
+            print(f"⚠️  Catalog write failed: {e}")
+    
+    @staticmethod
+    def _unpack_chart_item(item):
+        """Split a pylast TopItem/SimilarItem into (track, weight)"""
+        if isinstance(item, (list, tuple)):
+            return item[0], (item[1] if len(item) > 1 else None)
+        return item, None
+    
+    def _count_call(self, method: str):
+        with self._calls_lock:
+            self._upstream_calls[method] += 1
+    
+    def _get_playcount(self, track, artist_name: str, title: str) -> Optional[int]:
+        """Playcount via track.getInfo, cached per track"""
+        cache_key = f"{artist_name}_{title}".lower()
+        cached = self._playcount_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        return self._playcount_flight.do(cache_key, self._fetch_playcount, track, artist_name, title, cache_key)
+    
+    def _fetch_playcount(self, track, artist_name: str, title: str, cache_key: str) -> Optional[int]:
+        stored = self._catalog.get_playcount(artist_name, title, max_age=Config.TRACK_CACHE_TTL)
+        if stored is not None:
+            self._playcount_cache.set(cache_key, stored)
+            return stored
+        
+        try:
+            if not hasattr(track, 'get_playcount'):
+                return None
+            self._count_call('track.getInfo')
+            playcount = int(track.get_playcount() or 0)
+        except Exception:
+            return self._catalog.get_playcount(artist_name, title)
+        
+        self._playcount_cache.set(cache_key, playcount)
+        self._catalog_write(self._catalog.set_playcount, artist_name, title, playcount)
+        return playcount
+    
+    def ensure_playcounts(self, songs: List[Song]):
+        """Fill in missing playcounts, fetching track info in parallel only for these songs"""
+        missing = [song for song in songs if song.playcount is None and song.name and song.artist]
+        if not missing or not self.lastfm:
+            return
+        
+        def fill(song: Song):
+            track = self.lastfm.get_track(song.artist, song.name)
+            playcount = self._get_playcount(track, song.artist, song.name)
+            if playcount:
+                song.playcount = playcount
+        
+        if Config.CONCURRENT_RECOMMENDATIONS:
+            list(self._executor.map(fill, missing))
+        else:
+            for song in missing:
+                fill(song)
+    
+    def _mood_mask(self, tracks: List, tags_by_track: Dict[str, List[str]], mood: str):
+        """Keep-mask over `tracks` for the mood filter, scored in one batch by the mood model"""
+        tag_lists = [tags_by_track.get(TrackTagService.key_for(track), []) for track in tracks]
+        titles = [track.title if hasattr(track, 'title') else str(track) for track in tracks]
+        return mood_model.mood_mask(tag_lists, titles, mood)
+    
+    def _cached_lookup(self, method: str, args: tuple, limit: int, fetch) -> List[Song]:
+        """
+        Serve a Last.fm list lookup through the response cache.
+        Stale entries are returned at once and refreshed in the background.
+        Errors from `fetch` propagate, so failed lookups are never cached.
+        """
+        songs, state = self._response_cache.get(method, args, limit)
+        if state == 'stale':
+            self._refresh_in_background(method, args, limit, fetch)
+        if songs is None:
+            key = ResponseCache.make_key(method, args) + (limit,)
+            songs = self._lookup_flight.do(key, self._fetch_and_store, method, args, limit, fetch)
+        return [song.model_copy() for song in songs]
+    
+    def _fetch_and_store(self, method: str, args: tuple, limit: int, fetch) -> List[Song]:
+        songs, state = self._response_cache.get(method, args, limit)
+        if state != 'fresh':
+            songs = fetch(*args, limit)
+            self._response_cache.put(method, args, limit, songs)
+        return songs
+    
+    def _refresh_in_background(self, method: str, args: tuple, limit: int, fetch):
+        key = ResponseCache.make_key(method, args)
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        refresh_limit = max(limit, self._response_cache.cached_limit(method, args))
+        
+        def refresh():
+            try:
+                self._response_cache.put(method, args, refresh_limit, fetch(*args, refresh_limit))
+            except Exception as e:
+                print(f"  ⚠️  Background refresh failed for {key}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        self._executor.submit(refresh)
+    
     def get_top_tracks_by_tag(self, tag: str, limit: int = 20) -> List[Song]:
         """Get top tracks by tag"""
-        songs = []
         if not self.lastfm:
-            return songs
+            return []
+        
+        try:
+            return self._cached_lookup('tag.getTopTracks', (tag,), limit, self._fetch_top_tracks_by_tag)
+        except Exception as e:
+            print(f"Error for tag '{tag}': {e}")
+            return []
+    
+    def _fetch_top_tracks_by_tag(self, tag: str, limit: int) -> List[Song]:
+        records = self._catalog.get_tag_chart(tag, limit, max_age=Config.LASTFM_CACHE_TTLS['tag.getTopTracks'])
+        if records is not None:
+            return [self._song_from_record(record) for record in records]
         
+        songs = []
         try:
             tag_obj = self.lastfm.get_tag(tag)
+            self._count_call('tag.getTopTracks')
             top_tracks = tag_obj.get_top_tracks(limit=limit)
-            
-            for track_info in top_tracks:
-                try:
-                    track_obj = track_info[0] if isinstance(track_info, (list, tuple)) else track_info
-                    song = self.track_to_song(track_obj, skip_youtube=True)
-                    songs.append(song)
-                except Exception:
-                    continue
         except Exception as e:
-            print(f"Error for tag '{tag}': {e}")
+            records = self._catalog.get_tag_chart(tag, limit, outage=True)
+            if not records:
+                raise
+            print(f"  ⚠️  Last.fm unavailable for tag '{tag}' ({e}), serving {len(records)} catalog tracks")
+            return [self._song_from_record(record) for record in records]
         
+        for track_info in top_tracks:
+            try:
+                track_obj, weight = self._unpack_chart_item(track_info)
+                song = self.track_to_song(track_obj, skip_youtube=True, playcount=weight)
+                songs.append(song)
+            except Exception:
+                continue
+        
+        self._catalog_write(self._catalog.put_tag_chart, tag, songs, limit)
         return songs
     
     def get_artist_top_tracks(self, artist_name: str, limit: int = 10, mood_filter: Optional[str] = None) -> List[Song]:
         """Get artist's top tracks with fuzzy matching"""
-        songs = []
         if not self.lastfm:
-            return songs
+            return []
         
         # CRITICAL: Apply fuzzy matching
         corrected_artist = self.fuzzy_match_artist(artist_name)
         
         try:
-            print(f"  🎤 Fetching tracks for: {corrected_artist}")
-            if mood_filter:
-                print(f"     🎭 Filtering by mood: {mood_filter}")
-            
-            artist = self.lastfm.get_artist(corrected_artist)
-            fetch_limit = limit * 3 if mood_filter else limit
-            top_tracks = artist.get_top_tracks()[:fetch_limit]
-            
-            for track_info in top_tracks:
-                if len(songs) >= limit:
-                    break
-                    
-                try:
-                    track_obj = track_info[0] if isinstance(track_info, (list, tuple)) else track_info
-                    
-                    if mood_filter:
-                        try:
-                            track_tags = track_obj.get_tags() if hasattr(track_obj, 'get_tags') else []
-                            track_tag_names = [tag.name.lower() if hasattr(tag, 'name') else str(tag).lower() for tag in track_tags]
-                            mood_tags = [tag.lower() for tag in MoodDetector.get_mood_tags(mood_filter)]
-                            matches_mood = any(mood_tag in track_tag_names for mood_tag in mood_tags)
-                            
-                            track_title = track_obj.title.lower() if hasattr(track_obj, 'title') else str(track_obj).lower()
-                            mood_keywords = {
-                                'happy': ['happy', 'joy', 'celebration', 'party', 'dance', 'fun', 'upbeat'],
-                                'sad': ['sad', 'cry', 'tears', 'heartbreak', 'alone', 'lonely', 'miss'],
-                                'energetic': ['energy', 'power', 'rock', 'pump', 'workout', 'beast'],
-                                'calm': ['calm', 'peace', 'relax', 'soft', 'slow', 'soothing'],
-                                'romantic': ['love', 'romantic', 'heart', 'pyaar', 'ishq', 'mohabbat'],
-                                'intense': ['intense', 'powerful', 'dramatic', 'epic']
-                            }
-                            
-                            keyword_match = False
-                            if mood_filter in mood_keywords:
-                                keyword_match = any(keyword in track_title for keyword in mood_keywords[mood_filter])
-                            
-                            if track_tags and not matches_mood and not keyword_match:
-                                print(f"     ⊘ Skipped (mood mismatch): {track_obj.title}")
-                                continue
-                        except Exception:
-                            pass
-                    
-                    song = self.track_to_song(track_obj, skip_youtube=True)
-                    songs.append(song)
-                    print(f"     ✓ Added: {song.name} by {song.artist}")
-                except Exception as e:
-                    print(f"     ✗ Error converting track: {e}")
-                    continue
-            
+            songs = self._cached_lookup(
+                'artist.getTopTracks', (corrected_artist, mood_filter), limit, self._fetch_artist_top_tracks
+            )
             print(f"  ✓ Got {len(songs)} tracks from {corrected_artist}" + (f" (mood-filtered: {mood_filter})" if mood_filter else ""))
+            return songs
         except Exception as e:
             print(f"  ✗ Error getting tracks for {corrected_artist}: {e}")
+            return []
+    
+    def _fetch_artist_top_tracks(self, corrected_artist: str, mood_filter: Optional[str], limit: int) -> List[Song]:
+        songs = []
+        print(f"  🎤 Fetching tracks for: {corrected_artist}")
+        if mood_filter:
+            print(f"     🎭 Filtering by mood: {mood_filter}")
+        
+        artist = self.lastfm.get_artist(corrected_artist)
+        fetch_limit = limit * 3 if mood_filter else limit
+        self._count_call('artist.getTopTracks')
+        top_tracks = artist.get_top_tracks()[:fetch_limit]
+        
+        candidates = [self._unpack_chart_item(track_info) for track_info in top_tracks]
+        if mood_filter:
+            tracks = [t for t, _ in candidates]
+            keep = self._mood_mask(tracks, self._track_tags.prefetch(tracks), mood_filter)
+        
+        for index, (track_obj, weight) in enumerate(candidates):
+            if len(songs) >= limit:
+                break
+                
+            try:
+                if mood_filter and not keep[index]:
+                    print(f"     ⊘ Skipped (mood mismatch): {track_obj.title}")
+                    continue
+                
+                # Artist chart weights are the tracks' playcounts
+                song = self.track_to_song(track_obj, skip_youtube=True, playcount=weight)
+                songs.append(song)
+                print(f"     ✓ Added: {song.name} by {song.artist}")
+            except Exception as e:
+                print(f"     ✗ Error converting track: {e}")
+                continue
         
         return songs
     
@@ -345,58 +602,71 @@ class RecommendationEngine:
         if not self.lastfm:
             return None
         
+        corrected_artist = None
         try:
             # Apply fuzzy matching to artist
             corrected_artist = self.fuzzy_match_artist(artist) if artist else None
             
-            cache_key = f"{corrected_artist}_{name}".lower() if corrected_artist else name.lower()
+            cache_key = track_key(corrected_artist or '', name)
             
-            if cache_key in self._track_cache:
-                cached_song = self._track_cache[cache_key]
+            cached_song = self._track_cache.get(cache_key)
+            if cached_song is not None:
                 if cached_song.youtube_id:
                     print(f"✓ Cache hit: {name} by {corrected_artist}")
                     return cached_song
                 else:
                     print(f"⚠️  Cache hit but no YouTube ID, re-fetching...")
             
+            record = self._catalog.get_track(name, corrected_artist, max_age=Config.TRACK_CACHE_TTL)
+            if record and record['youtube_id']:
+                song = self._song_from_record(record)
+                self._track_cache.set(cache_key, song)
+                print(f"✓ Catalog hit: {song.name} by {song.artist}")
+                return song
+            
             print(f"🔍 Searching: {name}" + (f" by {corrected_artist}" if corrected_artist else ""))
             
             # Try direct lookup
             if corrected_artist:
                 try:
                     track = self.lastfm.get_track(corrected_artist, name)
-                    song = self.track_to_song(track, skip_youtube=False)
+                    song = self.track_to_song(track, skip_youtube=False, fetch_playcount=True, interactive=True)
                     
                     if not song.youtube_id:
                         print(f"  ⚠️  No YouTube ID, fetching manually...")
-                        youtube_id = music_player.get_youtube_id(f"{corrected_artist} {name}")
+                        youtube_id = music_player.get_youtube_id(f"{corrected_artist} {name}", interactive=True)
                         if youtube_id:
                             song.youtube_id = youtube_id
                             song.preview_url = f"https://www.youtube.com/watch?v={youtube_id}"
                             print(f"  ✓ YouTube ID added: {youtube_id}")
                     
-                    self._track_cache[cache_key] = song
+                    self._track_cache.set(cache_key, song)
+                    self._catalog_write(self._catalog.put_track, song.name, song.artist, song.lastfm_url,
+                                        song.playcount, song.youtube_id)
                     print(f"✓ Found: {song.name} by {song.artist}")
                     return song
                 except Exception as e:
                     print(f"  Direct lookup failed: {e}")
             
             # Fallback search
+            self._count_call('track.search')
             search_results = self.lastfm.search_for_track(corrected_artist or '', name)
             matches = search_results.get_next_page() if hasattr(search_results, 'get_next_page') else list(search_results)
             
             if matches:
                 first_match = matches[0]
-                song = self.track_to_song(first_match, skip_youtube=False)
+                song = self.track_to_song(first_match, skip_youtube=False, fetch_playcount=True, interactive=True)
                 
                 if not song.youtube_id:
                     search_query = f"{song.artist} {song.name}" if song.artist else song.name
-                    youtube_id = music_player.get_youtube_id(search_query)
+                    youtube_id = music_player.get_youtube_id(search_query, interactive=True)
                     if youtube_id:
                         song.youtube_id = youtube_id
                         song.preview_url = f"https://www.youtube.com/watch?v={youtube_id}"
                 
-                self._track_cache[cache_key] = song
+                self._track_cache.set(cache_key, song)
+                self._catalog_write(self._catalog.put_track, song.name, song.artist, song.lastfm_url,
+                                    song.playcount, song.youtube_id)
                 print(f"✓ Found via search: {song.name} by {song.artist}")
                 return song
             
@@ -405,6 +675,11 @@ class RecommendationEngine:
             
         except Exception as e:
             print(f"✗ Error searching '{name}': {e}")
+            # Last.fm may be down: any catalog copy, however old, beats nothing
+            record = self._catalog.get_track(name, corrected_artist, outage=True)
+            if record:
+                print(f"  ⚠️  Serving catalog copy of {record['name']} by {record['artist']}")
+                return self._song_from_record(record)
             return None
     
     def get_similar_tracks(self, track_name: str, artist: str, limit: int = 5, mood_filter: Optional[str] = None) -> List[Song]:
@@ -415,58 +690,106 @@ class RecommendationEngine:
         # Apply fuzzy matching
         corrected_artist = self.fuzzy_match_artist(artist)
         
-        songs = []
         try:
-            print(f"  🔍 Finding similar to: '{track_name}' by {corrected_artist}")
-            track = self.lastfm.get_track(corrected_artist, track_name)
-            fetch_limit = limit * 3 if mood_filter else limit
-            similar = track.get_similar(limit=fetch_limit)
-            
-            for similar_track in similar:
-                if len(songs) >= limit:
-                    break
-                    
-                try:
-                    track_obj = similar_track[0] if isinstance(similar_track, (list, tuple)) else similar_track
-                    
-                    if mood_filter:
-                        try:
-                            track_tags = track_obj.get_tags() if hasattr(track_obj, 'get_tags') else []
-                            track_tag_names = [tag.name.lower() if hasattr(tag, 'name') else str(tag).lower() for tag in track_tags]
-                            mood_tags = [tag.lower() for tag in MoodDetector.get_mood_tags(mood_filter)]
-                            matches_mood = any(mood_tag in track_tag_names for mood_tag in mood_tags)
-                            
-                            track_title = track_obj.title.lower() if hasattr(track_obj, 'title') else str(track_obj).lower()
-                            mood_keywords = {
-                                'happy': ['happy', 'joy', 'celebration', 'party', 'dance'],
-                                'sad': ['sad', 'cry', 'tears', 'heartbreak', 'alone'],
-                                'energetic': ['energy', 'power', 'rock', 'pump'],
-                                'calm': ['calm', 'peace', 'relax', 'soft'],
-                                'romantic': ['love', 'romantic', 'heart', 'pyaar'],
-                                'intense': ['intense', 'powerful', 'dramatic']
-                            }
-                            
-                            keyword_match = False
-                            if mood_filter in mood_keywords:
-                                keyword_match = any(keyword in track_title for keyword in mood_keywords[mood_filter])
-                            
-                            if track_tags and not matches_mood and not keyword_match:
-                                continue
-                        except Exception:
-                            pass
-                    
-                    song = self.track_to_song(track_obj, skip_youtube=True)
-                    songs.append(song)
-                    print(f"     ✓ Similar: {song.name}")
-                except Exception:
-                    continue
-                    
+            songs = self._cached_lookup(
+                'track.getSimilar', (corrected_artist, track_name, mood_filter), limit, self._fetch_similar_tracks
+            )
             print(f"  ✓ Found {len(songs)} similar tracks")
+            return songs
         except Exception as e:
             print(f"  ✗ Error getting similar tracks: {e}")
+            return []
+    
+    def _fetch_similar_tracks(self, corrected_artist: str, track_name: str, mood_filter: Optional[str], limit: int) -> List[Song]:
+        songs = []
+        print(f"  🔍 Finding similar to: '{track_name}' by {corrected_artist}")
+        fetch_limit = limit * 3 if mood_filter else limit
+        candidates = self._similar_candidates(corrected_artist, track_name, fetch_limit)
+        if mood_filter:
+            keep = self._mood_mask(candidates, self._track_tags.prefetch(candidates), mood_filter)
+        
+        for index, track_obj in enumerate(candidates):
+            if len(songs) >= limit:
+                break
+                
+            try:
+                if mood_filter and not keep[index]:
+                    continue
+                
+                song = self.track_to_song(track_obj, skip_youtube=True)
+                songs.append(song)
+                print(f"     ✓ Similar: {song.name}")
+            except Exception:
+                continue
         
         return songs
     
+    def _similar_candidates(self, corrected_artist: str, track_name: str, limit: int) -> List:
+        """Unfiltered similar tracks, from the catalog when fresh, else from Last.fm"""
+        records = self._catalog.get_similar(
+            corrected_artist, track_name, limit, max_age=Config.LASTFM_CACHE_TTLS['track.getSimilar']
+        )
+        if records is None:
+            try:
+                track = self.lastfm.get_track(corrected_artist, track_name)
+                self._count_call('track.getSimilar')
+                similar = track.get_similar(limit=limit)
+            except Exception as e:
+                records = self._catalog.get_similar(corrected_artist, track_name, limit, outage=True)
+                if not records:
+                    raise
+                print(f"  ⚠️  Last.fm unavailable ({e}), serving {len(records)} similar tracks from the catalog")
+            else:
+                candidates = [self._unpack_chart_item(similar_track)[0] for similar_track in similar]
+                self._catalog_write(
+                    self._catalog.put_similar, corrected_artist, track_name,
+                    [dict(zip(('artist', 'name'), TrackTagService.artist_title(t))) for t in candidates], limit
+                )
+                return candidates
+        
+        # Stand-in pylast tracks (no request is made until a getter is called)
+        return [self.lastfm.get_track(record['artist'], record['name']) for record in records]
+    
+    def get_similar_songs(self, track_name: str, artist: str, limit: int = 10,
+                          mood_filter: Optional[str] = None) -> Dict:
+        """
+        Similar songs from the local tag-similarity index first; Last.fm
+        track.getSimilar only tops up the list when too few local matches
+        clear SIMILARITY_MIN_SCORE. Tags of the Last.fm additions are then
+        learned in the background so the next lookup can stay local.
+        """
+        seed_tags = self._similarity.tags_for(artist, track_name)
+        if seed_tags is None and self.lastfm:
+            seed_tags = self._track_tags.get_tags(self.lastfm.get_track(artist, track_name))
+        
+        local = self._similarity.most_similar(
+            seed_tags or [], k=limit, mood=mood_filter, exclude=(artist, track_name),
+            min_score=Config.SIMILARITY_MIN_SCORE
+        )
+        songs = []
+        for similar_artist, similar_title, _ in local:
+            record = self._catalog.get_track(similar_title, similar_artist)
+            songs.append(self._song_from_record(record) if record else self._build_song(similar_title, similar_artist))
+        sources = {'local': len(songs), 'lastfm': 0}
+        
+        if len(songs) < limit and self.lastfm:
+            seen = {(song.artist.lower(), song.name.lower()) for song in songs}
+            added = []
+            for song in self.get_similar_tracks(track_name, artist, limit=limit, mood_filter=mood_filter):
+                if len(songs) >= limit:
+                    break
+                if (song.artist.lower(), song.name.lower()) not in seen:
+                    songs.append(song)
+                    added.append(song)
+            sources['lastfm'] = len(added)
+            if added:
+                self._executor.submit(
+                    self._track_tags.prefetch, [self.lastfm.get_track(song.artist, song.name) for song in added]
+                )
+        
+        print(f"  ✓ {sources['local']} local + {sources['lastfm']} Last.fm similar songs for '{track_name}'")
+        return {'songs': songs, 'sources': sources}
+    
     def add_favorite_song(self, user_id: str, song_name: str, artist: str) -> Dict:
         """Add song to favorites"""
         favorite = {
@@ -502,6 +825,31 @@ class RecommendationEngine:
         removed = original_count > len(self.user_favorites[user_id])
         return {"removed": removed, "remaining": len(self.user_favorites[user_id])}
     
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss counters and sizes of the engine caches"""
+        return {
+            "artist_index": self._artist_index.get_stats(),
+            "tracks": self._track_cache.get_stats(),
+            "playcounts": self._playcount_cache.get_stats(),
+            "track_tags": self._track_tags.get_stats(),
+            "catalog": self._catalog.get_stats(),
+            "similarity_index": self._similarity.get_stats(),
+            "artists": self._artist_cache.get_stats(),
+            "lastfm_responses": self._response_cache.get_stats(),
+            "background_refreshes": len(self._refreshing),
+            "mood_pools": self._mood_pools.get_stats(),
+            "single_flight": [
+                self._lookup_flight.get_stats(),
+                self._artist_flight.get_stats(),
+                self._playcount_flight.get_stats()
+            ],
+            "upstream_calls": dict(self._upstream_calls)
+        }
+    
+    def flush_caches(self):
+        """Persist disk-backed caches (called on shutdown)"""
+        self._track_tags.close()
+    
     def get_user_history(self, user_id: str, limit: int = 50) -> Dict:
         """Get listening history"""
         history = self.user_history[user_id][-limit:]
@@ -511,14 +859,70 @@ class RecommendationEngine:
             "history": history
         }
     
-    def get_personalized_recommendations(self, request: PersonalizedRecommendationRequest) -> Dict:
+    def _similar_for_favorite(self, fav_song: str, default_artists: List[str], limit: int, mood: str):
+        """Parse a favourite song string and fetch tracks similar to it"""
+        parsed = self.parse_song_string(fav_song, default_artists)
+        if not parsed['artist']:
+            return parsed, []
+        
+        print(f"  ❤️  Finding similar to: '{parsed['name']}' by {parsed['artist']}")
+        return parsed, self.get_similar_tracks(parsed['name'], parsed['artist'], limit=limit, mood_filter=mood)
+    
+    def _add_fallback_fetches(self, plan: _FetchPlan, language_tag: str, mood_tags: List[str], remaining: int):
+        """Register the tag chart lookups used to fill the fallback category"""
+        plan.add(('fallback_language', language_tag), self.get_top_tracks_by_tag, language_tag, limit=remaining * 3)
+        for mood_tag in mood_tags:
+            plan.add(('fallback_mood', mood_tag), self.get_top_tracks_by_tag, mood_tag, limit=remaining * 2)
+    
+    def resolve_youtube_id(self, artist: str, title: str) -> Optional[str]:
+        """Resolve a YouTube ID for one track and record it in the catalog"""
+        try:
+            youtube_id = music_player.get_youtube_id(f"{artist} {title}")
+        except Exception:
+            return None
+        if youtube_id:
+            self._catalog_write(self._catalog.set_youtube_id, artist, title, youtube_id)
+        return youtube_id
+    
+    def _attach_youtube_id(self, song: Song) -> bool:
+        """Resolve and attach a YouTube ID to the song in place"""
+        youtube_id = self.resolve_youtube_id(song.artist, song.name)
+        if youtube_id:
+            song.youtube_id = youtube_id
+            song.preview_url = f"https://www.youtube.com/watch?v={youtube_id}"
+            song.resolve_handle = None
+            return True
+        return False
+    
+    @staticmethod
+    def _defer_youtube_ids(songs: List[Song]) -> int:
         """
-        Personalized recommendations with FUZZY MATCHING:
-        - 8: Artist + Mood + Language
-        - 4: Language + Mood
-        - 4: Similar + Mood
-        - Rest: Fallback
+        Inline already-cached YouTube IDs and give every other song a resolve
+        handle for /youtube/resolve instead of searching now. Returns the number
+        of songs left unresolved.
         """
+        deferred = 0
+        for song in songs:
+            if song.youtube_id or not (song.name and song.artist):
+                continue
+            youtube_id = music_player.get_cached_youtube_id(f"{song.artist} {song.name}")
+            if youtube_id:
+                song.youtube_id = youtube_id
+                song.preview_url = f"https://www.youtube.com/watch?v={youtube_id}"
+            else:
+                song.resolve_handle = music_player.make_resolve_handle(song.artist, song.name)
+                deferred += 1
+        return deferred
+    
+    # Categories filled in order by get_personalized_recommendations, with their targets
+    CATEGORY_TARGETS = {
+        'artist_based': 8,
+        'language_mood': 4,
+        'similar_tracks': 4
+    }
+    
+    def _start_personalized(self, request: PersonalizedRecommendationRequest) -> Dict:
+        """Validate the request, resolve favourite artists and register every upstream lookup"""
         if not self.lastfm:
             raise HTTPException(status_code=503, detail="Last.fm not configured")
         
@@ -553,10 +957,16 @@ class RecommendationEngine:
         if isinstance(favorite_singers, str):
             favorite_singers = [s.strip() for s in favorite_singers.split(',') if s.strip()]
         
+        concurrent = Config.CONCURRENT_RECOMMENDATIONS
+        plan = _FetchPlan(self._executor if concurrent else None)
+        
         # FUZZY MATCH ALL ARTISTS
+        favorite_singers = [s for s in favorite_singers if s]
+        for i, singer in enumerate(favorite_singers):
+            plan.add(('singer', i), self.fuzzy_match_artist, singer)
         corrected_singers = []
-        for singer in favorite_singers:
-            corrected = self.fuzzy_match_artist(singer)
+        for i, singer in enumerate(favorite_singers):
+            corrected = plan.get(('singer', i), singer)
             if corrected:
                 corrected_singers.append(corrected)
         
@@ -569,184 +979,201 @@ class RecommendationEngine:
         print(f"Favorite Singers (corrected): {corrected_singers}")
         print(f"Favorite Songs: {favorite_songs}")
         print(f"Target: {request.limit} songs")
+        print(f"Mode: {'concurrent' if concurrent else 'sequential'}")
         print(f"{'='*60}\n")
         
-        all_songs = []
-        added = set()
-        
         mood_tags = MoodDetector.get_mood_tags(mood)
         language_tag = self.LANGUAGE_TO_TAG.get(language, 'pop')
         
         print(f"🏷️  Tags - Language: '{language_tag}', Mood: {mood_tags}\n")
         
-        cat1_count = 0
-        cat2_count = 0
-        cat3_count = 0
-        cat4_count = 0
+        # Register every independent lookup up front. In concurrent mode they all
+        # start now; in sequential mode each runs when its category first needs it.
+        if corrected_singers:
+            songs_per_artist = max(3, self.CATEGORY_TARGETS['artist_based'] // len(corrected_singers[:3]))
+            for i, singer in enumerate(corrected_singers[:3]):
+                plan.add(('artist', i), self.get_artist_top_tracks, singer,
+                         limit=songs_per_artist * 2, mood_filter=mood)
         
-        TARGET_CAT1 = 8
-        TARGET_CAT2 = 4
-        TARGET_CAT3 = 4
+        plan.add(('language', language_tag), self.get_top_tracks_by_tag, language_tag, limit=20)
+        for mood_tag in mood_tags[:2]:
+            plan.add(('mood', mood_tag), self.get_top_tracks_by_tag, mood_tag, limit=15)
         
-        # CATEGORY 1: Artist + Mood + Language
-        if corrected_singers:
-            print(f"📌 CATEGORY 1: Getting {TARGET_CAT1} songs (Artist + Mood + Language)")
-            songs_per_artist = max(3, TARGET_CAT1 // len(corrected_singers[:3]))
+        if favorite_songs:
+            songs_per_favorite = max(2, self.CATEGORY_TARGETS['similar_tracks'] // len(favorite_songs[:3]))
+            for i, fav_song in enumerate(favorite_songs[:3]):
+                plan.add(('similar', i), self._similar_for_favorite, fav_song,
+                         corrected_singers, songs_per_favorite * 2, mood)
+        
+        # The fallback size is only known after merging, so concurrent mode
+        # prefetches the largest pool it could need and trims it later
+        if concurrent:
+            self._add_fallback_fetches(plan, language_tag, mood_tags, request.limit)
+        
+        return {
+            'request': request,
+            'mood': mood,
+            'language': language,
+            'concurrent': concurrent,
+            'plan': plan,
+            'favorite_songs': favorite_songs,
+            'corrected_singers': corrected_singers,
+            'mood_tags': mood_tags,
+            'language_tag': language_tag,
+            'songs': [],
+            'added': set(),
+            'counts': {'artist_based': 0, 'language_mood': 0, 'similar_tracks': 0, 'fallback': 0}
+        }
+    
+    @staticmethod
+    def _add_unique(run: Dict, song: Song, category: str) -> bool:
+        """Add a song to the run unless an earlier category already has it"""
+        key = f"{song.name}-{song.artist}".lower()
+        if key in run['added']:
+            return False
+        run['added'].add(key)
+        run['songs'].append(song)
+        run['counts'][category] += 1
+        return True
+    
+    def _collect_artist_based(self, run: Dict) -> List[Song]:
+        """CATEGORY 1: Artist + Mood + Language"""
+        target = self.CATEGORY_TARGETS['artist_based']
+        collected = []
+        if not run['corrected_singers']:
+            print(f"⏭️  CATEGORY 1: Skipped (no artists)\n")
+            return collected
+        
+        print(f"📌 CATEGORY 1: Getting {target} songs (Artist + Mood + Language)")
+        for i, singer in enumerate(run['corrected_singers'][:3]):
+            if run['counts']['artist_based'] >= target:
+                break
             
-            for singer in corrected_singers[:3]:
-                if cat1_count >= TARGET_CAT1:
+            print(f"  🎤 Artist: {singer}")
+            for song in run['plan'].get(('artist', i), []):
+                if run['counts']['artist_based'] >= target:
                     break
-                    
-                print(f"  🎤 Artist: {singer}")
-                artist_songs = self.get_artist_top_tracks(
-                    singer, 
-                    limit=songs_per_artist * 2,
-                    mood_filter=mood
-                )
-                
-                for song in artist_songs:
-                    if cat1_count >= TARGET_CAT1:
-                        break
-                    key = f"{song.name}-{song.artist}".lower()
-                    if key not in added:
-                        added.add(key)
-                        all_songs.append(song)
-                        cat1_count += 1
-                        print(f"     ✓ Added: {song.name}")
-            
-            print(f"  ✅ Category 1: {cat1_count}/{TARGET_CAT1} songs\n")
-        else:
-            print(f"⏭️  CATEGORY 1: Skipped (no artists)\n")
+                if self._add_unique(run, song, 'artist_based'):
+                    collected.append(song)
+                    print(f"     ✓ Added: {song.name}")
         
-        # CATEGORY 2: Language + Mood
-        print(f"📌 CATEGORY 2: Getting {TARGET_CAT2} songs (Language + Mood)")
+        print(f"  ✅ Category 1: {run['counts']['artist_based']}/{target} songs\n")
+        return collected
+    
+    def _collect_language_mood(self, run: Dict) -> List[Song]:
+        """CATEGORY 2: Language + Mood"""
+        target = self.CATEGORY_TARGETS['language_mood']
+        print(f"📌 CATEGORY 2: Getting {target} songs (Language + Mood)")
         
         combined_pool = []
-        lang_songs = self.get_top_tracks_by_tag(language_tag, limit=20)
+        lang_songs = run['plan'].get(('language', run['language_tag']), [])
         combined_pool.extend(lang_songs)
-        print(f"  🌍 Retrieved {len(lang_songs)} {language} songs")
+        print(f"  🌍 Retrieved {len(lang_songs)} {run['language']} songs")
         
-        if mood_tags:
-            for mood_tag in mood_tags[:2]:
-                mood_songs = self.get_top_tracks_by_tag(mood_tag, limit=15)
-                combined_pool.extend(mood_songs)
-                print(f"  😊 Retrieved {len(mood_songs)} for '{mood_tag}'")
+        for mood_tag in run['mood_tags'][:2]:
+            mood_songs = run['plan'].get(('mood', mood_tag), [])
+            combined_pool.extend(mood_songs)
+            print(f"  😊 Retrieved {len(mood_songs)} for '{mood_tag}'")
         
+        collected = []
         for song in combined_pool:
-            if cat2_count >= TARGET_CAT2:
+            if run['counts']['language_mood'] >= target:
                 break
-            key = f"{song.name}-{song.artist}".lower()
-            if key not in added:
-                added.add(key)
-                all_songs.append(song)
-                cat2_count += 1
-        
-        print(f"  ✅ Category 2: {cat2_count}/{TARGET_CAT2} songs\n")
+            if self._add_unique(run, song, 'language_mood'):
+                collected.append(song)
         
-        # CATEGORY 3: Similar + Mood
-        if favorite_songs:
-            print(f"📌 CATEGORY 3: Getting {TARGET_CAT3} songs (Similar + Mood)")
-            songs_per_favorite = max(2, TARGET_CAT3 // len(favorite_songs[:3]))
-            
-            for fav_song in favorite_songs[:3]:
-                if cat3_count >= TARGET_CAT3:
-                    break
-                
-                # Parse with fuzzy matching
-                parsed = self.parse_song_string(fav_song, corrected_singers)
-                song_name = parsed['name']
-                artist_name = parsed['artist']
-                
-                if not artist_name:
-                    print(f"  ⚠️  Skipping '{song_name}' - no artist")
-                    continue
-                
-                print(f"  ❤️  Finding similar to: '{song_name}' by {artist_name}")
-                similar_songs = self.get_similar_tracks(
-                    song_name, 
-                    artist_name, 
-                    limit=songs_per_favorite * 2,
-                    mood_filter=mood
-                )
-                
-                for song in similar_songs:
-                    if cat3_count >= TARGET_CAT3:
-                        break
-                    key = f"{song.name}-{song.artist}".lower()
-                    if key not in added:
-                        added.add(key)
-                        all_songs.append(song)
-                        cat3_count += 1
-                        print(f"     ✓ Added: {song.name}")
-            
-            print(f"  ✅ Category 3: {cat3_count}/{TARGET_CAT3} songs\n")
-        else:
+        print(f"  ✅ Category 2: {run['counts']['language_mood']}/{target} songs\n")
+        return collected
+    
+    def _collect_similar(self, run: Dict) -> List[Song]:
+        """CATEGORY 3: Similar + Mood"""
+        target = self.CATEGORY_TARGETS['similar_tracks']
+        collected = []
+        if not run['favorite_songs']:
             print(f"⏭️  CATEGORY 3: Skipped (no favorite songs)\n")
+            return collected
         
-        # CATEGORY 4: Fallback
-        remaining = request.limit - len(all_songs)
-        
-        if remaining > 0:
-            print(f"📌 CATEGORY 4: FALLBACK - Need {remaining} more")
-            
-            fallback_pool = []
-            lang_fallback = self.get_top_tracks_by_tag(language_tag, limit=remaining * 3)
-            fallback_pool.extend(lang_fallback)
-            print(f"  🌍 Retrieved {len(lang_fallback)} {language} songs")
+        print(f"📌 CATEGORY 3: Getting {target} songs (Similar + Mood)")
+        for i, fav_song in enumerate(run['favorite_songs'][:3]):
+            if run['counts']['similar_tracks'] >= target:
+                break
             
-            if mood_tags:
-                for mood_tag in mood_tags:
-                    mood_fallback = self.get_top_tracks_by_tag(mood_tag, limit=remaining * 2)
-                    fallback_pool.extend(mood_fallback)
-                    print(f"  😊 Retrieved {len(mood_fallback)} for '{mood_tag}'")
+            parsed, similar_songs = run['plan'].get(('similar', i), ({'name': fav_song, 'artist': ''}, []))
+            if not parsed['artist']:
+                print(f"  ⚠️  Skipping '{parsed['name']}' - no artist")
+                continue
             
-            for song in fallback_pool:
-                if len(all_songs) >= request.limit:
+            print(f"  ❤️  Similar to: '{parsed['name']}' by {parsed['artist']}")
+            for song in similar_songs:
+                if run['counts']['similar_tracks'] >= target:
                     break
-                key = f"{song.name}-{song.artist}".lower()
-                if key not in added:
-                    added.add(key)
-                    all_songs.append(song)
-                    cat4_count += 1
-            
-            print(f"  ✅ Category 4: {cat4_count}/{remaining} songs\n")
+                if self._add_unique(run, song, 'similar_tracks'):
+                    collected.append(song)
+                    print(f"     ✓ Added: {song.name}")
         
-        all_songs.sort(key=lambda x: (x.playcount or 0), reverse=True)
-        final = all_songs[:request.limit]
+        print(f"  ✅ Category 3: {run['counts']['similar_tracks']}/{target} songs\n")
+        return collected
+    
+    def _collect_fallback(self, run: Dict) -> List[Song]:
+        """CATEGORY 4: Fallback up to the requested limit"""
+        limit = run['request'].limit
+        remaining = limit - len(run['songs'])
+        collected = []
+        if remaining <= 0:
+            return collected
+        
+        print(f"📌 CATEGORY 4: FALLBACK - Need {remaining} more")
+        plan = run['plan']
+        if not run['concurrent']:
+            self._add_fallback_fetches(plan, run['language_tag'], run['mood_tags'], remaining)
+        
+        fallback_pool = []
+        lang_fallback = plan.get(('fallback_language', run['language_tag']), [])[:remaining * 3]
+        fallback_pool.extend(lang_fallback)
+        print(f"  🌍 Retrieved {len(lang_fallback)} {run['language']} songs")
+        
+        for mood_tag in run['mood_tags']:
+            mood_fallback = plan.get(('fallback_mood', mood_tag), [])[:remaining * 2]
+            fallback_pool.extend(mood_fallback)
+            print(f"  😊 Retrieved {len(mood_fallback)} for '{mood_tag}'")
+        
+        for song in fallback_pool:
+            if len(run['songs']) >= limit:
+                break
+            if self._add_unique(run, song, 'fallback'):
+                collected.append(song)
+        
+        print(f"  ✅ Category 4: {run['counts']['fallback']}/{remaining} songs\n")
+        return collected
+    
+    def _rank_personalized(self, run: Dict) -> List[Song]:
+        """Rank the collected songs by playcount and trim to the limit"""
+        # Only the songs that made the cut need track info for ranking
+        self.ensure_playcounts(run['songs'])
+        run['songs'].sort(key=lambda x: (x.playcount or 0), reverse=True)
+        final = run['songs'][:run['request'].limit]
+        counts = run['counts']
         
         print(f"\n{'='*60}")
         print(f"✅ FINAL DISTRIBUTION")
         print(f"{'='*60}")
-        print(f"Total: {len(final)}/{request.limit}")
-        print(f"├─ Cat 1 (Artist+Mood+Lang): {cat1_count}")
-        print(f"├─ Cat 2 (Language+Mood): {cat2_count}")
-        print(f"├─ Cat 3 (Similar+Mood): {cat3_count}")
-        print(f"└─ Cat 4 (Fallback): {cat4_count}")
+        print(f"Total: {len(final)}/{run['request'].limit}")
+        print(f"├─ Cat 1 (Artist+Mood+Lang): {counts['artist_based']}")
+        print(f"├─ Cat 2 (Language+Mood): {counts['language_mood']}")
+        print(f"├─ Cat 3 (Similar+Mood): {counts['similar_tracks']}")
+        print(f"└─ Cat 4 (Fallback): {counts['fallback']}")
         print(f"{'='*60}\n")
-        
-        print("🎬 Fetching YouTube IDs...")
-        youtube_success = 0
-        for i, song in enumerate(final, 1):
-            if not song.youtube_id and song.name and song.artist:
-                try:
-                    youtube_id = music_player.get_youtube_id(f"{song.artist} {song.name}")
-                    if youtube_id:
-                        song.youtube_id = youtube_id
-                        song.preview_url = f"https://www.youtube.com/watch?v={youtube_id}"
-                        youtube_success += 1
-                except Exception:
-                    pass
-            if i % 5 == 0:
-                print(f"   Processed {i}/{len(final)}...")
-        
-        print(f"✅ YouTube IDs: {youtube_success}/{len(final)}\n")
-        
+        return final
+    
+    def _finish_personalized(self, run: Dict, final: List[Song]) -> Dict:
+        """Record listening history and build the response"""
+        request = run['request']
         for s in final:
             try:
                 self.user_history[request.user_id].append({
                     'song': s.dict() if hasattr(s, 'dict') else s.__dict__,
-                    'mood': mood,
-                    'language': language,
+                    'mood': run['mood'],
+                    'language': run['language'],
                     'timestamp': datetime.now().isoformat(),
                     'source': 'personalized'
                 })
@@ -754,73 +1181,190 @@ class RecommendationEngine:
                 # Best-effort: store minimal info
                 self.user_history[request.user_id].append({
                     'song': {'name': getattr(s, 'name', None), 'artist': getattr(s, 'artist', None)},
-                    'mood': mood,
-                    'language': language,
+                    'mood': run['mood'],
+                    'language': run['language'],
                     'timestamp': datetime.now().isoformat(),
                     'source': 'personalized'
                 })
         
         return {
             "songs": final,
-            "mood": mood,
-            "language": language,
+            "mood": run['mood'],
+            "language": run['language'],
             "total": len(final),
-            "distribution": {
-                "artist_based": cat1_count,
-                "language_mood": cat2_count,
-                "similar_tracks": cat3_count,
-                "fallback": cat4_count
-            },
+            "distribution": dict(run['counts']),
             "preferences_applied": {
-                "language": language,
-                "favorite_singers": corrected_singers,
-                "favorite_songs_count": len(favorite_songs)
+                "language": run['language'],
+                "favorite_singers": run['corrected_singers'],
+                "favorite_songs_count": len(run['favorite_songs'])
             }
         }
     
-    def get_basic_recommendations(self, request: RecommendationRequest) -> Dict:
-        """Basic mood-based recommendations"""
-        if not self.lastfm:
-            raise HTTPException(status_code=503, detail="Last.fm not configured")
+    def get_personalized_recommendations(self, request: PersonalizedRecommendationRequest) -> Dict:
+        """
+        Personalized recommendations with FUZZY MATCHING:
+        - 8: Artist + Mood + Language
+        - 4: Language + Mood
+        - 4: Similar + Mood
+        - Rest: Fallback
+        """
+        run = self._start_personalized(request)
+        self._collect_artist_based(run)
+        self._collect_language_mood(run)
+        self._collect_similar(run)
+        self._collect_fallback(run)
+        final = self._rank_personalized(run)
+        
+        if not request.resolve_youtube:
+            deferred = self._defer_youtube_ids(final)
+            print(f"⏭️  YouTube IDs: {len(final) - deferred}/{len(final)} cached, {deferred} deferred\n")
+            return self._finish_personalized(run, final)
         
-        mood = (request.mood or '').lower()
-        if not MoodDetector.validate_mood(mood):
-            raise HTTPException(status_code=400, detail=f"Invalid mood: {mood}")
-        mood_tags = MoodDetector.get_mood_tags(mood)
-        recommendations = []
-        added = set()
+        print("🎬 Fetching YouTube IDs...")
+        pending = [song for song in final if not song.youtube_id and song.name and song.artist]
+        if run['concurrent']:
+            resolved = list(self._executor.map(self._attach_youtube_id, pending))
+        else:
+            resolved = [self._attach_youtube_id(song) for song in pending]
+        youtube_success = sum(1 for ok in resolved if ok)
         
-        print(f"\n🎵 Basic Recommendations for mood: {mood}")
-        print(f"Tags: {mood_tags}\n")
+        print(f"✅ YouTube IDs: {youtube_success}/{len(final)}\n")
+        return self._finish_personalized(run, final)
+    
+    def stream_personalized_recommendations(self, request: PersonalizedRecommendationRequest) -> Iterator[Dict]:
+        """
+        Streaming variant of get_personalized_recommendations. Yields:
+        - 'start' once the request is validated and every lookup is registered
+        - 'category' per category, in priority order as soon as its lookups are
+          done (all lookups run concurrently), so songs shared between categories
+          land where get_personalized_recommendations puts them and the songs
+          and distribution match the non-streaming response
+        - 'youtube' per resolved YouTube ID of the final songs (none when
+          request.resolve_youtube is off; the summary then carries resolve handles)
+        - 'summary' with the ranked songs and the distribution block
+        Validation errors are raised before the first event.
+        """
+        run = self._start_personalized(request)
+        yield {
+            "event": "start",
+            "mood": run['mood'],
+            "language": run['language'],
+            "limit": request.limit
+        }
         
-        for tag in mood_tags:
-            if len(recommendations) >= request.limit:
-                break
-            
-            songs = self.get_top_tracks_by_tag(tag, limit=15)
+        # De-duplication gives a shared song to the first category collecting it, so
+        # categories are collected in priority order; plan.get() waits for each one's lookups
+        collectors = [
+            ('artist_based', self._collect_artist_based),
+            ('language_mood', self._collect_language_mood),
+            ('similar_tracks', self._collect_similar),
+            ('fallback', self._collect_fallback)
+        ]
+        for category, collect in collectors:
+            yield {"event": "category", "category": category, "songs": collect(run)}
+        
+        final = self._rank_personalized(run)
+        if not request.resolve_youtube:
+            self._defer_youtube_ids(final)
+            pending = []
+        else:
+            pending = [song for song in final if not song.youtube_id and song.name and song.artist]
+        if run['concurrent']:
+            futures = {self._executor.submit(self._attach_youtube_id, song): song for song in pending}
+            resolved = (futures[future] for future in as_completed(futures) if future.result())
+        else:
+            resolved = (song for song in pending if self._attach_youtube_id(song))
+        for song in resolved:
+            yield {"event": "youtube", "song_id": song.id, "youtube_id": song.youtube_id}
+        
+        yield {"event": "summary", **self._finish_personalized(run, final)}
+    
+    def start_mood_pools(self):
+        """Start the background mood pool refresher (called on app startup)"""
+        if self.lastfm and Config.MOOD_POOLS_ENABLED:
+            self._mood_pools.start()
+    
+    def stop_mood_pools(self):
+        self._mood_pools.stop()
+    
+    def _build_mood_pool(self, mood: str, language: Optional[str]) -> List[Song]:
+        """A mood pool: the ranked candidates with YouTube IDs resolved concurrently"""
+        pool = self._mood_pool_candidates(mood, language)
+        list(self._executor.map(self._attach_youtube_id, [s for s in pool if not s.youtube_id and s.name and s.artist]))
+        return pool
+    
+    def _mood_pool_candidates(self, mood: str, language: Optional[str]) -> List[Song]:
+        """
+        Ranked candidates for basic recommendations: mood-matching tracks of the
+        language tag chart first (when a language is given), then the mood tag charts
+        """
+        pool = []
+        added = set()
+        
+        def add(songs: List[Song]):
             for s in songs:
                 key = f"{s.name}-{s.artist}".lower()
-                if key not in added and len(recommendations) < request.limit:
+                if key not in added:
                     added.add(key)
-                    recommendations.append(s)
+                    pool.append(s)
         
-        for song in recommendations:
-            if not song.youtube_id and song.name and song.artist:
-                try:
-                    youtube_id = music_player.get_youtube_id(f"{song.artist} {song.name}")
-                    if youtube_id:
-                        song.youtube_id = youtube_id
-                        song.preview_url = f"https://www.youtube.com/watch?v={youtube_id}"
-                except Exception:
-                    pass
+        if language:
+            chart = self.get_top_tracks_by_tag(self.LANGUAGE_TO_TAG[language], limit=Config.MOOD_POOL_SIZE)
+            tracks = [self.lastfm.get_track(s.artist, s.name) for s in chart]
+            keep = self._mood_mask(tracks, self._track_tags.prefetch(tracks), mood)
+            add([song for song, matches in zip(chart, keep) if matches])
         
-        print(f"✅ Retrieved {len(recommendations)} songs\n")
-        
-        return {
-            "songs": recommendations,
+        for tag in MoodDetector.get_mood_tags(mood):
+            add(self.get_top_tracks_by_tag(tag, limit=15))
+        return pool
+    
+    def _validate_basic_request(self, request: RecommendationRequest):
+        mood = (request.mood or '').lower()
+        if not MoodDetector.validate_mood(mood):
+            raise HTTPException(status_code=400, detail=f"Invalid mood: {mood}")
+        language = (request.language or '').lower() or None
+        if language and language not in self.LANGUAGE_TO_TAG:
+            raise HTTPException(status_code=400, detail=f"Invalid language: {language}")
+        return mood, language
+    
+    def _basic_response(self, request: RecommendationRequest, mood: str, language: Optional[str],
+                        pool: List[Song]) -> Dict:
+        songs = [song.model_copy() for song in pool[:request.limit]]
+        if not request.resolve_youtube:
+            self._defer_youtube_ids(songs)
+        response = {
+            "songs": songs,
             "mood": mood,
-            "total": len(recommendations)
+            "total": len(songs)
         }
+        if language:
+            response["language"] = language
+        return response
+    
+    def get_pooled_recommendations(self, request: RecommendationRequest) -> Optional[Dict]:
+        """Basic recommendations sliced from a ready pool, or None when it is not built yet"""
+        mood, language = self._validate_basic_request(request)
+        pool = self._mood_pools.get((mood, language))
+        if pool is None:
+            return None
+        return self._basic_response(request, mood, language, pool)
+    
+    def get_basic_recommendations(self, request: RecommendationRequest) -> Dict:
+        """Basic mood-based recommendations"""
+        if not self.lastfm:
+            raise HTTPException(status_code=503, detail="Last.fm not configured")
+        
+        mood, language = self._validate_basic_request(request)
+        print(f"\n🎵 Basic Recommendations for mood: {mood}" + (f" ({language})" if language else ""))
+        
+        pool = self._mood_pools.get((mood, language))
+        if pool is None and not request.resolve_youtube:
+            # No ready pool: answer from the charts now and leave the pool to the refresher
+            pool = self._mood_pool_candidates(mood, language)
+        elif pool is None:
+            pool = self._mood_pools.get_or_build((mood, language))
+        print(f"✅ Retrieved {min(len(pool), request.limit)} songs\n")
+        return self._basic_response(request, mood, language, pool)
     
     def search_music(self, query: str, limit: int = 10) -> List[Song]:
         """Search music by name or artist with fuzzy matching"""
@@ -843,6 +1387,7 @@ class RecommendationEngine:
             
             # Search as track
             if len(results) < limit:
+                self._count_call('track.search')
                 search = self.lastfm.search_for_track('', query)
                 matches = search.get_next_page() if hasattr(search, 'get_next_page') else list(search)
                 
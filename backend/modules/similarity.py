@@ -0,0 +1,177 @@
+"""
+Similarity Module
+Offline track-to-track similarity from locally known Last.fm tags
+"""
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .mood_model import mood_model
+
+
+class TagSimilarityIndex:
+    """
+    Sparse track x tag matrix with IDF weights, stored column-wise (one posting
+    array of track rows per tag) so a query only touches the tags it has.
+    Rows are L2-normalized, so the accumulated dot products are cosine scores.
+    Tracks are added incrementally; re-tagging a track retires its old row.
+    """
+
+    REWEIGHT_FRACTION = 0.01
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}             # track key -> current row
+        self._tracks: List[Tuple[str, str]] = []    # row -> (artist, title)
+        self._row_tags: List[Tuple[int, ...]] = []
+        self._tag_ids: Dict[str, int] = {}
+        self._tag_names: List[str] = []
+        self._postings: List[array] = []            # tag id -> rows (CSC column)
+        self._coo_rows = array('i')                 # every (row, tag) pair, for norms and df
+        self._coo_tags = array('i')
+        self._alive = np.zeros(0, dtype=bool)
+        self._mood_bits = np.zeros(0, dtype=np.uint16)
+        self._idf = np.zeros(0)
+        self._norms = np.zeros(0)
+        self._n_live = 0
+        self._changed = 0                           # rows added/retired since the last full refresh
+        self._dirty = False
+        self.queries = 0
+
+    @staticmethod
+    def key_for(artist: str, title: str) -> str:
+        return f"{artist}\t{title}".lower()
+
+    def _grow(self, rows: int):
+        if rows > len(self._alive):
+            capacity = max(rows, 2 * len(self._alive), 1024)
+            self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+            self._mood_bits = np.concatenate(
+                [self._mood_bits, np.zeros(capacity - len(self._mood_bits), dtype=np.uint16)]
+            )
+
+    def add_track(self, artist: str, title: str, tags: Iterable[str]) -> bool:
+        """Add or re-tag a track; returns False when nothing changed"""
+        tags = sorted({tag.lower() for tag in tags if tag})
+        if not artist or not title or not tags:
+            return False
+
+        key = self.key_for(artist, title)
+        with self._lock:
+            for tag in tags:
+                if tag not in self._tag_ids:
+                    self._tag_ids[tag] = len(self._tag_names)
+                    self._tag_names.append(tag)
+                    self._postings.append(array('i'))
+            tag_ids = tuple(self._tag_ids[tag] for tag in tags)
+            old_row = self._rows.get(key)
+            if old_row is not None:
+                if self._row_tags[old_row] == tag_ids:
+                    return False
+                self._alive[old_row] = False
+                self._changed += 1
+
+            row = len(self._tracks)
+            self._grow(row + 1)
+            self._rows[key] = row
+            self._tracks.append((artist, title))
+            self._row_tags.append(tag_ids)
+            self._alive[row] = True
+            self._mood_bits[row] = mood_model.mood_bits(tags, title)
+            for tag_id in tag_ids:
+                self._postings[tag_id].append(row)
+                self._coo_rows.append(row)
+                self._coo_tags.append(tag_id)
+            self._changed += 1
+            self._dirty = True
+        return True
+
+    def add_many(self, tracks: Iterable[Tuple[str, str, Iterable[str]]]) -> int:
+        return sum(self.add_track(artist, title, tags) for artist, title, tags in tracks)
+
+    def _refresh_weights(self):
+        """
+        Bring IDF and row norms up to date. Small changes only weigh the new
+        rows with the current IDF (unseen tags get the maximum); once more than
+        REWEIGHT_FRACTION of rows changed, everything is recomputed, vectorized
+        over all (row, tag) pairs.
+        """
+        if not self._dirty:
+            return
+        n_rows = len(self._tracks)
+        if len(self._norms) and self._changed <= self.REWEIGHT_FRACTION * n_rows:
+            unseen_idf = np.log(1 + self._n_live) + 1.0
+            self._idf = np.concatenate([self._idf, np.full(len(self._tag_names) - len(self._idf), unseen_idf)])
+            new_norms = [np.sqrt(np.sum(self._idf[list(self._row_tags[row])] ** 2))
+                         for row in range(len(self._norms), n_rows)]
+            self._norms = np.concatenate([self._norms, new_norms])
+            self._dirty = False
+            return
+
+        coo_rows = np.frombuffer(self._coo_rows, dtype=np.int32)
+        coo_tags = np.frombuffer(self._coo_tags, dtype=np.int32)
+        live = self._alive[coo_rows]
+        df = np.bincount(coo_tags[live], minlength=len(self._tag_ids))
+        self._n_live = int(self._alive[:n_rows].sum())
+        self._idf = np.log((1 + self._n_live) / (1 + df)) + 1.0
+        self._norms = np.sqrt(np.bincount(coo_rows, weights=self._idf[coo_tags] ** 2 * live, minlength=n_rows))
+        self._changed = 0
+        self._dirty = False
+
+    def tags_for(self, artist: str, title: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._rows.get(self.key_for(artist, title))
+            if row is None:
+                return None
+            return [self._tag_names[tag_id] for tag_id in self._row_tags[row]]
+
+    def most_similar(self, tags: Iterable[str], k: int = 10, mood: Optional[str] = None,
+                     exclude: Optional[Tuple[str, str]] = None, min_score: float = 0.0) -> List[Tuple[str, str, float]]:
+        """Top-k (artist, title, cosine) for a tag set, optionally limited to tracks matching `mood`"""
+        with self._lock:
+            self.queries += 1
+            self._refresh_weights()
+            tags = {tag.lower() for tag in tags if tag}
+            tag_ids = {self._tag_ids[tag] for tag in tags if tag in self._tag_ids}
+            n_rows = len(self._tracks)
+            if not tag_ids or not n_rows:
+                return []
+
+            query = {tag_id: self._idf[tag_id] for tag_id in tag_ids}
+            # Tags no indexed track has still count towards the query's length
+            unseen_idf = np.log(1 + self._n_live) + 1.0
+            query_norm = np.sqrt(sum(w * w for w in query.values()) + (len(tags) - len(tag_ids)) * unseen_idf ** 2)
+            scores = np.zeros(n_rows)
+            for tag_id, weight in query.items():
+                rows = np.frombuffer(self._postings[tag_id], dtype=np.int32)
+                scores[rows] += weight * self._idf[tag_id]
+
+            valid = self._alive[:n_rows] & (self._norms > 0)
+            column = mood_model.mood_column(mood) if mood else None
+            if column is not None:
+                valid &= (self._mood_bits[:n_rows] & (1 << column)) != 0
+            if exclude:
+                excluded = self._rows.get(self.key_for(*exclude))
+                if excluded is not None:
+                    valid[excluded] = False
+
+            scores[valid] /= self._norms[valid] * query_norm
+            scores[~valid] = 0.0
+            candidates = np.flatnonzero(scores > max(min_score, 0.0))
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+            ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+            return [(*self._tracks[row], round(float(scores[row]), 4)) for row in ranked]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'tracks': len(self._rows),
+                'rows': len(self._tracks),
+                'tags': len(self._tag_ids),
+                'nonzeros': len(self._coo_rows),
+                'queries': self.queries
+            }
@@ -0,0 +1,83 @@
+"""
+Single-Flight Module
+Coalesces concurrent identical upstream lookups into one call
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block and receive the same result (or exception). Nothing is kept
+    once the call finishes - caching stays the caller's job.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.merged = 0
+        self.errors = 0
+        self.max_waiters = 0
+        self.merged_wait_seconds = 0.0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.merged += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+
+        started = time.monotonic()
+        call.done.wait()
+        with self._lock:
+            self.merged_wait_seconds += time.monotonic() - started
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            requests = self.executions + self.merged
+            return {
+                'name': self.name,
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'merged': self.merged,
+                'merge_rate': round(self.merged / requests, 3) if requests else 0.0,
+                'max_waiters': self.max_waiters,
+                'avg_merged_wait_ms': round(self.merged_wait_seconds / self.merged * 1000, 1) if self.merged else 0.0,
+                'errors': self.errors
+            }
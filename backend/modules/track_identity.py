@@ -0,0 +1,67 @@
+"""
+Track Identity Module
+Canonical cache keys for tracks, so differently spelled lookups of one song share an entry
+"""
+import re
+import unicodedata
+from typing import List
+
+# Annotations that do not change which recording a lookup is after
+_NOISE_PATTERNS = [
+    re.compile(r'\bsong\s*:\s*', re.IGNORECASE),                                  # "Song: Maar Dala"
+    re.compile(r'[(\[]\s*(?:feat\.?|ft\.?|featuring|with)\s[^)\]]*[)\]]', re.IGNORECASE),
+    re.compile(r'[(\[]\s*from\s+["“][^)\]]*[)\]]', re.IGNORECASE),                 # (From "Movie")
+    re.compile(r'\s-\s*from\s+["“].*$', re.IGNORECASE),                            # - From "Movie"
+    re.compile(
+        r'(?:[(\[]|\s-\s*)\s*(?:\d{4}\s+)?(?:digitally\s+)?(?:remaster(?:ed)?|radio edit|single version|'
+        r'album version|official (?:music )?(?:video|audio)|lyric video)(?:\s+\d{4})?(?:\s+version)?\s*[)\]]?',
+        re.IGNORECASE
+    ),
+]
+# Joiners between artist names (and filler words) that callers use inconsistently
+_ARTIST_SEPARATORS = re.compile(r'\s*(?:,|&|\+|\bfeat\.?|\bft\.?|\bfeaturing\b|\band\b|\bx\b|\bwith\b)\s*', re.IGNORECASE)
+# A bare "feat. B & C" running to the end of a free-text query
+_FEATURE_SUFFIX = re.compile(r'(?:^|\s)(?:feat\.?|ft\.?|featuring)\s+(.*)$', re.IGNORECASE)
+
+
+def _fold(text: str) -> str:
+    """NFKC + casefold, punctuation and symbols to spaces, whitespace collapsed"""
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    text = ''.join(' ' if unicodedata.category(char)[0] in 'PSZ' else char for char in text)
+    return ' '.join(text.split())
+
+
+def _strip_noise(text: str) -> str:
+    for pattern in _NOISE_PATTERNS:
+        text = pattern.sub(' ', text)
+    return text
+
+
+def canonical_title(title: str) -> str:
+    return _fold(_strip_noise(title))
+
+
+def canonical_artists(artist: str) -> List[str]:
+    """Sorted distinct artist names of a credit like "A feat. B & C" """
+    names = {_fold(name) for name in _ARTIST_SEPARATORS.split(artist or '')}
+    return sorted(name for name in names if name)
+
+
+def track_key(artist: str, title: str) -> str:
+    """Identity of a track given separate artist and title"""
+    return f"{' & '.join(canonical_artists(artist))}\t{canonical_title(title)}"
+
+
+def query_key(query: str) -> str:
+    """
+    Identity of a free-text "artist title" query: noise stripped, words kept
+    in order. Only a featured-artist suffix loses its joiners, so "feat. B & C"
+    and "ft B, C" agree while titles like "Stay With Me" are left intact.
+    """
+    text = _strip_noise(query)
+    featured = []
+    match = _FEATURE_SUFFIX.search(text)
+    if match:
+        text = text[:match.start()]
+        featured = [_fold(name) for name in _ARTIST_SEPARATORS.split(match.group(1))]
+    return ' '.join(part for part in [_fold(text)] + featured if part)
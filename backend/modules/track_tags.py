@@ -0,0 +1,163 @@
+"""
+Track Tag Module
+Per-track Last.fm tag lookups with a persistent cache and parallel prefetch
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .cache import TTLCache
+from .singleflight import SingleFlight
+
+
+class TrackTagService:
+    """
+    Caches track.getTopTags results per (artist, title) and persists them to disk,
+    so mood filtering costs at most one parallel batch for the uncached candidates.
+    Tracks without tags and failed lookups are cached for `negative_ttl` only,
+    in memory, so they are neither refetched on every request nor stuck for long.
+    Rewriting the file is O(cache size), so a daemon thread saves new tags every
+    `save_interval` seconds instead of the requests that fetched them.
+    """
+
+    def __init__(self, cache_file: str, ttl: float, maxsize: int, max_workers: int,
+                 save_interval: float = 60.0, on_fetch: Optional[Callable[[], None]] = None,
+                 on_tags: Optional[Callable[[str, str, List[str]], None]] = None,
+                 limit: int = 10, negative_ttl: float = 600.0):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.limit = limit
+        self.negative_ttl = negative_ttl
+        self.save_interval = save_interval
+        self.on_fetch = on_fetch
+        self.on_tags = on_tags
+        # key -> (tags, fetched_at wall-clock time)
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, name="track_tags")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lastfm-tags")
+        self._lock = threading.Lock()         # guards _dirty and the counters
+        self._save_lock = threading.Lock()    # serializes file writes
+        self._flight = SingleFlight("track_tags")
+        self._dirty = 0
+        self.fetches = 0
+        self.errors = 0
+        self.load()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="track-tags-save", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def artist_title(track) -> Tuple[str, str]:
+        artist = track.artist.name if hasattr(track.artist, 'name') else str(track.artist)
+        return artist, track.title
+
+    @classmethod
+    def key_for(cls, track) -> str:
+        return "\t".join(cls.artist_title(track)).lower()
+
+    def load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not load track tag cache: {e}")
+            return
+
+        now = time.time()
+        for key, entry in stored.items():
+            remaining = self.ttl - (now - entry.get('fetched_at', 0))
+            # Empty entries are negative results (or from the old track.getTags lookup): refetch them
+            if remaining > 0 and entry.get('tags'):
+                self._cache.set(key, (entry.get('tags', []), entry['fetched_at']), ttl=remaining)
+
+    def save(self):
+        """Write the cache atomically (temp file + replace)"""
+        with self._save_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, 0
+            if not dirty:
+                return
+            snapshot = {
+                key: {'tags': tags, 'fetched_at': fetched_at}
+                for key, (tags, fetched_at) in self._cache.items()
+                if tags
+            }
+            try:
+                os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+                tmp_file = f"{self.cache_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_file, self.cache_file)
+            except OSError as e:
+                print(f"⚠️  Could not save track tag cache: {e}")
+                with self._lock:
+                    self._dirty += dirty
+
+    def _run(self):
+        while not self._stop.wait(self.save_interval):
+            self.save()
+
+    def close(self):
+        """Stop the save thread and persist what is left"""
+        self._stop.set()
+        self.save()
+
+    def _fetch(self, track) -> List[str]:
+        """Fetch tags, sharing one track.getTopTags call between concurrent requests"""
+        return self._flight.do(self.key_for(track), self._fetch_uncached, track)
+
+    def _fetch_uncached(self, track) -> List[str]:
+        if self.on_fetch:
+            self.on_fetch()
+        with self._lock:
+            self.fetches += 1
+        try:
+            top_tags = track.get_top_tags(limit=self.limit)
+            names = [item.item.name.lower() for item in top_tags]
+        except Exception:
+            # A failed fetch means "no tags" for now; remembered briefly so it is not retried per request
+            with self._lock:
+                self.errors += 1
+            self._cache.set(self.key_for(track), ([], time.time()), ttl=self.negative_ttl, negative=True)
+            return []
+
+        if not names:
+            self._cache.set(self.key_for(track), ([], time.time()), ttl=self.negative_ttl, negative=True)
+            return []
+        self._cache.set(self.key_for(track), (names, time.time()))
+        with self._lock:
+            self._dirty += 1
+        if self.on_tags:
+            self.on_tags(*self.artist_title(track), names)
+        return names
+
+    def get_tags(self, track) -> List[str]:
+        cached = self._cache.get(self.key_for(track))
+        return cached[0] if cached is not None else self._fetch(track)
+
+    def prefetch(self, tracks: Iterable) -> Dict[str, List[str]]:
+        """Tags for every track, fetching all cache misses concurrently"""
+        result = {}
+        missing = []
+        for track in tracks:
+            key = self.key_for(track)
+            cached = self._cache.get(key)
+            if cached is not None:
+                result[key] = cached[0]
+            elif key not in result:
+                result[key] = []
+                missing.append(track)
+
+        for track, tags in zip(missing, self._executor.map(self._fetch, missing)):
+            result[self.key_for(track)] = tags
+        return result
+
+    def get_stats(self) -> dict:
+        stats = self._cache.get_stats()
+        stats.update({'fetches': self.fetches, 'errors': self.errors, 'cache_file': self.cache_file,
+                      'single_flight': self._flight.get_stats()})
+        return stats
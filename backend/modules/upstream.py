@@ -0,0 +1,58 @@
+"""
+Upstream Executor Module
+Runs blocking upstream calls (pylast, requests, googleapiclient) off the event loop
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+from .config import Config
+
+
+class UpstreamExecutor:
+    """One bounded thread pool per upstream, so a slow service cannot starve the others"""
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._pools = {
+            name: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"upstream-{name}")
+            for name, workers in self.limits.items()
+        }
+        self._lock = threading.Lock()
+        self._in_flight = {name: 0 for name in self.limits}
+        self._completed = {name: 0 for name in self.limits}
+
+    async def run(self, upstream: str, fn: Callable, *args, **kwargs):
+        """Await a blocking call on the pool reserved for the given upstream"""
+        pool = self._pools.get(upstream)
+        if pool is None:
+            raise ValueError(f"Unknown upstream '{upstream}'")
+
+        with self._lock:
+            self._in_flight[upstream] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._in_flight[upstream] -= 1
+                self._completed[upstream] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    'max_workers': self.limits[name],
+                    'in_flight': self._in_flight[name],
+                    'completed': self._completed[name]
+                }
+                for name in self.limits
+            }
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+upstream_executor = UpstreamExecutor(Config.UPSTREAM_LIMITS)
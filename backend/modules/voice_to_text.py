@@ -102,7 +102,7 @@ class VoiceToText:
                 )
             
             # Transcribe with timeout handling
-            response = self.deepgram.listen.prerecorded.v("1").transcribe_file(
+            response = await self.deepgram.listen.asyncprerecorded.v("1").transcribe_file(
                 payload, options
             )
             
@@ -209,7 +209,7 @@ class VoiceToText:
             )
             
             # Transcribe
-            response = self.deepgram.listen.prerecorded.v("1").transcribe_file(
+            response = await self.deepgram.listen.asyncprerecorded.v("1").transcribe_file(
                 payload, options
             )
             
@@ -279,7 +279,7 @@ class VoiceToText:
                 diarize=False,
             )
             
-            response = self.deepgram.listen.prerecorded.v("1").transcribe_file(
+            response = await self.deepgram.listen.asyncprerecorded.v("1").transcribe_file(
                 payload, options
             )
             
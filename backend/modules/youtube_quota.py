@@ -0,0 +1,171 @@
+"""
+YouTube Quota Module
+Daily YouTube Data API budget: spend tracking, bulk pacing and exhaustion projection
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:  # no tz database: fixed PST is at most an hour off
+    from datetime import timezone
+    PACIFIC = timezone(timedelta(hours=-8))
+
+
+class YouTubeQuota:
+    """
+    Tracks units spent against the daily quota, which resets at midnight
+    Pacific time. Interactive lookups may spend the whole budget; bulk lookups
+    leave `interactive_reserve` of it untouched and are paced over the day -
+    by a given time they may only have spent their share of the day elapsed
+    so far (plus a `bulk_burst` head start) - so background resolution cannot
+    exhaust the quota by mid-morning. Spend is persisted so restarts keep it:
+    at most once per `save_interval` from `acquire()`, at once on exhaustion,
+    and by `flush()` at shutdown - never while holding the spend lock.
+    """
+
+    def __init__(self, daily_units: int = 10000, search_cost: int = 100, interactive_reserve: float = 0.2,
+                 bulk_burst: float = 0.1, state_file: Optional[str] = None, save_interval: float = 30.0):
+        self.daily_units = daily_units
+        self.search_cost = search_cost
+        self.interactive_reserve = interactive_reserve
+        self.bulk_burst = bulk_burst
+        self.state_file = state_file
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()     # orders file writes, which happen outside _lock
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._day = self._today()
+        self.spent = {'interactive': 0, 'bulk': 0}
+        self.denied = {'interactive': 0, 'bulk': 0}
+        self.exhausted_until: Optional[datetime] = None
+        self._load()
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(PACIFIC)
+
+    def _today(self) -> str:
+        return self._now().date().isoformat()
+
+    def _next_reset(self) -> datetime:
+        now = self._now()
+        return datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=PACIFIC)
+
+    def _day_fraction(self) -> float:
+        now = self._now()
+        midnight = datetime.combine(now.date(), datetime.min.time(), tzinfo=PACIFIC)
+        return min((now - midnight).total_seconds() / 86400, 1.0)
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not load YouTube quota state: {e}")
+            return
+        if state.get('day') == self._day:
+            self.spent.update(state.get('spent', {}))
+            if state.get('exhausted'):
+                self.exhausted_until = self._next_reset()
+
+    def flush(self):
+        """Write the state file if anything changed since the last write (temp file + replace)"""
+        if not self.state_file:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                state = {'day': self._day, 'spent': dict(self.spent), 'exhausted': self.exhausted_until is not None}
+                self._dirty = False
+                self._last_save = time.monotonic()
+            self._write(state)
+
+    def _write(self, state: dict):
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            print(f"⚠️  Could not save YouTube quota state: {e}")
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self.spent = {'interactive': 0, 'bulk': 0}
+            self.denied = {'interactive': 0, 'bulk': 0}
+            self.exhausted_until = None
+
+    @property
+    def remaining(self) -> int:
+        return max(self.daily_units - sum(self.spent.values()), 0)
+
+    def _bulk_allowance(self) -> float:
+        bulk_budget = self.daily_units * (1 - self.interactive_reserve)
+        return bulk_budget * min(self._day_fraction() + self.bulk_burst, 1.0)
+
+    def acquire(self, interactive: bool = False, units: Optional[int] = None) -> bool:
+        """Reserve units for one call; False means route the lookup elsewhere"""
+        units = units or self.search_cost
+        kind = 'interactive' if interactive else 'bulk'
+        with self._lock:
+            self._roll_day()
+            allowed = self.exhausted_until is None and self.remaining >= units
+            if allowed and not interactive:
+                allowed = (sum(self.spent.values()) + units <= self.daily_units * (1 - self.interactive_reserve)
+                           and self.spent['bulk'] + units <= self._bulk_allowance())
+            if not allowed:
+                self.denied[kind] += 1
+                return False
+            self.spent[kind] += units
+            self._dirty = True
+            save_due = time.monotonic() - self._last_save >= self.save_interval
+            if save_due:
+                self._last_save = time.monotonic()    # one caller per interval does the write
+        if save_due:
+            self.flush()
+        return True
+
+    def mark_exhausted(self):
+        """The API reported quotaExceeded: stop calling it until the next reset"""
+        with self._lock:
+            self.exhausted_until = self._next_reset()
+            self._dirty = True
+        self.flush()
+        print(f"⚠️  YouTube API quota exhausted until {self.exhausted_until.isoformat()}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._roll_day()
+            spent = sum(self.spent.values())
+            elapsed = self._day_fraction() * 86400
+            rate = spent / elapsed if elapsed > 0 else 0.0    # units per second so far today
+            reset = self._next_reset()
+            projected = None
+            if self.exhausted_until is not None:
+                projected = self._now()
+            elif rate > 0:
+                projected = self._now() + timedelta(seconds=self.remaining / rate)
+            return {
+                'daily_units': self.daily_units,
+                'spent': dict(self.spent),
+                'remaining': self.remaining,
+                'remaining_searches': self.remaining // self.search_cost,
+                'bulk_allowance_now': int(self._bulk_allowance()),
+                'denied': dict(self.denied),
+                'exhausted': self.exhausted_until is not None,
+                'resets_at': reset.isoformat(),
+                'projected_exhaustion': projected.isoformat() if projected and projected < reset else None
+            }
@@ -0,0 +1,195 @@
+"""
+YouTube Store Module
+Persistent query -> YouTube ID map: JSON snapshot plus an append-only log, written behind
+"""
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class YouTubeIdStore:
+    """
+    The snapshot (`path`, a flat JSON object as before) is only rewritten on
+    compaction; new entries go to `path.log` as one JSON line each. Writes are
+    buffered and appended by a daemon thread every `flush_interval` seconds, so
+    an insert costs a dict update regardless of the cache size. Compaction
+    writes a temp file, fsyncs it and os.replace()s the snapshot before the log
+    is truncated; replaying the log over the snapshot is idempotent and a torn
+    last line is skipped, so a crash at any point loses at most the buffer.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, compact_min_entries: int = 1000,
+                 compact_ratio: float = 0.5):
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.flush_interval = flush_interval
+        self.compact_min_entries = compact_min_entries
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()        # guards _data and _pending
+        self._io_lock = threading.Lock()     # serializes file writes
+        self._data: Dict[str, str] = {}
+        self._pending: List[Tuple[str, str]] = []
+        self._snapshot_entries = 0
+        self._log_entries = 0
+        self.flushes = 0
+        self.compactions = 0
+        self.write_errors = 0
+        self.load()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="youtube-store", daemon=True)
+        self._thread.start()
+
+    def load(self):
+        data = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not load YouTube cache snapshot: {e}")
+        self._snapshot_entries = len(data)
+
+        replayed = 0
+        if os.path.exists(self.log_path):
+            try:
+                with open(self.log_path, 'r+b') as f:
+                    valid_bytes = 0
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break  # torn write from a crash
+                        valid_bytes += len(line)
+                        try:
+                            query, video_id = json.loads(line)
+                        except ValueError:
+                            continue
+                        data[query] = video_id
+                        replayed += 1
+                    # Drop the torn tail so the next append starts on a fresh line
+                    f.truncate(valid_bytes)
+            except OSError as e:
+                print(f"⚠️  Could not replay YouTube cache log: {e}")
+
+        with self._lock:
+            self._data = data
+            self._log_entries = replayed
+
+    def get(self, query: str) -> Optional[str]:
+        return self._data.get(query)
+
+    def __contains__(self, query: str) -> bool:
+        return query in self._data
+
+    def __getitem__(self, query: str) -> str:
+        return self._data[query]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def set(self, query: str, video_id: str):
+        with self._lock:
+            if self._data.get(query) == video_id:
+                return
+            self._data[query] = video_id
+            self._pending.append((query, video_id))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Append buffered entries to the log, compacting when the log has grown large"""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                try:
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.write(''.join(json.dumps([query, video_id]) + '\n' for query, video_id in pending))
+                        f.flush()
+                        os.fsync(f.fileno())
+                except OSError as e:
+                    self.write_errors += 1
+                    print(f"⚠️  Could not append to YouTube cache log: {e}")
+                    with self._lock:
+                        self._pending[:0] = pending
+                    return
+                self.flushes += 1
+                self._log_entries += len(pending)
+
+            if self._log_entries >= max(self.compact_min_entries, self.compact_ratio * self._snapshot_entries):
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the snapshot with everything and truncate the log (caller holds _io_lock)"""
+        with self._lock:
+            data = dict(self._data)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            # Entries appended to _data after the copy are still in _pending, not in the log
+            with open(self.log_path, 'w', encoding='utf-8'):
+                pass
+        except OSError as e:
+            self.write_errors += 1
+            print(f"⚠️  Could not compact YouTube cache: {e}")
+            return
+        self._snapshot_entries = len(data)
+        self._log_entries = 0
+        self.compactions += 1
+
+    def migrate(self, key_fn: Callable[[str], str]) -> int:
+        """
+        Re-key every entry with `key_fn` (later entries win on collisions) and
+        compact when anything changed; returns the number of keys rewritten.
+        Running it again on migrated data is a no-op.
+        """
+        with self._io_lock:
+            with self._lock:
+                migrated = {}
+                changed = 0
+                for key, video_id in self._data.items():
+                    new_key = key_fn(key)
+                    if new_key != key:
+                        changed += 1
+                    if new_key:
+                        migrated[new_key] = video_id
+                if not changed:
+                    return 0
+                self._data = migrated
+                self._pending = []
+            self._compact()
+        return changed
+
+    def clear(self):
+        with self._io_lock:
+            with self._lock:
+                self._data = {}
+                self._pending = []
+            self._compact()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+            entries = len(self._data)
+        return {
+            'entries': entries,
+            'pending_writes': pending,
+            'snapshot_entries': self._snapshot_entries,
+            'log_entries': self._log_entries,
+            'flushes': self.flushes,
+            'compactions': self.compactions,
+            'write_errors': self.write_errors,
+            'snapshot_size_kb': round(os.path.getsize(self.path) / 1024, 1) if os.path.exists(self.path) else 0,
+            'log_size_kb': round(os.path.getsize(self.log_path) / 1024, 1) if os.path.exists(self.log_path) else 0
+        }
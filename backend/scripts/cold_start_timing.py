@@ -0,0 +1,93 @@
+"""
+Cold Start Timing
+Time to the first mood inference in a fresh process, with the emotion model loaded lazily vs preloaded
+
+    python scripts/cold_start_timing.py --runs 3 --detector opencv
+
+Each run is a new Python process, so TensorFlow starts cold every time. "lazy"
+calls analyze() straight away, as the first request did before preloading;
+"startup" runs EmotionModel.load() (build + warm-up frame) first, as the
+startup hook does, and then takes the first request. Times are medians over runs.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("lazy", "startup")
+
+
+def child(mode: str, detector: str, side: int, requests: int):
+    """Runs in the measured process: prints one JSON line of timings"""
+    started = time.monotonic()
+    sys.path.insert(0, BACKEND_DIR)
+    import numpy as np
+    from modules.emotion_model import EmotionModel
+    timings = {"import": time.monotonic() - started}
+
+    model = EmotionModel(detector)
+    image = np.random.RandomState(0).randint(0, 255, (side * 3 // 4, side, 3), np.uint8)
+    if mode == "startup":
+        model.load()
+        timings["load"] = model.load_seconds
+        timings["warmup"] = model.warmup_seconds
+
+    requested = time.monotonic()
+    model.analyze(image)
+    timings["first_request"] = time.monotonic() - requested
+    latencies = []
+    for _ in range(requests):
+        requested = time.monotonic()
+        model.analyze(image)
+        latencies.append(time.monotonic() - requested)
+    timings["steady"] = statistics.median(latencies) if latencies else None
+    print(json.dumps(timings))
+
+
+def run(mode: str, args) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode, "--detector", args.detector,
+               "--side", str(args.side), "--requests", str(args.requests)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} run failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_of(runs, key: str) -> str:
+    values = [timing[key] for timing in runs if timing.get(key) is not None]
+    return f"{statistics.median(values):.2f}s" if values else "-"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per mode")
+    parser.add_argument("--detector", default="opencv", help="DeepFace detector backend")
+    parser.add_argument("--side", type=int, default=640, help="width of the random test frame (4:3)")
+    parser.add_argument("--requests", type=int, default=10, help="requests after the first, for the steady state")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.detector, args.side, args.requests)
+        return 0
+
+    for mode in MODES:
+        try:
+            runs = [run(mode, args) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        line = f"✅ {mode:<8} import {median_of(runs, 'import')}"
+        if mode == "startup":
+            line += f"  load {median_of(runs, 'load')}  warm-up {median_of(runs, 'warmup')}"
+        line += f"  first request {median_of(runs, 'first_request')}  steady {median_of(runs, 'steady')}"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
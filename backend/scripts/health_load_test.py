@@ -0,0 +1,90 @@
+"""
+Health Load Test
+Measures /health latency against a running backend, idle and while recommendation requests are in flight
+
+    python scripts/health_load_test.py --base-url http://localhost:8000 --concurrency 20
+
+With upstream I/O off the event loop, /health stays flat under load; a blocked
+loop shows up as loaded latencies close to a whole recommendation request.
+Exits non-zero when the loaded p95 exceeds --max-p95-ms.
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import requests
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def summary(samples: List[float]) -> str:
+    return (f"n={len(samples)} p50={statistics.median(samples):.1f}ms "
+            f"p95={percentile(samples, 0.95):.1f}ms max={max(samples):.1f}ms")
+
+
+def sample_health(session: requests.Session, base_url: str, count: int, interval: float) -> List[float]:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        session.get(f"{base_url}/health", timeout=30).raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(interval)
+    return latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=20, help="recommendation requests kept in flight")
+    parser.add_argument("--requests", type=int, default=100, help="recommendation requests in total")
+    parser.add_argument("--samples", type=int, default=50, help="/health probes per phase")
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between /health probes")
+    parser.add_argument("--mood", default="happy")
+    parser.add_argument("--max-p95-ms", type=float, default=100.0)
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip("/")
+
+    probe = requests.Session()
+    idle = sample_health(probe, base_url, args.samples, args.interval)
+    print(f"✅ /health idle:   {summary(idle)}")
+
+    done = threading.Event()
+    statuses: List[int] = []
+
+    def recommend(index: int):
+        if done.is_set():
+            return
+        response = requests.post(f"{base_url}/api/personalized-recommendations",
+                                 json={"mood": args.mood, "user_id": f"load-{index}", "limit": 20}, timeout=120)
+        statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(recommend, index) for index in range(args.requests)]
+        time.sleep(0.2)     # let the first wave reach the server
+        loaded = sample_health(probe, base_url, args.samples, args.interval)
+        done.set()
+        for future in futures:
+            try:
+                future.result()
+            except requests.RequestException as e:
+                print(f"⚠️  Recommendation request failed: {e}")
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ /health loaded: {summary(loaded)}")
+    print(f"   {len(statuses)} recommendation requests in {elapsed:.1f}s, "
+          f"statuses: { {code: statuses.count(code) for code in sorted(set(statuses))} }")
+    if percentile(loaded, 0.95) > args.max_p95_ms:
+        print(f"❌ Loaded /health p95 is over {args.max_p95_ms:.0f}ms: the event loop is being blocked")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
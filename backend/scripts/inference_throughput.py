@@ -0,0 +1,78 @@
+"""
+Inference Throughput
+Images/sec and latency percentiles of the mood inference pool, per-request vs micro-batched
+
+    python scripts/inference_throughput.py --workers 1 --clients 16 --batch-sizes 1 8
+
+Closed-loop clients each send --requests images back to back through
+InferencePool.analyze(), the path /detect-mood takes. Batch size 1 is the
+per-request path; larger sizes micro-batch concurrent images into one forward
+pass. Frames are random noise, so the detector finds no face and the whole
+frame is classified, which keeps the work per image constant.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def client(pool, image, requests: int, latencies: List[float]):
+    for _ in range(requests):
+        started = time.perf_counter()
+        await pool.analyze(image)
+        latencies.append(time.perf_counter() - started)
+
+
+async def measure(pool, image, clients: int, requests: int):
+    await asyncio.gather(*[pool.analyze(image) for _ in range(max(pool.workers, 1) * 2)])  # settle
+    latencies: List[float] = []
+    started = time.perf_counter()
+    await asyncio.gather(*[client(pool, image, requests, latencies) for _ in range(clients)])
+    return len(latencies) / (time.perf_counter() - started), latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=1, help="inference processes (0 = one thread in-process)")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent closed-loop clients")
+    parser.add_argument("--requests", type=int, default=6, help="images per client")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0)
+    parser.add_argument("--side", type=int, default=160, help="width of the random test frame (4:3)")
+    parser.add_argument("--detector", default="opencv", help="DeepFace detector backend")
+    args = parser.parse_args()
+
+    import numpy as np
+    from modules.inference_pool import InferencePool
+
+    image = np.random.RandomState(0).randint(0, 255, (args.side * 3 // 4, args.side, 3), np.uint8)
+    print(f"   {args.workers} worker(s), {args.clients} clients x {args.requests} images of "
+          f"{args.side}x{args.side * 3 // 4}")
+    for batch_size in args.batch_sizes:
+        pool = InferencePool(args.workers, queue_size=args.clients, detector_backend=args.detector,
+                             max_batch_size=batch_size, batch_wait=args.batch_wait_ms / 1000)
+        try:
+            if not pool.warm():
+                print(f"❌ Inference pool failed to warm up: {pool.error}")
+                return 1
+            images_per_second, latencies = asyncio.run(measure(pool, image, args.clients, args.requests))
+            stats = pool.get_stats()
+        finally:
+            pool.shutdown()
+        print(f"✅ batch size {batch_size:>2}: {images_per_second:6.2f} img/s  "
+              f"p50 {percentile(latencies, 0.5) * 1000:.0f}ms  p99 {percentile(latencies, 0.99) * 1000:.0f}ms  "
+              f"avg batch {stats['avg_batch_size'] or 1}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Mood Model Benchmark
+Times the compiled mood model against the per-track regex filter it replaced, on random tag/title pairs
+
+    python scripts/mood_model_benchmark.py --tracks 5000 --batch 60
+
+The old filter is rebuilt here as the baseline (tag set intersection, then one
+regex per mood over the title). Before timing, mood_mask() is checked against it
+for every mood; the script exits non-zero if any keep/skip decision differs.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.mood_detection import MoodDetector
+from modules.mood_model import MOOD_TITLE_KEYWORDS, mood_model
+
+NOISE_TAGS = ['indie', 'jazz', 'hip-hop', 'bollywood', 'classical', 'soul', '80s', 'female vocalists']
+NOISE_WORDS = ['night', 'road', 'city', 'summer', 'dream', 'fire', 'home', 'baby', 'tonight', 'world']
+
+
+def make_tracks(count: int, seed: int) -> Tuple[List[List[str]], List[str]]:
+    rng = random.Random(seed)
+    vocabulary = sorted({tag for info in MoodDetector.get_all_moods().values() for tag in info['tags']}) + NOISE_TAGS
+    keywords = sorted({kw for kws in MOOD_TITLE_KEYWORDS.values() for kw in kws})
+    tag_lists, titles = [], []
+    for _ in range(count):
+        tag_lists.append(rng.sample(vocabulary, rng.randint(0, 4)))
+        words = rng.sample(NOISE_WORDS, rng.randint(1, 3))
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        titles.append(' '.join(words).title())
+    return tag_lists, titles
+
+
+def old_filter(mood: str) -> Callable[[List[str], str], bool]:
+    """The engine's former _matches_mood for one mood"""
+    mood_tags = frozenset(tag.lower() for tag in MoodDetector.get_mood_tags(mood))
+    keywords = MOOD_TITLE_KEYWORDS.get(mood)
+    pattern = re.compile('|'.join(map(re.escape, keywords))) if keywords else None
+
+    def matches(tags: List[str], title: str) -> bool:
+        if not tags:
+            return True
+        if mood_tags.intersection(tags):
+            return True
+        return bool(pattern and pattern.search(title.lower()))
+    return matches
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=60, help="tracks per mood_mask() call, like one filter pass")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case, the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tag_lists, titles = make_tracks(args.tracks, args.seed)
+    pairs = list(zip(tag_lists, titles))
+    moods = list(MoodDetector.get_all_moods())
+
+    mismatches: Dict[str, int] = {}
+    for mood in moods:
+        matches = old_filter(mood)
+        expected = [matches(tags, title) for tags, title in pairs]
+        actual = mood_model.mood_mask(tag_lists, titles, mood).tolist()
+        mismatches[mood] = sum(a != b for a, b in zip(actual, expected))
+    if any(mismatches.values()):
+        print(f"❌ mood_mask() disagrees with the old filter: {mismatches}")
+        return 1
+    print(f"✅ mood_mask() matches the old filter on {args.tracks} tracks for {', '.join(moods)}")
+
+    def masks_in_batches():
+        for start in range(0, len(pairs), args.batch):
+            mood_model.mood_mask(tag_lists[start:start + args.batch], titles[start:start + args.batch], 'happy')
+
+    happy = old_filter('happy')
+    cases = [
+        ("old regex filter, one mood", lambda: [happy(tags, title) for tags, title in pairs]),
+        ("score(), all moods", lambda: [mood_model.score(tags, title) for tags, title in pairs]),
+        ("score_batch(), all moods", lambda: mood_model.score_batch(tag_lists, titles)),
+        (f"mood_mask(), batches of {args.batch}", masks_in_batches),
+    ]
+    for label, run in cases:
+        per_track = best_of(args.repeat, run) / args.tracks * 1e6
+        print(f"   {label:<36} {per_track:6.2f} us/track")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
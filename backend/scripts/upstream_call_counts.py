@@ -0,0 +1,177 @@
+"""
+Upstream Call Counts
+Counts the Last.fm requests behind one personalized and one basic recommendation, with eager and lazy playcounts
+
+    python scripts/upstream_call_counts.py --latency 0.05
+
+Runs the engine in-process against a fake Last.fm network (no API keys or
+network needed) and YouTube lookups switched off. Every run gets a fresh
+engine with an empty catalog and tag cache, so each one starts cold.
+The per-method counts are the engine's own upstream_calls from /api/cache-stats.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.config import Config
+
+_runtime_dir = tempfile.mkdtemp(prefix="moodtunes-calls-")
+Config.CACHE_FILE = os.path.join(_runtime_dir, "youtube_cache.json")
+Config.YOUTUBE_QUOTA_FILE = os.path.join(_runtime_dir, "youtube_quota.json")
+Config.ARTIST_SEED_FILE = os.path.join(_runtime_dir, "artist_seed.txt")
+Config.MOOD_POOLS_ENABLED = False
+
+from modules import recommendation_engine as engine_module
+from modules.models import PersonalizedRecommendationRequest, RecommendationRequest
+
+TopItem = namedtuple("TopItem", "item weight")
+
+
+class FakeLastFm:
+    """Just enough of pylast.LastFMNetwork for the engine, with a fixed latency per request"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def hit(self, method: str):
+        with self._lock:
+            self.calls[method] += 1
+        time.sleep(self.latency)
+
+    def get_tag(self, name):
+        return _Tag(self, name)
+
+    def get_artist(self, name):
+        return _Artist(self, name)
+
+    def get_track(self, artist, title):
+        return _Track(self, artist, title)
+
+    def search_for_artist(self, query):
+        self.hit('artist.search')
+        return _Search([_Named(query.title())])
+
+    def search_for_track(self, artist, query):
+        self.hit('track.search')
+        return _Search([_Track(self, artist or query, query)])
+
+
+class _Named:
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class _Search:
+    def __init__(self, items):
+        self.items = items
+
+    def get_next_page(self):
+        return self.items
+
+
+class _Track:
+    def __init__(self, network, artist, title):
+        self.network = network
+        self.artist = _Named(artist)
+        self.title = title
+
+    def get_url(self):
+        return f"https://www.last.fm/music/{self.artist.name}/_/{self.title}"
+
+    def get_playcount(self):
+        self.network.hit('track.getInfo')
+        return hash((self.artist.name, self.title)) % 100000
+
+    def get_top_tags(self, limit=None):
+        self.network.hit('track.getTopTags')
+        tags = ['pop', 'happy', 'dance'] if len(self.title) % 2 else ['rock', 'happy']
+        return [TopItem(_Named(tag), 100) for tag in tags][:limit]
+
+    def get_similar(self, limit=None):
+        self.network.hit('track.getSimilar')
+        return [TopItem(_Track(self.network, f"similar {i % 7}", f"{self.title} similar {i}"), 1.0)
+                for i in range(limit or 10)]
+
+
+class _Tag:
+    def __init__(self, network, name):
+        self.network = network
+        self.name = name
+
+    def get_top_tracks(self, limit=None):
+        self.network.hit('tag.getTopTracks')
+        return [TopItem(_Track(self.network, f"{self.name} artist {i % 9}", f"{self.name} song {i}"), 0)
+                for i in range(limit or 50)]
+
+
+class _Artist:
+    def __init__(self, network, name):
+        self.network = network
+        self.name = name
+
+    def get_top_tracks(self, limit=None):
+        self.network.hit('artist.getTopTracks')
+        return [TopItem(_Track(self.network, self.name, f"{self.name} hit {i}"), 5000 - i)
+                for i in range(limit or 50)]
+
+
+def run_once(name: str, request, lazy: bool, latency: float) -> Dict:
+    run_dir = tempfile.mkdtemp(dir=_runtime_dir)
+    Config.LAZY_PLAYCOUNT = lazy
+    Config.CATALOG_DB = os.path.join(run_dir, "catalog.db")
+    Config.TRACK_TAG_CACHE_FILE = os.path.join(run_dir, "track_tags.json")
+
+    engine = engine_module.RecommendationEngine()
+    engine.lastfm = FakeLastFm(latency)
+    recommend = (engine.get_personalized_recommendations if name == "personalized"
+                 else engine.get_basic_recommendations)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = recommend(request)
+    elapsed = time.perf_counter() - started
+    calls = engine.get_cache_stats()["upstream_calls"]
+    return {"calls": calls, "seconds": elapsed, "songs": [(s.artist, s.name) for s in result["songs"]]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake Last.fm request")
+    parser.add_argument("--mood", default="happy")
+    args = parser.parse_args()
+
+    engine_module.music_player.get_youtube_id = lambda *a, **k: None
+    engine_module.music_player.get_cached_youtube_id = lambda *a, **k: None
+
+    requests = {
+        "personalized": PersonalizedRecommendationRequest(mood=args.mood, preferences={
+            "language": "english", "favoriteSingers": "adele", "favoriteSongs": "Hello - Adele"}),
+        "basic": RecommendationRequest(mood=args.mood),
+    }
+    for name, request in requests.items():
+        eager = run_once(name, request, lazy=False, latency=args.latency)
+        lazy = run_once(name, request, lazy=True, latency=args.latency)
+        print(f"✅ {name}: {sum(eager['calls'].values())} -> {sum(lazy['calls'].values())} upstream calls "
+              f"({eager['seconds']:.2f}s -> {lazy['seconds']:.2f}s)")
+        for method in sorted(set(eager["calls"]) | set(lazy["calls"])):
+            print(f"   {method:<22} {eager['calls'].get(method, 0):>4} -> {lazy['calls'].get(method, 0):>4}")
+        if set(eager["songs"]) != set(lazy["songs"]):
+            print(f"⚠️  {name}: eager and lazy playcounts returned different songs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+YouTube Store Benchmark
+Insert latency of the write-behind YouTube ID store against the old rewrite-the-whole-file-per-insert cache
+
+    python scripts/youtube_store_benchmark.py --sizes 1000 10000 100000
+
+Inserts grow one store (in a temp dir) up to each size. The p50/p99 of the
+last --window inserts is compared with one json.dump(indent=2) of a cache
+of that size, which is what every miss used to cost. A crash check then tears
+the log tail, restarts the store and exits non-zero if any entry was lost.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.youtube_store import YouTubeIdStore
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def entry(index: int):
+    return f"artist {index} song {index}", f"vid{index:08d}"
+
+
+def old_rewrite_seconds(path: str, size: int) -> float:
+    data = dict(entry(index) for index in range(size))
+    started = time.perf_counter()
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--window", type=int, default=1000, help="inserts sampled at each size")
+    parser.add_argument("--flush-interval", type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="youtube-store-")
+    path = os.path.join(workdir, "youtube_cache.json")
+    try:
+        store = YouTubeIdStore(path, flush_interval=args.flush_interval)
+        print(f"   {'entries':>8}  {'insert p50':>11}  {'insert p99':>11}  {'old rewrite/insert':>19}")
+        inserted = 0
+        for size in sorted(args.sizes):
+            latencies = []
+            while inserted < size:
+                query, video_id = entry(inserted)
+                started = time.perf_counter()
+                store.set(query, video_id)
+                latencies.append(time.perf_counter() - started)
+                inserted += 1
+            window = latencies[-args.window:] or [0.0]
+            old = old_rewrite_seconds(os.path.join(workdir, "old.json"), size)
+            print(f"   {size:>8}  {percentile(window, 0.5) * 1e6:>9.1f}us  {percentile(window, 0.99) * 1e6:>9.1f}us  "
+                  f"{old * 1e3:>17.1f}ms")
+
+        store.close()
+        stats = store.get_stats()
+        print(f"✅ {stats['flushes']} flushes, {stats['compactions']} compactions, "
+              f"{stats['log_entries']} entries in the log, {stats['write_errors']} write errors")
+
+        # Crash in the middle of an append: the torn line is dropped, everything flushed survives
+        with open(store.log_path, 'a') as f:
+            f.write('["torn query", "vid')
+        restarted = YouTubeIdStore(path, flush_interval=args.flush_interval)
+        restarted.set("after restart", "vid-new")
+        restarted.close()
+        reloaded = YouTubeIdStore(path, flush_interval=args.flush_interval)
+        reloaded.close()
+        expected = inserted + 1
+        if len(reloaded) != expected or "torn query" in reloaded or reloaded.get("after restart") != "vid-new":
+            print(f"❌ Restart after a torn write reloaded {len(reloaded)} entries, expected {expected}")
+            return 1
+        print(f"✅ Restart after a torn write reloaded all {expected} entries")
+        return 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""Point the runtime files opened by the module-level singletons (catalog, caches, quota) at a temp dir"""
+import os
+import tempfile
+
+from modules.config import Config
+
+_runtime_dir = tempfile.mkdtemp(prefix="moodtunes-tests-")
+Config.CACHE_FILE = os.path.join(_runtime_dir, "youtube_cache.json")
+Config.YOUTUBE_QUOTA_FILE = os.path.join(_runtime_dir, "youtube_quota.json")
+Config.TRACK_TAG_CACHE_FILE = os.path.join(_runtime_dir, "track_tags.json")
+Config.CATALOG_DB = os.path.join(_runtime_dir, "catalog.db")
+Config.ARTIST_SEED_FILE = os.path.join(_runtime_dir, "artist_seed.txt")
@@ -0,0 +1,49 @@
+import pytest
+
+from modules.artist_index import ArtistIndex
+
+MIN_SCORE = 0.85
+
+
+@pytest.fixture
+def index():
+    artists = ArtistIndex()
+    artists.add_many(["Queen Latifah", "Drake Bell", "Pink Floyd", "Prince Royce", "Arijit Singh", "Coldplay"])
+    return artists
+
+
+@pytest.mark.parametrize("query", ["Queen", "Drake", "Pink", "Prince", "arijit"])
+def test_first_word_alone_is_not_a_confident_match(index, query):
+    assert index.best_match(query, MIN_SCORE) is None
+
+
+def test_prefix_match_stays_a_suggestion(index):
+    name, score = index.lookup("arijit")[0]
+    assert name == "Arijit Singh"
+    assert score < MIN_SCORE
+
+
+def test_exact_name_beats_longer_names(index):
+    index.add_many(["Queen", "Prince"])
+
+    assert index.best_match("queen", MIN_SCORE) == "Queen"
+    assert index.best_match("Prince", MIN_SCORE) == "Prince"
+    assert index.lookup("Queen") == [("Queen", 1.0)]
+
+
+def test_prefix_never_confident_even_with_a_low_threshold(index):
+    assert index.best_match("Queen", 0.5) is None
+
+
+def test_typos_still_match_locally(index):
+    assert index.best_match("Coldplai", MIN_SCORE) == "Coldplay"
+    assert index.best_match("Pink Floid", MIN_SCORE) == "Pink Floyd"
+
+
+def test_full_index_stops_counting_new_names():
+    artists = ArtistIndex(max_names=2)
+    artists.add_many(["A1", "B2", "C3", "D4", "A1"])
+
+    assert len(artists) == 2
+    assert len(artists._seen) == 2
+    assert artists._seen["a1"] == 2
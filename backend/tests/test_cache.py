@@ -0,0 +1,79 @@
+import pytest
+
+from modules import cache
+from modules.cache import ResponseCache, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_fresh_then_stale_then_expired(clock):
+    c = TTLCache(maxsize=10, ttl=10, stale_ttl=5)
+    c.set("k", "v")
+
+    assert c.lookup("k") == ("v", "fresh")
+    clock[0] += 12
+    assert c.lookup("k") == ("v", "stale")
+    assert c.get("k") == "v"
+    clock[0] += 5
+    assert c.lookup("k") == (None, None)
+    assert len(c) == 0
+
+    stats = c.get_stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"], stats["expirations"]) == (1, 2, 1, 1)
+
+
+def test_lru_eviction_keeps_recently_used(clock):
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+
+    assert "a" in c and "c" in c
+    assert "b" not in c
+    assert c.get_stats()["evictions"] == 1
+
+
+def test_byte_bound_evicts(clock):
+    c = TTLCache(maxsize=100, ttl=60, max_bytes=2000)
+    for i in range(20):
+        c.set(i, "x" * 200)
+
+    assert c.get_stats()["bytes"] <= 2000
+    assert 0 < len(c) < 20
+
+
+def test_negative_entries_use_their_own_ttl(clock):
+    c = TTLCache(maxsize=10, ttl=3600)
+    c.set("missing", None, ttl=5, negative=True)
+    assert c.get_stats()["negative_entries"] == 1
+    clock[0] += 6
+
+    assert "missing" not in c
+    c.set("missing", "found")
+    assert c.get_stats()["negative_entries"] == 0
+
+
+def test_peek_does_not_count(clock):
+    c = TTLCache(maxsize=10, ttl=60)
+    c.set("k", "v")
+
+    assert c.peek("k") == "v"
+    assert c.peek("other", "default") == "default"
+    assert c.get_stats()["hits"] == 0
+
+
+def test_response_cache_serves_smaller_limits(clock):
+    responses = ResponseCache({"tag.getTopTracks": 60}, maxsize=10)
+    responses.put("tag.getTopTracks", ("Pop",), 60, list(range(60)))
+
+    assert responses.get("tag.getTopTracks", (" pop ",), 15) == (list(range(15)), "fresh")
+    assert responses.get("tag.getTopTracks", ("pop",), 100) == (None, None)
+    # A smaller fetch never replaces a fresh, larger answer
+    responses.put("tag.getTopTracks", ("pop",), 10, list(range(10)))
+    assert responses.cached_limit("tag.getTopTracks", ("pop",)) == 60
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import pytest
+
+from modules import catalog
+from modules.catalog import TrackCatalog
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(catalog.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TrackCatalog(str(tmp_path / "catalog.db"))
+
+
+def song(name, artist, playcount=None):
+    return SimpleNamespace(name=name, artist=artist, lastfm_url=f"https://last.fm/{artist}/{name}", playcount=playcount)
+
+
+def test_track_expires_after_max_age(store, clock):
+    store.put_track("Yellow", "Coldplay", playcount=500)
+
+    assert store.get_track("yellow", "COLDPLAY", max_age=60)["playcount"] == 500
+    clock[0] += 61
+    assert store.get_track("Yellow", "Coldplay", max_age=60) is None
+    # Without max_age a stale row still answers (outage fallback)
+    assert store.get_track("Yellow", "Coldplay")["playcount"] == 500
+
+
+def test_non_lastfm_writes_do_not_refresh(store, clock):
+    store.put_track("Yellow", "Coldplay", playcount=500)
+    clock[0] += 61
+    store.set_youtube_id("Coldplay", "Yellow", "yt-id")
+    store.put_track_tags("Coldplay", "Yellow", ["rock"])
+    store.put_similar("Coldplay", "Yellow", [{"name": "Fix You", "artist": "Coldplay"}], limit=1)
+
+    assert store.get_track("Yellow", "Coldplay", max_age=60) is None
+    assert store.get_playcount("Coldplay", "Yellow", max_age=60) is None
+    assert store.get_track("Yellow", "Coldplay")["youtube_id"] == "yt-id"
+
+
+def test_track_without_lastfm_data_is_never_fresh(store, clock):
+    store.set_youtube_id("Coldplay", "Yellow", "yt-id")
+
+    assert store.get_track("Yellow", "Coldplay", max_age=60) is None
+    store.set_playcount("Coldplay", "Yellow", 42)
+    assert store.get_playcount("Coldplay", "Yellow", max_age=60) == 42
+
+
+def test_known_fields_are_not_overwritten_with_null(store, clock):
+    store.put_track("Yellow", "Coldplay", lastfm_url="https://last.fm/yellow", playcount=500)
+    store.put_track("Yellow", "Coldplay", playcount=600)
+
+    record = store.get_track("Yellow", "Coldplay")
+    assert (record["lastfm_url"], record["playcount"]) == ("https://last.fm/yellow", 600)
+
+
+def test_tag_chart_freshness_and_limit(store, clock):
+    store.put_tag_chart("pop", [song(f"Song {i}", f"Artist {i}", 100 - i) for i in range(20)], limit=20)
+
+    chart = store.get_tag_chart("Pop", limit=5, max_age=60)
+    assert [record["name"] for record in chart] == [f"Song {i}" for i in range(5)]
+    assert store.get_tag_chart("pop", limit=50, max_age=60) is None
+    clock[0] += 61
+    assert store.get_tag_chart("pop", limit=5, max_age=60) is None
+    assert len(store.get_tag_chart("pop", limit=5)) == 5
+
+
+def test_smaller_fetch_keeps_longer_chart(store, clock):
+    store.put_tag_chart("pop", [song(f"Song {i}", "A") for i in range(20)], limit=20)
+    store.put_tag_chart("pop", [song("New 0", "A"), song("New 1", "A")], limit=2)
+
+    chart = store.get_tag_chart("pop", limit=20)
+    assert [record["name"] for record in chart[:3]] == ["New 0", "New 1", "Song 2"]
+    assert len(chart) == 20
+
+
+def test_similar_edges_round_trip(store, clock):
+    store.put_similar("Coldplay", "Yellow", [{"name": "Fix You", "artist": "Coldplay"},
+                                             {"name": "Clocks", "artist": "Coldplay"}], limit=2)
+
+    similar = store.get_similar("coldplay", "yellow", limit=2, max_age=60)
+    assert [record["name"] for record in similar] == ["Fix You", "Clocks"]
+    assert store.get_similar("Coldplay", "Yellow", limit=10, max_age=60) is None
+
+
+def test_only_fallback_reads_count_as_outage_hits(store, clock):
+    store.put_track("Yellow", "Coldplay", playcount=500)
+    store.put_tag_chart("rock", [song("Yellow", "Coldplay")], limit=1)
+
+    # Local-first reads of any age (e.g. similarity results) are regular hits
+    assert store.get_track("Yellow", "Coldplay") is not None
+    assert store.get_tag_chart("rock", 1) is not None
+    assert (store.hits, store.outage_hits) == (2, 0)
+
+    assert store.get_track("Yellow", "Coldplay", outage=True) is not None
+    assert store.get_tag_chart("rock", 1, outage=True) is not None
+    assert store.get_track("Missing", "Nobody", outage=True) is None
+    stats = store.get_stats()
+    assert (stats["hits"], stats["outage_hits"], stats["misses"]) == (2, 2, 1)
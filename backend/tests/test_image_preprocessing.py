@@ -0,0 +1,51 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from modules.image_preprocessing import ImageTooLarge, InvalidImage, UploadedImage, probe_size
+from modules.mood_detection import MoodDetector
+
+
+def encode(width, height, fmt="PNG"):
+    buf = io.BytesIO()
+    Image.new("L", (width, height)).save(buf, fmt)
+    return buf.getvalue()
+
+
+def test_probe_reads_size_from_header():
+    assert probe_size(encode(64, 32)) == (64, 32)
+
+
+def test_over_the_pixel_limit_is_too_large():
+    with pytest.raises(ImageTooLarge):
+        probe_size(encode(1000, 1000), max_pixels=500_000)
+
+
+def test_decompression_bomb_is_too_large_not_invalid():
+    # Past Pillow's bomb threshold: a small file claiming 200 MP
+    with pytest.raises(ImageTooLarge):
+        probe_size(encode(20000, 10000))
+
+
+def test_undecodable_upload_is_invalid():
+    with pytest.raises(InvalidImage):
+        probe_size(b"not an image")
+
+
+def test_reduced_decode_caps_the_longer_side():
+    upload = UploadedImage(encode(2000, 1000, "JPEG"), max_dimension=640)
+    assert max(upload.image.shape[:2]) == 640
+    assert upload.decode_factor == 2
+
+
+@pytest.mark.parametrize("data, status", [
+    (encode(20000, 10000), 413),
+    (b"not an image", 400),
+])
+def test_detect_mood_status_codes(data, status):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(MoodDetector.detect_from_bytes(data))
+    assert error.value.status_code == status
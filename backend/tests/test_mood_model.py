@@ -0,0 +1,68 @@
+import numpy as np
+
+from modules.mood_model import MoodModel, mood_model
+
+
+def test_tags_and_title_keywords_score_their_moods():
+    scores = mood_model.score(["pop", "pop", "chill"], "Dance With Me")
+
+    assert scores["happy"] == 1.0 + 0.5      # 'pop' once despite the duplicate, plus 'dance' in the title
+    assert scores["calm"] == 1.0
+    assert scores["sad"] == 0.0
+
+
+def test_overlapping_title_keywords_are_all_found():
+    # 'heartbreak' contains 'heart': one scan credits both sad and romantic
+    scores = mood_model.score([], "Heartbreak Hotel")
+
+    assert scores["sad"] == 0.5
+    assert scores["romantic"] == 0.5
+
+
+def test_a_word_can_be_a_tag_for_one_mood_and_a_keyword_for_another():
+    scores = mood_model.score(["rock"], "Rock Steady")
+
+    assert scores["intense"] == 1.0
+    assert scores["energetic"] == 0.5
+
+
+def test_score_batch_matches_score_row_by_row():
+    tag_lists = [["pop", "dance"], [], ["metal", "unknown-tag"], ["ambient"]]
+    titles = ["Party Tonight", "Lonely Road", "", "Soothing Rain"]
+
+    tag_scores, title_scores = mood_model.score_batch(tag_lists, titles)
+
+    assert tag_scores.shape == title_scores.shape == (4, len(mood_model.moods))
+    for row, (tags, title) in enumerate(zip(tag_lists, titles)):
+        expected = mood_model.score(tags, title)
+        assert dict(zip(mood_model.moods, tag_scores[row] + title_scores[row])) == expected
+
+
+def test_mood_mask_keeps_untagged_tagged_matches_and_title_matches():
+    tag_lists = [[], ["acoustic"], ["metal"], ["metal"]]
+    titles = ["Anything", "Quiet Song", "Tears Of Steel", "Thunder"]
+
+    assert mood_model.mood_mask(tag_lists, titles, "sad").tolist() == [True, True, True, False]
+
+
+def test_mood_mask_for_an_unknown_mood_keeps_only_untagged_tracks():
+    mask = mood_model.mood_mask([[], ["pop"]], ["Happy", "Happy"], "nostalgic")
+
+    assert mask.dtype == np.bool_
+    assert mask.tolist() == [True, False]
+
+
+def test_mood_from_emotions_folds_emotions_into_moods():
+    scores = mood_model.mood_from_emotions({"angry": 30, "disgust": 10, "happy": 55.5, "confused": 4.5})
+
+    assert scores["intense"] == 40.0
+    assert scores["happy"] == 55.5
+    assert set(scores) == set(mood_model.moods)     # unmapped emotions are dropped
+
+
+def test_model_built_from_custom_tables():
+    model = MoodModel({"calm": ["Chill"]}, {"calm": ["rain"], "romantic": ["love"]}, {"neutral": "calm"})
+
+    assert model.moods == ["calm", "romantic"]
+    assert model.score(["chill"], "Love In The Rain") == {"calm": 1.5, "romantic": 0.5}
+    assert model.mood_from_emotions({"neutral": 80}) == {"calm": 80.0, "romantic": 0.0}
@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+import pytest
+
+from modules.perceptual_cache import PerceptualCache, dhash
+
+
+def frame(seed, brightness=0, quality=90, size=(480, 640)):
+    """A JPEG of a smooth random scene; the same seed gives the same scene"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 200, (6, 8, 3), dtype=np.uint8)
+    image = cv2.resize(small, size[::-1], interpolation=cv2.INTER_CUBIC).astype(np.int16) + brightness
+    ok, encoded = cv2.imencode(".jpg", np.clip(image, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    assert ok
+    return encoded.tobytes()
+
+
+@pytest.fixture
+def cache():
+    return PerceptualCache(maxsize=16, ttl=60, max_distance=4)
+
+
+def test_same_bytes_hit_exactly(cache):
+    data = frame(1)
+    _, key, phash = cache.lookup(data)
+    cache.set(key, phash, "happy")
+
+    assert cache.lookup(data)[0] == "happy"
+    assert cache.get_stats()["exact_hits"] == 1
+
+
+@pytest.mark.parametrize("variant", [
+    dict(quality=60),
+    dict(brightness=10),
+    dict(size=(240, 320)),
+])
+def test_near_duplicate_frames_hit(cache, variant):
+    _, key, phash = cache.lookup(frame(1))
+    cache.set(key, phash, "happy")
+
+    assert cache.lookup(frame(1, **variant))[0] == "happy"
+    assert cache.get_stats()["similar_hits"] == 1
+
+
+def test_distinct_frames_miss(cache):
+    _, key, phash = cache.lookup(frame(1))
+    cache.set(key, phash, "happy")
+
+    for seed in range(2, 10):
+        assert cache.lookup(frame(seed))[0] is None
+    assert cache.get_stats()["similar_hits"] == 0
+
+
+def test_entries_expire(cache, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("modules.perceptual_cache.time.monotonic", lambda: now[0])
+    data = frame(1)
+    _, key, phash = cache.lookup(data)
+    cache.set(key, phash, "happy")
+    now[0] += 61
+
+    assert cache.lookup(data)[0] is None
+
+
+def test_reduced_decode_gives_the_same_hash():
+    data = frame(3, size=(1200, 1600))
+    assert bin(dhash(data) ^ dhash(data, longer_side=1600)).count("1") <= 2
+
+
+def test_undecodable_bytes_have_no_hash():
+    assert dhash(b"not an image") is None
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from modules.models import PersonalizedRecommendationRequest, Song
+from modules.recommendation_engine import RecommendationEngine
+
+
+def song(name, playcount):
+    return Song(id=name, name=name, artist="Shared Artist", playcount=playcount)
+
+
+# The artist's top tracks and the tag charts share four songs
+SHARED = [song(f"Shared {i}", 900 - i) for i in range(4)]
+ARTIST_ONLY = [song(f"Artist {i}", 500 - i) for i in range(12)]
+CHART_ONLY = [song(f"Chart {i}", 300 - i) for i in range(40)]
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = RecommendationEngine()
+    engine.lastfm = object()
+
+    def artist_top_tracks(artist, limit=10, mood_filter=None):
+        time.sleep(0.2)     # finishes last, after every tag chart
+        return (SHARED + ARTIST_ONLY)[:limit]
+
+    monkeypatch.setattr(engine, "fuzzy_match_artist", lambda query: query)
+    monkeypatch.setattr(engine, "get_artist_top_tracks", artist_top_tracks)
+    monkeypatch.setattr(engine, "get_top_tracks_by_tag", lambda tag, limit=20: (SHARED + CHART_ONLY)[:limit])
+    return engine
+
+
+def request():
+    return PersonalizedRecommendationRequest(
+        mood="happy", limit=20, resolve_youtube=False,
+        preferences={"language": "english", "favoriteSingers": ["Shared Artist"]}
+    )
+
+
+def test_stream_matches_non_streaming_with_overlapping_categories(engine):
+    expected = engine.get_personalized_recommendations(request())
+    events = list(engine.stream_personalized_recommendations(request()))
+
+    categories = [event for event in events if event["event"] == "category"]
+    assert [event["category"] for event in categories] == [
+        "artist_based", "language_mood", "similar_tracks", "fallback"
+    ]
+    # Shared songs belong to the higher-priority artist category, even though its lookup finished last
+    assert {s.name for s in SHARED} <= {s.name for s in categories[0]["songs"]}
+
+    summary = events[-1]
+    assert summary["event"] == "summary"
+    assert summary["distribution"] == expected["distribution"]
+    assert [s.name for s in summary["songs"]] == [s.name for s in expected["songs"]]
@@ -0,0 +1,58 @@
+from collections import namedtuple
+
+from modules.similarity import TagSimilarityIndex
+from modules.track_tags import TrackTagService
+
+TopItem = namedtuple("TopItem", "item weight")
+
+
+class FakeTag:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeTrack:
+    """Stand-in pylast.Track: only track.getTopTags is answered"""
+
+    def __init__(self, artist, title, tags):
+        self.artist = FakeTag(artist)
+        self.title = title
+        self.tags = tags
+        self.calls = 0
+
+    def get_top_tags(self, limit=None):
+        self.calls += 1
+        return [TopItem(FakeTag(tag), 100) for tag in self.tags][:limit]
+
+
+def make_service(tmp_path, index):
+    return TrackTagService(str(tmp_path / "track_tags.json"), ttl=3600, maxsize=100, max_workers=4,
+                           on_tags=index.add_track, negative_ttl=60)
+
+
+def test_top_tags_fill_the_index(tmp_path):
+    index = TagSimilarityIndex()
+    service = make_service(tmp_path, index)
+    seed = FakeTrack("Seed", "Sunny", ["Pop", "happy", "dance"])
+    service.prefetch([
+        seed,
+        FakeTrack("Other", "Bright", ["pop", "happy"]),
+        FakeTrack("Loud", "Noise", ["metal"]),
+    ])
+
+    assert len(index) == 3
+    assert index.tags_for("Seed", "Sunny") == ["dance", "happy", "pop"]
+    similar = index.most_similar(service.get_tags(seed), k=5, exclude=("Seed", "Sunny"), min_score=0.1)
+    assert [(artist, title) for artist, title, _ in similar] == [("Other", "Bright")]
+    assert seed.calls == 1
+
+
+def test_untagged_tracks_are_cached_but_not_indexed(tmp_path):
+    index = TagSimilarityIndex()
+    service = make_service(tmp_path, index)
+    track = FakeTrack("Nobody", "Untagged", [])
+
+    assert service.get_tags(track) == []
+    assert service.get_tags(track) == []
+    assert track.calls == 1
+    assert len(index) == 0
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        release.wait(5)
+        return key.upper()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "k", fetch, "k") for _ in range(8)]
+        while flight.get_stats()["merged"] < 7:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result(5) for future in futures]
+
+    assert results == ["K"] * 8
+    assert calls == ["k"]
+    stats = flight.get_stats()
+    assert (stats["executions"], stats["merged"], stats["in_flight"]) == (1, 7, 0)
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, "k", fail) for _ in range(4)]
+        while flight.get_stats()["merged"] < 3:
+            time.sleep(0.001)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(5)
+
+    assert flight.do("k", lambda: "recovered") == "recovered"
+    assert flight.get_stats()["errors"] == 1
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("test")
+
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.get_stats()["executions"] == 2
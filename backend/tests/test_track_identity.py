@@ -0,0 +1,35 @@
+from modules.track_identity import canonical_artists, query_key, track_key
+
+
+def test_query_key_folds_case_accents_and_punctuation():
+    assert query_key("Beyoncé - Halo!") == query_key("beyoncé halo")
+    assert query_key("ＡＢＣ  Song") == "abc song"
+
+
+def test_query_key_strips_annotations():
+    assert query_key('Song: Maar Dala - From "Devdas"') == "maar dala"
+    assert query_key("Coldplay Yellow (Remastered 2011)") == "coldplay yellow"
+    assert query_key("Coldplay Yellow (feat. Someone)") == "coldplay yellow"
+
+
+def test_query_key_keeps_word_order():
+    assert query_key("Sam Smith Stay With Me") == "sam smith stay with me"
+    assert query_key("Stay With Me Sam Smith") != query_key("Sam Smith Stay With Me")
+    assert query_key("Simon and Garfunkel The Boxer") == "simon and garfunkel the boxer"
+
+
+def test_query_key_drops_joiners_only_in_featured_suffix():
+    expected = "artist title b c"
+    assert query_key("Artist Title feat. B & C") == expected
+    assert query_key("artist title ft B, C") == expected
+    assert query_key("Artist Title featuring B and C") == expected
+
+
+def test_query_key_is_idempotent():
+    for query in ["Artist Title feat. B & C", "Stay With Me", 'Song: X - From "Y"']:
+        assert query_key(query_key(query)) == query_key(query)
+
+
+def test_track_key_ignores_artist_order_and_joiners():
+    assert canonical_artists("A feat. B & C") == ["a", "b", "c"]
+    assert track_key("B & A", "Song (Radio Edit)") == track_key("A, B", "song")
@@ -0,0 +1,54 @@
+import time
+from collections import namedtuple
+
+from modules.track_tags import TrackTagService
+
+TopItem = namedtuple("TopItem", "item weight")
+
+
+class FakeTag:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeTrack:
+    def __init__(self, artist, title, tags):
+        self.artist = FakeTag(artist)
+        self.title = title
+        self.tags = tags
+        self.calls = 0
+
+    def get_top_tags(self, limit=None):
+        self.calls += 1
+        return [TopItem(FakeTag(tag), 100) for tag in self.tags][:limit]
+
+
+def make_service(tmp_path, save_interval=3600):
+    return TrackTagService(str(tmp_path / "track_tags.json"), ttl=3600, maxsize=100, max_workers=4,
+                           save_interval=save_interval)
+
+
+def test_prefetch_leaves_the_write_to_the_background(tmp_path):
+    service = make_service(tmp_path)
+    service.prefetch([FakeTrack("Seed", "Sunny", ["pop"]), FakeTrack("Other", "Rain", ["sad"])])
+
+    assert not (tmp_path / "track_tags.json").exists()
+    assert service.fetches == 2
+
+    service.close()
+    reloaded = make_service(tmp_path)
+    track = FakeTrack("Seed", "Sunny", ["ignored"])
+    assert reloaded.get_tags(track) == ["pop"]
+    assert track.calls == 0
+
+
+def test_save_thread_persists_new_tags(tmp_path):
+    service = make_service(tmp_path, save_interval=0.05)
+    service.prefetch([FakeTrack("Seed", "Sunny", ["pop"])])
+
+    deadline = time.monotonic() + 5
+    while not (tmp_path / "track_tags.json").exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert (tmp_path / "track_tags.json").exists()
+    service.close()
+    assert make_service(tmp_path).get_tags(FakeTrack("Seed", "Sunny", [])) == ["pop"]
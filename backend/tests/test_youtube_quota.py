@@ -0,0 +1,33 @@
+import json
+
+from modules.youtube_quota import YouTubeQuota
+
+
+def make_quota(tmp_path, save_interval=3600):
+    return YouTubeQuota(daily_units=1000, search_cost=100, state_file=str(tmp_path / "quota.json"),
+                        save_interval=save_interval)
+
+
+def test_acquire_does_not_write_until_the_interval(tmp_path):
+    quota = make_quota(tmp_path)
+    assert quota.acquire(interactive=True)
+    assert quota.acquire(interactive=True)
+
+    assert not (tmp_path / "quota.json").exists()
+    quota.flush()
+    assert json.loads((tmp_path / "quota.json").read_text())["spent"]["interactive"] == 200
+
+
+def test_spend_survives_a_restart(tmp_path):
+    quota = make_quota(tmp_path, save_interval=0)
+    quota.acquire(interactive=True)
+
+    assert make_quota(tmp_path).spent["interactive"] == 100
+
+
+def test_exhaustion_is_written_at_once(tmp_path):
+    make_quota(tmp_path).mark_exhausted()
+
+    restarted = make_quota(tmp_path)
+    assert not restarted.acquire(interactive=True)
+    assert restarted.get_stats()["exhausted"]
@@ -0,0 +1,121 @@
+import json
+import os
+
+from modules import youtube_store
+from modules.youtube_store import YouTubeIdStore
+
+
+def make_store(tmp_path, **kwargs):
+    # A long interval keeps the background thread out of the way: tests flush explicitly
+    kwargs.setdefault("flush_interval", 3600)
+    return YouTubeIdStore(str(tmp_path / "youtube_cache.json"), **kwargs)
+
+
+def read_snapshot(store):
+    with open(store.path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_entries_survive_a_restart(tmp_path):
+    store = make_store(tmp_path)
+    store.set("adele hello", "vid1")
+    store.set("coldplay yellow", "vid2")
+    store.close()
+
+    reloaded = make_store(tmp_path)
+    assert len(reloaded) == 2
+    assert reloaded["adele hello"] == "vid1"
+    assert reloaded.get("coldplay yellow") == "vid2"
+
+
+def test_log_replays_over_the_snapshot(tmp_path):
+    path = tmp_path / "youtube_cache.json"
+    path.write_text(json.dumps({"a": "old", "b": "kept"}), encoding="utf-8")
+    with open(f"{path}.log", "w", encoding="utf-8") as f:
+        f.write(json.dumps(["a", "new"]) + "\n")
+        f.write(json.dumps(["c", "added"]) + "\n")
+
+    store = make_store(tmp_path)
+    assert dict((key, store[key]) for key in "abc") == {"a": "new", "b": "kept", "c": "added"}
+    assert store.get_stats()["log_entries"] == 2
+
+    # Replaying the same log again gives the same state
+    store.load()
+    assert len(store) == 3 and store["a"] == "new"
+
+
+def test_torn_log_tail_is_dropped_and_appends_start_on_a_clean_line(tmp_path):
+    store = make_store(tmp_path)
+    store.set("complete", "vid1")
+    store.close()
+    with open(store.log_path, "a", encoding="utf-8") as f:
+        f.write('["torn", "vi')
+
+    restarted = make_store(tmp_path)
+    assert "torn" not in restarted
+    assert restarted["complete"] == "vid1"
+    restarted.set("after crash", "vid2")
+    restarted.close()
+
+    reloaded = make_store(tmp_path)
+    assert len(reloaded) == 2
+    assert reloaded["after crash"] == "vid2"
+
+
+def test_set_during_compaction_is_not_lost(tmp_path, monkeypatch):
+    store = make_store(tmp_path, compact_min_entries=2)
+    real_replace = os.replace
+
+    def replace_while_a_set_lands(src, dst):
+        # The snapshot copy is already taken: this entry must stay pending, not vanish with the log
+        monkeypatch.setattr(youtube_store.os, "replace", real_replace)
+        store.set("late", "vid-late")
+        real_replace(src, dst)
+
+    store.set("first", "vid1")
+    store.set("second", "vid2")
+    monkeypatch.setattr(youtube_store.os, "replace", replace_while_a_set_lands)
+    store.flush()
+
+    assert store.compactions == 1
+    assert "late" not in read_snapshot(store)
+    assert store.get_stats()["pending_writes"] == 1
+    store.close()
+
+    reloaded = make_store(tmp_path)
+    assert {key: reloaded[key] for key in ("first", "second", "late")} == {
+        "first": "vid1", "second": "vid2", "late": "vid-late"}
+
+
+def test_compaction_rewrites_the_snapshot_and_empties_the_log(tmp_path):
+    store = make_store(tmp_path, compact_min_entries=3)
+    for index in range(3):
+        store.set(f"song {index}", f"vid{index}")
+    store.flush()
+
+    assert store.compactions == 1
+    assert len(read_snapshot(store)) == 3
+    assert os.path.getsize(store.log_path) == 0
+
+
+def test_migrate_rekeys_once_and_is_idempotent(tmp_path):
+    store = make_store(tmp_path)
+    store.set("Adele  Hello", "vid1")
+    store.set("coldplay yellow", "vid2")
+    store.set("DROP ME", "vid3")
+    store.flush()
+
+    def key_fn(key):
+        return "" if key == "DROP ME" else " ".join(key.lower().split())
+
+    assert store.migrate(key_fn) == 2
+    assert read_snapshot(store) == {"adele hello": "vid1", "coldplay yellow": "vid2"}
+    compactions = store.compactions
+
+    assert store.migrate(key_fn) == 0
+    assert store.compactions == compactions
+    store.close()
+
+    reloaded = make_store(tmp_path)
+    assert reloaded.migrate(key_fn) == 0
+    assert len(reloaded) == 2 and reloaded["adele hello"] == "vid1"